@@ -1,11 +1,11 @@
 import os
 import io
-import requests
 import zipfile
 import shutil
 from datetime import datetime
-from flask import Flask, render_template, redirect, url_for, flash, request, jsonify, send_file
+from flask import Flask, render_template, redirect, url_for, flash, request, jsonify, send_file, make_response
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import joinedload
 from flask_migrate import Migrate
 from flask_wtf.csrf import CSRFProtect
 import logging
@@ -13,7 +13,6 @@ import pandas as pd
 from docx import Document
 from docx.shared import Inches
 from PIL import Image
-from bs4 import BeautifulSoup
 import tempfile
 
 from config import Config
@@ -21,7 +20,15 @@ from models import db, MediaPlacement, GoogleCredential
 from forms import AddPlacementForm, GoogleCredentialForm
 from utils import setup_logging, take_screenshot
 from google_integration import google_bp, docket_bp, get_google_docs_content, get_google_sheets_content
-from parsers import extract_links, parse_media_links
+from jobs import jobs_bp, job_handler, enqueue_job
+from deadline import Deadline
+from parsers import extract_links
+from page_artifacts import get_page_artifact, ensure_page_artifacts, artifact_summary
+from screenshot_farm import capture_many
+from image_processing import prepare_screenshot
+from ingest import ingest_links
+from placement_listing import SORTS, DEFAULT_SORT, parse_filters, filtered_query, list_placements, filter_options
+from link_files import save_upload, read_link_file
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -45,6 +52,7 @@ def utility_processor():
 # Register blueprints
 app.register_blueprint(google_bp)
 app.register_blueprint(docket_bp)
+app.register_blueprint(jobs_bp)
 
 @app.route('/')
 def index():
@@ -52,150 +60,132 @@ def index():
 
 @app.route('/dashboard')
 def dashboard():
-    placements = MediaPlacement.query.order_by(MediaPlacement.created_at.desc()).all()
-    return render_template('dashboard.html', placements=placements)
+    # Filters, sort order and pagination are applied in SQL; only one page of cards is rendered
+    filters = parse_filters(request.args)
+    sort = request.args.get('sort') if request.args.get('sort') in SORTS else DEFAULT_SORT
+    placements, next_cursor = list_placements(filters, sort, request.args.get('cursor'))
+    next_url = url_for('dashboard', **dict(request.args.to_dict(), cursor=next_cursor)) if next_cursor else None
+    
+    # "Load more" on the page fetches just the next page of cards
+    if request.args.get('partial'):
+        response = make_response(render_template('placement_cards.html', placements=placements))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    
+    # Pages after the first link back to it, keeping the filters
+    first_url = None
+    if request.args.get('cursor'):
+        first_url = url_for('dashboard', **{key: value for key, value in request.args.items() if key != 'cursor'})
+    
+    total = MediaPlacement.query.count()
+    matching = filtered_query(filters).count() if filters else total
+    media_types, sources = filter_options()
+    return render_template('dashboard.html', placements=placements, next_url=next_url, total=total,
+                           matching=matching, filters=filters, sort=sort, sorts=SORTS,
+                           media_types=media_types, sources=sources, first_url=first_url)
 
 @app.route('/add_placement', methods=['GET', 'POST'])
 def add_placement():
     form = AddPlacementForm()
-    app.logger.info("Adding new placement",form.input_type.data)
+    app.logger.info(f"Adding new placement: {form.input_type.data}")
     if form.validate_on_submit():
         # Handle direct text input
         if form.input_type.data == 'direct':
-            text_content = form.text_input.data
-            links = extract_links(text_content)
-            if not links:
+            if not extract_links(form.text_input.data):
                 flash('No valid media links found in the provided text.', 'warning')
                 return render_template('add_placement.html', form=form)
-                
-            # Parse and save links
-            added_count = 0
-            for link in links:
-                placement_data = parse_media_links(link)
-                if placement_data:
-                    placement = MediaPlacement(
-                        url=link,
-                        title=placement_data.get('title', ''),
-                        source=placement_data.get('source', ''),
-                        publication_date=placement_data.get('date'),
-                        media_type=placement_data.get('type', 'article')
-                    )
-                    db.session.add(placement)
-                    added_count += 1
+            payload = {'input_type': 'direct', 'text': form.text_input.data}
+        
+        # Handle uploaded CSV/Excel/Word files: saved for the worker, which streams them
+        elif form.input_type.data == 'upload':
+            upload = form.link_file.data
+            try:
+                payload = {'input_type': 'upload', 'path': save_upload(upload), 'filename': upload.filename}
+            except (OSError, ValueError) as e:
+                app.logger.error(f"Could not save uploaded file {upload.filename}: {str(e)}")
+                flash(f'Could not save the uploaded file: {str(e)}', 'danger')
+                return render_template('add_placement.html', form=form)
+        
+        # Handle Google Docs and Sheets
+        else:
+            # Get the first Google credential (since we no longer have user-specific credentials)
+            google_cred = GoogleCredential.query.first()
+            if not google_cred:
+                flash('Google API credentials are not set up. Please add them in Settings.', 'warning')
+                return redirect(url_for('settings'))
             
-            if added_count > 0:
-                try:
-                    db.session.commit()
-                    flash(f'Successfully added {added_count} media placements!', 'success')
-                    return redirect(url_for('dashboard'))
-                except Exception as e:
-                    db.session.rollback()
-                    app.logger.error(f"Database error when adding placements: {str(e)}")
-                    flash(f'Error saving to database: {str(e)}', 'danger')
-                    return render_template('add_placement.html', form=form)
+            if form.input_type.data == 'gdoc':
+                payload = {'input_type': 'gdoc', 'source_id': form.google_doc_id.data}
             else:
-                flash('Could not extract media information from the provided links.', 'warning')
+                payload = {'input_type': 'gsheet', 'source_id': form.google_sheet_id.data}
         
-        # Handle Google Docs
-        elif form.input_type.data == 'gdoc':
-            doc_id = form.google_doc_id.data
-            app.logger.info("Google Doc ID:", doc_id)
-            try:
-                # Get the first Google credential (since we no longer have user-specific credentials)
-                google_cred = GoogleCredential.query.first()
-                print(google_cred)
-                if not google_cred:
-                    flash('Google API credentials are not set up. Please add them in Settings.', 'warning')
-                    return redirect(url_for('settings'))
-                    
-                content = get_google_docs_content(doc_id)
-                links = extract_links(content)
-                print("LInks from Google Doc:", links)
-                if not links:
-                    flash('No valid media links found in the Google Doc.', 'warning')
-                    return render_template('add_placement.html', form=form)
-                
-                # Parse and save links
-                added_count = 0
-                for link in links:
-                    placement_data = parse_media_links(link)
-                    if placement_data:
-                        placement = MediaPlacement(
-                            url=link,
-                            title=placement_data.get('title', ''),
-                            source=placement_data.get('source', ''),
-                            publication_date=placement_data.get('date'),
-                            media_type=placement_data.get('type', 'article')
-                        )
-                        db.session.add(placement)
-                        added_count += 1
-                
-                if added_count > 0:
-                    try:
-                        db.session.commit()
-                        flash(f'Successfully added {added_count} media placements from Google Doc!', 'success')
-                        return redirect(url_for('dashboard'))
-                    except Exception as e:
-                        db.session.rollback()
-                        app.logger.error(f"Database error when adding placements from Google Doc: {str(e)}")
-                        flash(f'Error saving to database: {str(e)}', 'danger')
-                        return render_template('add_placement.html', form=form)
-                else:
-                    flash('Could not extract media information from the links in the Google Doc.', 'warning')
-            except Exception as e:
-                app.logger.error(f"Error accessing Google Doc: {e}")
-                flash(f'Error accessing Google Doc: {str(e)}', 'danger')
-        
-        # Handle Google Sheets
-        elif form.input_type.data == 'gsheet':
-            sheet_id = form.google_sheet_id.data
-            try:
-                # Get the first Google credential (since we no longer have user-specific credentials)
-                google_cred = GoogleCredential.query.first()
-                if not google_cred:
-                    flash('Google API credentials are not set up. Please add them in Settings.', 'warning')
-                    return redirect(url_for('settings'))
-                    
-                content = get_google_sheets_content(sheet_id)
-                links = extract_links(content)
-                
-                if not links:
-                    flash('No valid media links found in the Google Sheet.', 'warning')
-                    return render_template('add_placement.html', form=form)
-                
-                # Parse and save links
-                added_count = 0
-                for link in links:
-                    placement_data = parse_media_links(link)
-                    if placement_data:
-                        placement = MediaPlacement(
-                            url=link,
-                            title=placement_data.get('title', ''),
-                            source=placement_data.get('source', ''),
-                            publication_date=placement_data.get('date'),
-                            media_type=placement_data.get('type', 'article')
-                        )
-                        db.session.add(placement)
-                        added_count += 1
-                
-                if added_count > 0:
-                    try:
-                        db.session.commit()
-                        flash(f'Successfully added {added_count} media placements from Google Sheet!', 'success')
-                        return redirect(url_for('dashboard'))
-                    except Exception as e:
-                        db.session.rollback()
-                        app.logger.error(f"Database error when adding placements from Google Sheet: {str(e)}")
-                        flash(f'Error saving to database: {str(e)}', 'danger')
-                        return render_template('add_placement.html', form=form)
-                else:
-                    flash('Could not extract media information from the links in the Google Sheet.', 'warning')
-            except Exception as e:
-                app.logger.error(f"Error accessing Google Sheet: {e}")
-                flash(f'Error accessing Google Sheet: {str(e)}', 'danger')
+        # Fetching metadata for every link is slow, so hand it to a worker
+        payload['action_title'] = 'Adding Media Placements'
+        payload['description'] = 'Extracting links and fetching details for each placement...'
+        job = enqueue_job('add_placement', payload)
+        return redirect(url_for('jobs.wait_for_job', job_id=job.id))
         
     return render_template('add_placement.html', form=form)
 
+@job_handler('add_placement')
+def run_add_placement_job(job, payload):
+    """Extract links from the submitted source and save a placement for each."""
+    input_type = payload.get('input_type')
+    job.result = {'redirect_endpoint': 'dashboard'}
+    
+    if input_type == 'gdoc':
+        job.update(message='Reading Google Doc...')
+        content = get_google_docs_content(payload['source_id'])
+        source_label = ' from Google Doc'
+        link_location = 'the Google Doc'
+    elif input_type == 'gsheet':
+        job.update(message='Reading Google Sheet...')
+        content = get_google_sheets_content(payload['source_id'])
+        source_label = ' from Google Sheet'
+        link_location = 'the Google Sheet'
+    elif input_type == 'upload':
+        job.update(message=f"Reading {payload['filename']}...")
+        content = read_link_file(payload['path'], payload['filename'])
+        source_label = f" from {payload['filename']}"
+        link_location = payload['filename']
+    else:
+        content = [payload.get('text', '')]
+        source_label = ''
+        link_location = 'the provided text'
+    
+    # Links are fetched as they are found in the source and saved in small batches
+    try:
+        stats = ingest_links(
+            content,
+            full_pages=app.config['METADATA_MODE'] == 'full',
+            progress_callback=lambda done, total: job.update(
+                progress=done, total=total, message=f'Fetched details for {done} of {total} new links...'),
+            deadline=job.deadline
+        )
+    finally:
+        # Uploads are only kept until imported (a job requeued after a crash still finds its file)
+        if input_type == 'upload':
+            try:
+                os.remove(payload['path'])
+            except OSError as e:
+                app.logger.warning(f"Could not remove uploaded file {payload['path']}: {str(e)}")
+    
+    skipped_label = f' {stats["skipped"]} duplicate links were skipped.' if stats['skipped'] else ''
+    if not stats['found']:
+        job.message = f'No valid media links found in {link_location}.'
+        job.result['category'] = 'warning'
+    elif stats['added']:
+        job.message = f'Successfully added {stats["added"]} media placements{source_label}!{skipped_label}'
+        if job.deadline.expired:
+            job.message += ' Some were saved without details because the time limit was reached.'
+    elif stats['skipped']:
+        job.message = f'No new media placements in {link_location}.{skipped_label}'
+        job.result['category'] = 'info'
+    else:
+        job.message = f'Could not extract media information from the links in {link_location}.'
+        job.result['category'] = 'warning'
+
 @app.route('/placement/<int:placement_id>')
 def view_placement(placement_id):
     placement = MediaPlacement.query.filter_by(id=placement_id).first_or_404()
@@ -254,8 +244,8 @@ def not_found_error(error):
 def export_excel():
     """Export all media placements to an Excel file directly."""
     try:
-        # Get all placements
-        placements = MediaPlacement.query.all()
+        # Get all placements along with their stored page artifacts
+        placements = MediaPlacement.query.options(joinedload(MediaPlacement.artifact)).all()
         
         if not placements:
             flash('No media placements found to export.', 'info')
@@ -314,14 +304,24 @@ def create_docx_docket(placement_id):
     # Get the placement
     placement = MediaPlacement.query.filter_by(id=placement_id).first_or_404()
     
-    # # Show loading screen first
-    # if request.args.get('start') != 'true':
-    #     return render_template(
-    #         'loading.html',
-    #         action_title='Creating Docket',
-    #         message=f'Taking a screenshot and preparing docket for "{placement.title or "Untitled"}"'
-    #     )
+    # Screenshot and summary fetches run on a worker; show the loading screen meanwhile
+    job = enqueue_job('docx_docket', {
+        'placement_id': placement.id,
+        'action_title': 'Creating Docket',
+        'description': f'Taking a screenshot and preparing docket for "{placement.title or "Untitled"}"'
+    })
+    return redirect(url_for('jobs.wait_for_job', job_id=job.id))
+
+@job_handler('docx_docket')
+def run_docx_docket_job(job, payload):
+    """Build the Word docket for a placement as a downloadable job artifact."""
+    placement = db.session.get(MediaPlacement, payload['placement_id'])
+    if not placement:
+        raise ValueError('Media placement not found.')
     
+    job.update(progress=0, total=3, message='Taking screenshot...')
+    # Budget for this docket; the screenshot may use most of it, the rest is kept for the summary
+    deadline = job.deadline.child(app.config['PLACEMENT_DEADLINE'])
     try:
         
         # Create a new Word document
@@ -361,28 +361,19 @@ def create_docx_docket(placement_id):
         
         # Create a loading paragraph
         print("Now taking screenshot...")
-        # Try to take a screenshot of the URL using Selenium
+        # Try to take a screenshot of the URL
         try:
-            # Create a temporary file for the screenshot
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_screenshot_path = temp_file.name
-            
             # Show status in logs
             app.logger.info(f"Taking screenshot of {placement.url}")
             
             # Take the screenshot using our utility function
-            screenshot_path = take_screenshot(placement.url, temp_screenshot_path)
+            screenshot = take_screenshot(placement.url, deadline=deadline.share(0.75))
             
-            if screenshot_path:
-                # Add the screenshot to the document
-                doc.add_picture(screenshot_path, width=Inches(6.0))
+            if screenshot:
+                # Add the downscaled, recompressed screenshot to the document
+                image = prepare_screenshot(screenshot, app.config['SCREENSHOT_DOCX_PRESET'])
+                doc.add_picture(io.BytesIO(image), width=Inches(6.0))
                 doc.add_paragraph(f"Screenshot taken on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # Clean up the temporary file
-                try:
-                    os.unlink(temp_screenshot_path)
-                except:
-                    pass
             else:
                 doc.add_paragraph("Screenshot could not be captured. The website may be protected or requires authentication.")
         except Exception as e:
@@ -391,65 +382,36 @@ def create_docx_docket(placement_id):
         
         # Add summary section
         doc.add_heading("Summary", level=2)
-        print("Now extracting summary...")
-        # Try to extract a summary
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(placement.url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to get the main article content
-            article = soup.find('article') or soup.find(class_=['article', 'post', 'content', 'main-content'])
-            
-            if article:
-                paragraphs = article.find_all('p')
-                content = ' '.join([p.get_text().strip() for p in paragraphs[:5]])  # Get first 5 paragraphs
-            else:
-                # Fallback to all paragraphs
-                paragraphs = soup.find_all('p')
-                content = ' '.join([p.get_text().strip() for p in paragraphs[:5]])
-            
-            # Limit summary length
-            if content:
-                content = content[:1000] + '...' if len(content) > 1000 else content
-                doc.add_paragraph(content)
-            else:
-                doc.add_paragraph("No text content could be extracted from this page.")
-                
-        except Exception as e:
-            app.logger.error(f"Error extracting summary for {placement.url}: {str(e)}")
-            doc.add_paragraph(f"Error extracting summary: {str(e)}")
+        job.update(progress=1, message='Loading summary...')
+        # Summary comes from the stored page artifact; the page is only fetched if missing
+        doc.add_paragraph(artifact_summary(get_page_artifact(placement, deadline)))
         
         # Add notes section
         doc.add_heading("Notes", level=2)
         doc.add_paragraph(placement.notes or "No notes available")
         
-        # Save the document to a BytesIO object
-        docx_file = io.BytesIO()
-        doc.save(docx_file)
-        docx_file.seek(0)
-        
         # Create a sanitized title for filename
         safe_title = ''.join(c for c in (placement.title or "untitled") if c.isalnum() or c in ' -_')[:30]
         safe_title = safe_title.replace(' ', '_')
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        # Return the document as a download
-        return send_file(
-            docx_file,
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            as_attachment=True,
-            download_name=f'docket_{safe_title}_{timestamp}.docx'
+        download_name = f'docket_{safe_title}_{timestamp}.docx'
+        
+        # Save the document as the job's download
+        job.update(progress=2, message='Saving document...')
+        docx_path = job.artifact_file(download_name)
+        doc.save(docx_path)
+        job.set_artifact(
+            docx_path,
+            download_name,
+            'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
         )
+        job.update(progress=3)
+        job.message = 'Docket created successfully!'
+        job.result = {'redirect_endpoint': 'view_placement', 'redirect_args': {'placement_id': placement.id}}
         
     except Exception as e:
         app.logger.error(f"Error creating DOCX docket: {str(e)}")
-        flash(f'Error creating DOCX docket: {str(e)}', 'danger')
-        return redirect(url_for('view_placement', placement_id=placement_id))
+        raise ValueError(f'Error creating DOCX docket: {str(e)}')
 
 @app.route('/export/excel/<int:placement_id>')
 def export_single_excel(placement_id):
@@ -507,44 +469,44 @@ def export_single_excel(placement_id):
 @app.route('/export/complete')
 def export_complete_package():
     """Export all media placements with their dockets as a complete ZIP package."""
+    if not MediaPlacement.query.count():
+        flash('No media placements found to export.', 'info')
+        return redirect(url_for('dashboard'))
+    
+    # Building every docket takes minutes, so hand it to a worker
+    job = enqueue_job('complete_export', {
+        'action_title': 'Creating Complete Export Package',
+        'description': 'Generating dockets and preparing ZIP file with all data...'
+    })
+    return redirect(url_for('jobs.wait_for_job', job_id=job.id))
+
+@job_handler('complete_export')
+def run_complete_export_job(job, payload):
+    """Build the complete ZIP export package as a downloadable job artifact."""
     try:
-        # Create a loading page first
-        # if request.args.get('start') != 'true':
-        #     return render_template(
-        #         'loading.html',
-        #         action_title='Creating Complete Export Package',
-        #         message='Generating dockets and preparing ZIP file with all data...'
-        #     )
-            
-        # Get all placements
-        placements = MediaPlacement.query.all()
+        # Get all placements along with their stored page artifacts
+        placements = MediaPlacement.query.options(joinedload(MediaPlacement.artifact)).all()
         
         if not placements:
-            flash('No media placements found to export.', 'info')
-            return redirect(url_for('dashboard'))
+            job.message = 'No media placements found to export.'
+            job.result = {'redirect_endpoint': 'dashboard', 'category': 'info'}
+            return
         
-        # Create temporary directory to store files
-        temp_dir = tempfile.mkdtemp()
-        dockets_dir = os.path.join(temp_dir, 'dockets')
-        os.makedirs(dockets_dir, exist_ok=True)
+        job.update(progress=0, total=len(placements), message=f'Creating dockets for {len(placements)} placements...')
         
-        # Prepare data for Excel with local hyperlinks to dockets
-        data = []
+        # Dockets go to a temporary directory, or to the caller's work directory
+        # so an interrupted export (e.g. from the command line) can be resumed
+        work_dir = payload.get('work_dir') or tempfile.mkdtemp()
+        claim_export_work_dir(work_dir)
+        dockets_dir = os.path.join(work_dir, 'dockets')
         
-        # Process each placement and create docket if needed
-        for placement in placements:
-            # Create a unique filename for the docket
-            safe_title = ''.join(c for c in (placement.title or "untitled") if c.isalnum() or c in ' -_')[:30]
-            safe_title = safe_title.replace(' ', '_')
-            docket_filename = f'docket_{placement.id}_{safe_title}.docx'
-            docket_path = os.path.join(dockets_dir, docket_filename)
-            
-            # Create the docket file
-            create_docket_for_export(placement, docket_path)
-            
-            # Add data with hyperlink to local docket file
-            docket_rel_path = f'dockets/{docket_filename}'
-            data.append({
+        # Prepare data for Excel with local hyperlinks to dockets
+        rows = {}
+        filenames = {}
+        for placement, filename in build_dockets(placements, dockets_dir, deadline=job.deadline,
+                                                 max_workers=payload.get('max_workers')):
+            filenames[placement.id] = filename
+            rows[placement.id] = {
                 'ID': placement.id,
                 'Title': placement.title or "Untitled",
                 'URL': placement.url,
@@ -552,15 +514,20 @@ def export_complete_package():
                 'Publication Date': str(placement.publication_date) if placement.publication_date else "Unknown",
                 'Media Type': placement.media_type,
                 'Google Docket': placement.docket_url or "No Google docket",
-                'Local Docket': f'=HYPERLINK("./dockets/{docket_filename}", "Open Docket")',
+                'Local Docket': (f'=HYPERLINK("./dockets/{filename}", "Open Docket")' if filename
+                                 else "Docket could not be created"),
                 'Created': placement.created_at.strftime('%Y-%m-%d %H:%M:%S'),
                 'Updated': placement.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
                 'Notes': placement.notes or ""
-            })
+            }
+            job.update(progress=len(rows), message=f'Created docket {len(rows)} of {len(placements)}')
+        
+        # Keep the spreadsheet in the original placement order
+        data = [rows[placement.id] for placement in placements]
         
         # Create Excel file
         df = pd.DataFrame(data)
-        excel_path = os.path.join(temp_dir, 'media_placements.xlsx')
+        excel_path = os.path.join(work_dir, 'media_placements.xlsx')
         
         with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
             df.to_excel(writer, sheet_name='Media Placements', index=False)
@@ -572,7 +539,7 @@ def export_complete_package():
                 worksheet.column_dimensions[chr(65 + idx)].width = max_length
         
         # Create README file
-        readme_path = os.path.join(temp_dir, 'README.txt')
+        readme_path = os.path.join(work_dir, 'README.txt')
         with open(readme_path, 'w') as f:
             f.write("Media Placements Export Package\n")
             f.write("==============================\n\n")
@@ -585,44 +552,139 @@ def export_complete_package():
             f.write("2. Open the Excel file to view all placements\n")
             f.write("3. Click on 'Open Docket' links to open the corresponding docket files\n")
         
-        # Create ZIP file in memory
-        memory_file = io.BytesIO()
+        # Create ZIP file as the job's download
+        job.update(message='Packaging ZIP file...')
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        download_name = f'media_placements_complete_{timestamp}.zip'
+        zip_path = job.artifact_file(download_name)
         
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add Excel file
-            zipf.write(excel_path, arcname='media_placements.xlsx')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            # Add Excel file (already a compressed container, so store it as-is)
+            zipf.write(excel_path, arcname='media_placements.xlsx', compress_type=zipfile.ZIP_STORED)
             
             # Add README
             zipf.write(readme_path, arcname='README.txt')
             
-            # Add all docket files
-            for root, dirs, files in os.walk(dockets_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.join('dockets', file)
-                    zipf.write(file_path, arcname=arcname)
-        
-        # Clean up temporary directory
-        shutil.rmtree(temp_dir)
-        
-        # Prepare ZIP for download
-        memory_file.seek(0)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        
-        return send_file(
-            memory_file,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'media_placements_complete_{timestamp}.zip'
-        )
+            # Add this export's dockets (not leftovers in the folder); DOCX files are compressed already
+            for filename in sorted(set(filter(None, filenames.values()))):
+                zipf.write(os.path.join(dockets_dir, filename), arcname=os.path.join('dockets', filename),
+                           compress_type=zipfile.ZIP_STORED)
+        
+        # Clean up what the export wrote once it is packaged
+        shutil.rmtree(dockets_dir)
+        for path in (excel_path, readme_path, os.path.join(work_dir, EXPORT_WORK_MARKER)):
+            os.remove(path)
+        try:
+            os.rmdir(work_dir)
+        except OSError:
+            pass
+        
+        job.set_artifact(zip_path, download_name, 'application/zip')
+        job.message = f'Export package with {len(placements)} placements is ready!'
+        missing = sum(1 for filename in filenames.values() if filename is None)
+        if missing:
+            job.message += f' {missing} dockets could not be created.'
+        if job.deadline.expired:
+            job.message += ' Some dockets are incomplete because the time limit was reached.'
+        job.result = {'redirect_endpoint': 'dashboard'}
         
     except Exception as e:
         app.logger.error(f"Error creating complete export package: {str(e)}")
-        flash(f'Error creating export package: {str(e)}', 'danger')
-        return redirect(url_for('dashboard'))
+        raise ValueError(f'Error creating export package: {str(e)}')
+
+# Marks a work directory as an export's, so only those are written into and cleaned up
+EXPORT_WORK_MARKER = '.media-placements-export'
+
+# Suffix of the marker beside a docket saved without its screenshot because time ran out
+RETRY_SUFFIX = '.retry'
+
+def claim_export_work_dir(work_dir):
+    """
+    Make ``work_dir`` an export work directory, creating it if needed.
+    
+    Raises:
+        ValueError: If the directory has other contents and no export marker,
+        i.e. it was not created by an export.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    marker = os.path.join(work_dir, EXPORT_WORK_MARKER)
+    if not os.path.exists(marker):
+        if os.listdir(work_dir):
+            raise ValueError(f'{work_dir} is not empty and is not an export work directory')
+        open(marker, 'w').close()
+
+def docket_filename(placement):
+    """File name of a placement's Word docket in an export package."""
+    safe_title = ''.join(c for c in (placement.title or "untitled") if c.isalnum() or c in ' -_')[:30]
+    return f'docket_{placement.id}_{safe_title.replace(" ", "_")}.docx'
 
-def create_docket_for_export(placement, output_path):
-    """Create a Word docket for a specific placement and save to the given path."""
+def build_dockets(placements, dockets_dir, deadline=None, max_workers=None):
+    """
+    Write a Word docket for each placement into ``dockets_dir``.
+    
+    Dockets already in the directory are kept, so a run that was interrupted
+    picks up where it stopped. Pages without a stored artifact are fetched
+    first, then screenshots are captured concurrently and each docket is
+    written (to a temporary name, then renamed) as soon as its screenshot is
+    ready. A docket saved without its screenshot because the time budget ran
+    out is marked (``RETRY_SUFFIX``) and written again by the next run.
+    ``max_workers`` caps the concurrent screenshots (see ``capture_many``).
+    
+    Yields:
+        tuple: ``(placement, docket file name)`` as each docket is ready,
+        existing ones first. The name is None if no docket could be written.
+    """
+    deadline = deadline or Deadline()
+    os.makedirs(dockets_dir, exist_ok=True)
+    
+    # Dockets an interrupted run was still writing
+    for filename in os.listdir(dockets_dir):
+        if filename.endswith('.part'):
+            os.remove(os.path.join(dockets_dir, filename))
+    
+    pending = {}
+    for placement in placements:
+        docket_path = os.path.join(dockets_dir, docket_filename(placement))
+        if os.path.exists(docket_path) and not os.path.exists(docket_path + RETRY_SUFFIX):
+            yield placement, docket_filename(placement)
+        else:
+            pending.setdefault(placement.url, []).append(placement)
+    if not pending:
+        return
+    
+    # Fetch pages that have no stored artifact yet, concurrently and only once
+    # Each phase gets a share of the time budget so a slow phase can't starve the rest
+    ensure_page_artifacts([placement for group in pending.values() for placement in group],
+                          deadline=deadline.share(0.3))
+    
+    capture_deadline = deadline.share(0.8)
+    for url, screenshot in capture_many(pending, timeout=10, max_workers=max_workers,
+                                        deadline=capture_deadline):
+        # No screenshot because time ran out, rather than because the page failed
+        retry = screenshot is None and capture_deadline.expired
+        for placement in pending[url]:
+            docket_path = os.path.join(dockets_dir, docket_filename(placement))
+            if create_docket_for_export(placement, docket_path + '.part', screenshot=screenshot,
+                                        capture_screenshot=False, deadline=deadline):
+                os.replace(docket_path + '.part', docket_path)
+                if retry:
+                    open(docket_path + RETRY_SUFFIX, 'w').close()
+                elif os.path.exists(docket_path + RETRY_SUFFIX):
+                    os.remove(docket_path + RETRY_SUFFIX)
+            elif os.path.exists(docket_path + '.part'):
+                os.remove(docket_path + '.part')
+            # A docket kept from an earlier run still counts if this one failed
+            yield placement, docket_filename(placement) if os.path.exists(docket_path) else None
+
+def create_docket_for_export(placement, output_path, screenshot=None, capture_screenshot=True, deadline=None):
+    """
+    Create a Word docket for a specific placement and save to the given path.
+    
+    Pass ``screenshot`` (PNG bytes) when it was already captured, e.g. by the
+    screenshot farm; with ``capture_screenshot=False`` a missing screenshot is
+    not retried here. Once ``deadline`` is spent nothing more is fetched and
+    the docket is saved with whatever is available.
+    """
     try:
         # Create a new Word document
         doc = Document()
@@ -662,59 +724,23 @@ def create_docket_for_export(placement, output_path):
         
         # Try to take a screenshot (with faster timeout)
         try:
-            with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp_file:
-                temp_screenshot_path = temp_file.name
+            if screenshot is None and capture_screenshot:
+                screenshot = take_screenshot(placement.url, timeout=10, deadline=deadline)
             
-            # Take the screenshot with reduced timeout
-            screenshot_path = take_screenshot(placement.url, temp_screenshot_path, timeout=10)
-            
-            if screenshot_path:
-                # Add the screenshot to the document
-                doc.add_picture(screenshot_path, width=Inches(6.0))
+            if screenshot:
+                # Add the downscaled, recompressed screenshot to the document
+                image = prepare_screenshot(screenshot, app.config['SCREENSHOT_DOCX_PRESET'])
+                doc.add_picture(io.BytesIO(image), width=Inches(6.0))
                 doc.add_paragraph(f"Screenshot taken on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                # Clean up temp file
-                try:
-                    os.unlink(temp_screenshot_path)
-                except:
-                    pass
+            else:
+                doc.add_paragraph("Screenshot could not be captured - please visit the URL directly.")
         except Exception as e:
             app.logger.error(f"Error taking screenshot for export: {str(e)}")
             doc.add_paragraph(f"Error capturing screenshot - please visit the URL directly.")
         
         # Add summary section
         doc.add_heading("Summary", level=2)
-        
-        # Try to extract a summary with shorter timeout
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(placement.url, headers=headers, timeout=5)
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to get the main article content
-            article = soup.find('article') or soup.find(class_=['article', 'post', 'content', 'main-content'])
-            
-            if article:
-                paragraphs = article.find_all('p')
-                content = ' '.join([p.get_text().strip() for p in paragraphs[:3]])  # Get first 3 paragraphs
-            else:
-                # Fallback to all paragraphs with limit
-                paragraphs = soup.find_all('p')[:5]
-                content = ' '.join([p.get_text().strip() for p in paragraphs])
-            
-            # Limit summary length
-            if content:
-                content = content[:800] + '...' if len(content) > 800 else content
-                doc.add_paragraph(content)
-            else:
-                doc.add_paragraph("No text content could be extracted from this page.")
-                
-        except Exception as e:
-            app.logger.error(f"Error extracting summary for export: {str(e)}")
-            doc.add_paragraph("Could not extract summary - please visit the URL directly.")
+        doc.add_paragraph(artifact_summary(get_page_artifact(placement, deadline)))
         
         # Add notes section
         doc.add_heading("Notes", level=2)
@@ -0,0 +1,135 @@
+"""
+Benchmark publication date parsing against the previous strptime loop.
+
+Parses a corpus of meta tag values in the formats real outlets publish and
+reports, for the old parser and the new one (cold, and with each outlet's
+learned format), the share of values parsed and the time per call. Then
+extracts ambiguous numeric dates from generated page heads with and without
+the per-domain format cache.
+
+Usage:
+    python benchmarks/date_benchmark.py [--rounds 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+import date_parsing
+from date_parsing import parse_date, find_publication_date
+
+# (outlet, meta value) pairs as published in article:published_time, pubdate and friends
+CORPUS = [
+    ('nytimes.com', '2024-05-17T08:30:00.000Z'),
+    ('theguardian.com', '2024-05-17T08:30:12.000Z'),
+    ('washingtonpost.com', '2024-05-17T04:30:00-04:00'),
+    ('bbc.co.uk', '2024-05-17T07:00:41.000Z'),
+    ('cnn.com', '2024-05-17T12:01:33Z'),
+    ('reuters.com', '2024-05-17T10:15:27.123Z'),
+    ('bloomberg.com', '2024-05-17T14:00:00.000Z'),
+    ('forbes.com', '2024-05-17T09:00:00-04:00'),
+    ('techcrunch.com', '2024-05-17T16:05:22+00:00'),
+    ('theverge.com', '2024-05-17T13:00:00.000Z'),
+    ('wired.com', '2024-05-17T06:00:00.000-04:00'),
+    ('lemonde.fr', '2024-05-17T10:00:00+02:00'),
+    ('spiegel.de', '2024-05-17T18:12:00+02:00'),
+    ('timesofindia.indiatimes.com', '2024-05-17T11:53:00+05:30'),
+    ('abc.net.au', '2024-05-17T20:30:00+10:00'),
+    ('wsj.com', '2024-05-17'),
+    ('apnews.com', '2024-05-17 08:30:00'),
+    ('nbcnews.com', '2024/05/17'),
+    ('usatoday.com', '05/17/2024'),
+    ('dailymail.co.uk', '17/05/2024'),
+    ('independent.co.uk', '17 May 2024'),
+    ('foxnews.com', 'May 17, 2024'),
+    ('news.yahoo.com', 'Fri, 17 May 2024 08:30:00 GMT'),
+    ('businessinsider.com', '20240517'),
+    ('axios.com', '1715934600'),
+    ('politico.com', '2024-05-17T08:30'),
+    ('npr.org', '2024-05-17T04:00:07-04:00'),
+    ('latimes.com', 'Sept. 5, 2024'),
+]
+
+def legacy_parse_date_string(date_str):
+    """The parser this replaces: ten strptime formats, catching ValueError for each miss."""
+    formats = ['%Y-%m-%d', '%Y/%m/%d', '%d/%m/%Y', '%m/%d/%Y', '%B %d, %Y', '%b %d, %Y',
+               '%d %B %Y', '%d %b %Y', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%SZ']
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def time_calls(fn, values, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for value in values:
+            fn(value)
+    return (time.perf_counter() - started) / (rounds * len(values))
+
+def page_head(outlet, value, index):
+    return (f'<html><head><title>Story {index} - {outlet}</title>'
+            f'<meta property="og:title" content="Story {index}">'
+            f'<meta name="description" content="Story {index} from {outlet}">'
+            f'<meta name="robots" content="max-image-preview:large">'
+            f'<meta name="pubdate" content="{value}"></head><body></body></html>')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000, help='Passes over the corpus per timing')
+    args = parser.parse_args()
+
+    values = [value for _, value in CORPUS]
+    legacy_hits = sum(legacy_parse_date_string(value) is not None for value in values)
+    new_results = [parse_date(value) for value in values]
+    new_hits = sum(parsed is not None for parsed, _ in new_results)
+    learned = {value: fmt for value, (_, fmt) in zip(values, new_results)}
+
+    legacy_time = time_calls(legacy_parse_date_string, values, args.rounds)
+    cold_time = time_calls(lambda value: parse_date(value), values, args.rounds)
+    warm_time = time_calls(lambda value: parse_date(value, learned[value]), values, args.rounds)
+
+    print(f"Corpus: {len(values)} meta values from {len(CORPUS)} outlets")
+    print(f"{'parser':28} {'parsed':>8} {'us/call':>9} {'speedup':>8}")
+    print(f"{'strptime loop (old)':28} {legacy_hits:>4}/{len(values):<3} {legacy_time * 1e6:>9.2f} {1:>7.1f}x")
+    print(f"{'date_parsing, cold':28} {new_hits:>4}/{len(values):<3} {cold_time * 1e6:>9.2f} {legacy_time / cold_time:>7.1f}x")
+    print(f"{'date_parsing, learned':28} {new_hits:>4}/{len(values):<3} {warm_time * 1e6:>9.2f} {legacy_time / warm_time:>7.1f}x")
+    for outlet, value in CORPUS:
+        if legacy_parse_date_string(value) is None:
+            parsed, fmt = parse_date(value)
+            print(f"    old parser missed {outlet}: {value!r} -> {parsed} ({fmt})")
+
+    # Page heads from outlets with numeric dates, in random order. Without the
+    # domain cache, dates like 05/06/2024 are always read day-first; with it,
+    # each outlet's order is learned from its first unambiguous date.
+    rng = random.Random(7)
+    pages = []
+    for outlet, pattern in (('usatoday.com', '{m:02d}/{d:02d}/{y}'), ('dailymail.co.uk', '{d:02d}/{m:02d}/{y}')):
+        for day in range(1, 29):
+            published = date(2024, 5, day)
+            value = pattern.format(d=day, m=5, y=2024)
+            pages.append((outlet, BeautifulSoup(page_head(outlet, value, day), 'html.parser'), published))
+    rng.shuffle(pages)
+
+    date_parsing._learned.clear()
+    started = time.perf_counter()
+    with_cache = sum(find_publication_date(soup, '', outlet) == published for outlet, soup, published in pages)
+    cached_time = (time.perf_counter() - started) / len(pages)
+    started = time.perf_counter()
+    without_cache = sum(find_publication_date(soup, '') == published for outlet, soup, published in pages)
+    uncached_time = (time.perf_counter() - started) / len(pages)
+    print()
+    print(f"Numeric-date page heads: {without_cache}/{len(pages)} correct without the domain cache "
+          f"({uncached_time * 1e6:.1f} us/page), {with_cache}/{len(pages)} with it ({cached_time * 1e6:.1f} us/page)")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+Benchmark head-only metadata extraction against full-page parsing.
+
+For every page, runs both modes and reports bytes read, parse CPU time and
+peak parse memory, and checks that title, source, type and date agree.
+Exits non-zero if any page's fields differ.
+
+Usage:
+    python benchmarks/metadata_benchmark.py https://example.com/article ...
+    python benchmarks/metadata_benchmark.py --html saved_page.html ...
+    python benchmarks/metadata_benchmark.py --synthetic 5
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from config import Config
+from http_client import http_get
+from parsers import read_head, decode_html, metadata_from_html
+
+FIELDS = ('title', 'source', 'type', 'date')
+
+def synthetic_page(index, body_bytes=2 * 1024 * 1024):
+    """A heavy news-style page: large inline scripts in the head and a long body."""
+    script = '<script>window.__STATE__ = "' + 'x' * 60000 + '";</script>'
+    paragraph = '<p>' + 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 20 + '</p>'
+    body = paragraph * (body_bytes // len(paragraph))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>Synthetic article {index}</title>'
+        f'<meta property="og:title" content="Synthetic headline {index}">'
+        '<meta property="article:published_time" content="2024-05-17T08:30:00Z">'
+        f'{script}</head><body><h1>Synthetic headline {index}</h1>{body}</body></html>'
+    ).encode('utf-8')
+
+def fetch_full(url):
+    response = http_get(url, timeout=15)
+    return response.content, response.headers.get('Content-Type')
+
+def fetch_head(url):
+    read = lambda chunks: read_head(chunks, Config.METADATA_BODY_PREFIX_BYTES, Config.METADATA_MAX_BYTES)
+    with http_get(url, timeout=15, stream=True) as response:
+        return read(response.iter_content(16384)), response.headers.get('Content-Type')
+
+def measure(url, data, content_type, head_only):
+    """Parse ``data`` in one mode, returning (fields, cpu_seconds, peak_bytes)."""
+    tracemalloc.start()
+    started = time.process_time()
+    if head_only:
+        html = decode_html(data, content_type)
+    else:
+        # Full mode: the whole body, decoded with requests' header charset rules
+        encoding = requests.utils.get_encoding_from_headers({'content-type': content_type or ''})
+        html = data.decode(encoding or 'utf-8', errors='replace')
+    fields = metadata_from_html(url, html, head_only=head_only)
+    cpu = time.process_time() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {field: fields[field] for field in FIELDS}, cpu, peak
+
+def load_pages(args):
+    """Yield (url, full_bytes, head_bytes, content_type) for each requested page."""
+    read = lambda chunks: read_head(chunks, Config.METADATA_BODY_PREFIX_BYTES, Config.METADATA_MAX_BYTES)
+    for index in range(args.synthetic):
+        data = synthetic_page(index)
+        chunks = (data[i:i + 16384] for i in range(0, len(data), 16384))
+        yield f'https://synthetic.example.com/article/{index}', data, read(chunks), 'text/html'
+    for path in args.html:
+        with open(path, 'rb') as f:
+            data = f.read()
+        chunks = (data[i:i + 16384] for i in range(0, len(data), 16384))
+        yield f'file://{os.path.abspath(path)}', data, read(chunks), 'text/html'
+    for url in args.urls:
+        try:
+            full, content_type = fetch_full(url)
+            head, _ = fetch_head(url)
+        except requests.RequestException as e:
+            print(f"SKIP {url}: {str(e)}")
+            continue
+        yield url, full, head, content_type
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('urls', nargs='*', help='Pages to fetch')
+    parser.add_argument('--html', nargs='*', default=[], help='Saved HTML files')
+    parser.add_argument('--synthetic', type=int, default=0, help='Number of generated heavy pages')
+    args = parser.parse_args()
+    if not (args.urls or args.html or args.synthetic):
+        parser.error('give URLs, --html files or --synthetic N')
+
+    totals = {'full_bytes': 0, 'head_bytes': 0, 'full_cpu': 0.0, 'head_cpu': 0.0, 'full_peak': 0, 'head_peak': 0}
+    mismatches = 0
+    pages = 0
+    print(f"{'page':60} {'bytes full/head':>20} {'cpu ms full/head':>18} {'peak KB full/head':>19}  parity")
+    for url, full, head, content_type in load_pages(args):
+        full_fields, full_cpu, full_peak = measure(url, full, content_type, head_only=False)
+        head_fields, head_cpu, head_peak = measure(url, head, content_type, head_only=True)
+        differing = [field for field in FIELDS if full_fields[field] != head_fields[field]]
+        mismatches += bool(differing)
+        pages += 1
+
+        totals['full_bytes'] += len(full)
+        totals['head_bytes'] += len(head)
+        totals['full_cpu'] += full_cpu
+        totals['head_cpu'] += head_cpu
+        totals['full_peak'] = max(totals['full_peak'], full_peak)
+        totals['head_peak'] = max(totals['head_peak'], head_peak)
+
+        print(f"{url[:60]:60} {len(full):>10}/{len(head):<9} {full_cpu * 1000:>8.1f}/{head_cpu * 1000:<9.1f} "
+              f"{full_peak // 1024:>9}/{head_peak // 1024:<9}  {'ok' if not differing else 'DIFF ' + ','.join(differing)}")
+        for field in differing:
+            print(f"    {field}: full={full_fields[field]!r} head={head_fields[field]!r}")
+
+    if not pages:
+        return 1
+    print()
+    print(f"Pages: {pages}, field mismatches: {mismatches}")
+    print(f"Bytes read: {totals['full_bytes']} full, {totals['head_bytes']} head "
+          f"({totals['head_bytes'] / max(1, totals['full_bytes']):.1%})")
+    print(f"Parse CPU: {totals['full_cpu'] * 1000:.1f} ms full, {totals['head_cpu'] * 1000:.1f} ms head")
+    print(f"Peak parse memory: {totals['full_peak'] // 1024} KB full, {totals['head_peak'] // 1024} KB head")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
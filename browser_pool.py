@@ -0,0 +1,183 @@
+"""
+Pool of long-lived headless Chromium sessions for screenshots.
+
+Starting Chromium and chromedriver costs seconds and hundreds of MB, so
+instead of launching a browser per screenshot, callers borrow a warm session
+from the pool. Sessions are health-checked before reuse, recycled after a
+configurable number of pages or whenever a capture fails, and have cookies,
+storage and stray windows cleared between captures so no state leaks from one
+page to the next.
+"""
+
+import atexit
+import queue
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from config import Config
+from deadline import DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def build_chrome_options():
+    """Chromium options used for every screenshot browser."""
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.binary_location = Config.CHROME_BINARY
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument(f'--window-size={Config.SCREENSHOT_WIDTH},{Config.SCREENSHOT_HEIGHT}')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-infobars')
+    options.add_argument('--disable-notifications')
+    options.add_argument('--disable-popup-blocking')
+    options.add_argument('--blink-settings=imagesEnabled=true')
+    if Config.SCREENSHOT_PROFILE != 'full':
+        # Lightweight rendering: no autoplaying video or audio
+        options.add_argument('--autoplay-policy=user-gesture-required')
+        options.add_argument('--mute-audio')
+    options.page_load_strategy = 'eager'
+    return options
+
+class BrowserSession:
+    """A running Chromium instance and how many pages it has served."""
+
+    def __init__(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        started = time.monotonic()
+        self.driver = webdriver.Chrome(service=Service(Config.CHROMEDRIVER_PATH), options=build_chrome_options())
+        self.pages = 0
+        logger.info(f"Started browser session in {time.monotonic() - started:.1f}s")
+
+    def is_healthy(self):
+        """Check the browser still responds to commands."""
+        try:
+            return self.driver.execute_script('return 1') == 1
+        except Exception:
+            return False
+
+    def reset(self):
+        """Clear per-page state so the next capture starts from a clean context."""
+        driver = self.driver
+
+        # Close any popups the last page opened
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        origin = driver.execute_script('return window.location.origin')
+        if origin and origin.startswith('http'):
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        driver.get('about:blank')
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error shutting down browser session: {str(e)}")
+
+class BrowserPool:
+    """Bounded set of reusable browser sessions."""
+
+    def __init__(self, size, max_pages, borrow_timeout=300):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.borrow_timeout = borrow_timeout
+        self._idle = queue.LifoQueue()  # Most recently used first keeps few browsers warm
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+
+    def _take_session(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                return BrowserSession()
+            if session.is_healthy():
+                return session
+            logger.warning("Discarding unresponsive browser session")
+            session.quit()
+
+    def _release_session(self, session, broken):
+        if not broken:
+            session.pages += 1
+            if session.pages >= self.max_pages:
+                logger.info(f"Recycling browser session after {session.pages} pages")
+                broken = True
+            else:
+                try:
+                    session.reset()
+                except Exception as e:
+                    logger.warning(f"Could not reset browser session: {str(e)}")
+                    broken = True
+
+        if broken or self._closed:
+            session.quit()
+        else:
+            self._idle.put(session)
+
+    @contextmanager
+    def driver(self, deadline=None):
+        """Borrow a WebDriver for one capture.
+
+        Waits for a free session for at most ``borrow_timeout`` seconds, or what
+        is left of ``deadline`` if that is less. If the block raises (other than
+        running out of time), the session is assumed to be in a bad state and
+        is shut down instead of being returned to the pool.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool has been shut down")
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded("No time left to borrow a browser session")
+        wait = deadline.clamp(self.borrow_timeout) if deadline is not None else self.borrow_timeout
+        if not self._slots.acquire(timeout=wait):
+            if wait < self.borrow_timeout:
+                raise DeadlineExceeded("No free browser session within the time budget")
+            raise TimeoutError("Timed out waiting for a free browser session")
+
+        session = None
+        broken = False
+        try:
+            session = self._take_session()
+            yield session.driver
+        except DeadlineExceeded:
+            raise
+        except Exception:
+            broken = True
+            raise
+        finally:
+            if session is not None:
+                self._release_session(session, broken)
+            self._slots.release()
+
+    def shutdown(self):
+        """Quit all idle sessions. Sessions in use are quit when released."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+
+def get_browser_pool():
+    """Return the process-wide browser pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(Config.BROWSER_POOL_SIZE, Config.BROWSER_MAX_PAGES)
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,157 @@
+"""
+Resource blocking profiles for screenshot capture.
+
+News pages pull in ads, trackers, social widgets, autoplay video and web
+fonts that dominate load time and browser memory but add nothing to a
+placement screenshot. A capture profile names the resource classes to block:
+
+- ``ads`` / ``analytics`` / ``third_party_scripts``: requests to the hosts
+  listed for that class (subdomains included)
+- ``media``: audio and video
+- ``fonts``: web fonts
+
+Images are only blocked when served from a listed ad or tracker host, so
+article photos still appear. Built-in profiles
+are ``light`` (block everything above) and ``full`` (block nothing). A JSON
+file at ``SCREENSHOT_PROFILE_FILE`` can add hosts to a class and override the
+blocked classes for particular outlets, e.g.::
+
+    {
+        "classes": {"ads": ["ads.example-network.com"]},
+        "domains": {"bloomberg.com": {"allow": ["fonts"]},
+                    "example-tabloid.com": {"block": ["third_party_scripts"]}}
+    }
+"""
+
+import os
+import json
+import threading
+import logging
+from urllib.parse import urlparse
+
+from config import Config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+CLASS_HOSTS = {
+    'ads': [
+        'doubleclick.net', 'googlesyndication.com', 'googleadservices.com', 'googletagservices.com',
+        'adservice.google.com', 'amazon-adsystem.com', 'adnxs.com', 'criteo.com', 'criteo.net',
+        'taboola.com', 'outbrain.com', 'rubiconproject.com', 'pubmatic.com', 'openx.net',
+        'casalemedia.com', 'moatads.com', 'adsafeprotected.com', 'teads.tv', 'media.net',
+        'smartadserver.com', 'yieldmo.com', 'sharethrough.com', '33across.com', 'indexww.com'
+    ],
+    'analytics': [
+        'google-analytics.com', 'googletagmanager.com', 'scorecardresearch.com', 'quantserve.com',
+        'chartbeat.com', 'chartbeat.net', 'hotjar.com', 'segment.io', 'segment.com', 'mixpanel.com',
+        'newrelic.com', 'nr-data.net', 'optimizely.com', 'parsely.com', 'parse.ly', 'omtrdc.net',
+        'demdex.net', 'krxd.net', 'bluekai.com', 'permutive.com', 'clarity.ms', 'bat.bing.com'
+    ],
+    'third_party_scripts': [
+        'connect.facebook.net', 'platform.twitter.com', 'platform.linkedin.com', 'disqus.com',
+        'disquscdn.com', 'addthis.com', 'sharethis.com', 'onesignal.com', 'pushcrew.com',
+        'cdn.syndication.twimg.com', 'instagram.com/embed.js', 'tiktok.com/embed.js'
+    ]
+}
+
+MEDIA_EXTENSIONS = ('.mp4', '.webm', '.m3u8', '.mpd', '.mp3', '.m4a', '.ogg', '.mov')
+FONT_EXTENSIONS = ('.woff', '.woff2', '.ttf', '.otf', '.eot')
+
+PROFILES = {
+    'light': ['ads', 'analytics', 'third_party_scripts', 'media', 'fonts'],
+    'full': []
+}
+
+_overrides = None
+_overrides_lock = threading.Lock()
+
+def _load_overrides():
+    """Read SCREENSHOT_PROFILE_FILE once. Missing or invalid files are ignored."""
+    global _overrides
+    with _overrides_lock:
+        if _overrides is None:
+            _overrides = {'classes': {}, 'domains': {}}
+            path = Config.SCREENSHOT_PROFILE_FILE
+            if path and os.path.exists(path):
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                    _overrides['classes'] = data.get('classes', {})
+                    _overrides['domains'] = data.get('domains', {})
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not load capture profile file {path}: {str(e)}")
+        return _overrides
+
+def _host(url):
+    host = urlparse(url).netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+def _host_matches(host, path, entry):
+    """Whether a request to ``host``/``path`` matches a listed host (or host/path) entry."""
+    entry_host, _, entry_path = entry.partition('/')
+    if host != entry_host and not host.endswith('.' + entry_host):
+        return False
+    return not entry_path or path.lstrip('/').startswith(entry_path)
+
+def blocked_classes(page_url, profile=None):
+    """Resource classes to block when capturing ``page_url``."""
+    profile = profile or Config.SCREENSHOT_PROFILE
+    classes = set(PROFILES.get(profile, []))
+
+    host = _host(page_url)
+    for domain, rules in _load_overrides()['domains'].items():
+        if host == domain or host.endswith('.' + domain):
+            classes.update(rules.get('block', []))
+            classes.difference_update(rules.get('allow', []))
+    return classes
+
+def class_hosts(resource_class):
+    """Built-in plus configured hosts for a host-based resource class."""
+    return CLASS_HOSTS.get(resource_class, []) + _load_overrides()['classes'].get(resource_class, [])
+
+def blocked_url_patterns(page_url, profile=None):
+    """URL patterns for Chrome's ``Network.setBlockedURLs`` (Selenium backend)."""
+    patterns = []
+    classes = blocked_classes(page_url, profile)
+    for resource_class in ('ads', 'analytics', 'third_party_scripts'):
+        if resource_class in classes:
+            for entry in class_hosts(resource_class):
+                host, _, path = entry.partition('/')
+                patterns.append(f'*://{host}/{path}*')
+                patterns.append(f'*://*.{host}/{path}*')
+    # Anchor extensions to the end of the path so hostnames never match
+    extensions = []
+    if 'media' in classes:
+        extensions.extend(MEDIA_EXTENSIONS)
+    if 'fonts' in classes:
+        extensions.extend(FONT_EXTENSIONS)
+    for ext in extensions:
+        patterns.append(f'*{ext}')
+        patterns.append(f'*{ext}?*')
+    return patterns
+
+def should_block(request_url, resource_type, page_url, classes=None):
+    """Whether a single request should be aborted (Playwright backend)."""
+    if classes is None:
+        classes = blocked_classes(page_url)
+    if not classes:
+        return False
+
+    if 'media' in classes and resource_type == 'media':
+        return True
+    if 'fonts' in classes and resource_type == 'font':
+        return True
+
+    parsed = urlparse(request_url)
+    path = parsed.path.lower()
+    if 'media' in classes and path.endswith(MEDIA_EXTENSIONS):
+        return True
+    if 'fonts' in classes and path.endswith(FONT_EXTENSIONS):
+        return True
+
+    host = parsed.netloc.lower().split(':')[0]
+    for resource_class in ('ads', 'analytics', 'third_party_scripts'):
+        if resource_class in classes and any(_host_matches(host, parsed.path, entry) for entry in class_hosts(resource_class)):
+            return True
+    return False
@@ -12,6 +12,116 @@ class Config:
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
+    # Link ingestion: metadata fetches run concurrently, capped per host
+    INGEST_MAX_WORKERS = int(os.environ.get('INGEST_MAX_WORKERS', 8))
+    INGEST_PER_HOST_LIMIT = int(os.environ.get('INGEST_PER_HOST_LIMIT', 2))
+    # Pipelined ingestion: links checked against the database per lookup batch; placements committed
+    # every INGEST_COMMIT_BATCH placements or INGEST_COMMIT_INTERVAL seconds, whichever comes first
+    INGEST_LOOKUP_BATCH = int(os.environ.get('INGEST_LOOKUP_BATCH', 100))
+    INGEST_COMMIT_BATCH = int(os.environ.get('INGEST_COMMIT_BATCH', 20))
+    INGEST_COMMIT_INTERVAL = float(os.environ.get('INGEST_COMMIT_INTERVAL', 5))
+    # Bulk placement writes (placement_store.py): rows per INSERT/UPDATE batch and commit
+    PLACEMENT_WRITE_BATCH = int(os.environ.get('PLACEMENT_WRITE_BATCH', 500))
+    # Link file uploads (CSV, XLSX, DOCX): saved here for the worker and removed once imported
+    UPLOAD_DIR = os.environ.get('UPLOAD_DIR', 'uploads')
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 100)) * 1024 * 1024
+    
+    # Dashboard: placements per page (keyset pagination) and sources listed in the filter dropdown
+    DASHBOARD_PAGE_SIZE = int(os.environ.get('DASHBOARD_PAGE_SIZE', 60))
+    DASHBOARD_MAX_SOURCES = int(os.environ.get('DASHBOARD_MAX_SOURCES', 500))
+    
+    # Media type rules (see media_types.py): JSON file adding to or overriding the built-in host rules
+    MEDIA_TYPE_RULES_FILE = os.environ.get('MEDIA_TYPE_RULES_FILE', 'media_types.json')
+    
+    # Metadata at ingest: 'head' streams only the start of each page, 'full' downloads and stores whole pages
+    METADATA_MODE = os.environ.get('METADATA_MODE', 'head')
+    METADATA_BODY_PREFIX_BYTES = int(os.environ.get('METADATA_BODY_PREFIX_BYTES', 16384))
+    METADATA_MAX_BYTES = int(os.environ.get('METADATA_MAX_BYTES', 256 * 1024))
+    
+    # Shared HTTP client: keep-alive connection pools, per-host limits, default headers and timeouts
+    HTTP_USER_AGENT = os.environ.get('HTTP_USER_AGENT', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+    HTTP_POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS', 32))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', 4))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT', 5))
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT', 10))
+    HTTP_DRAIN_MAX_BYTES = int(os.environ.get('HTTP_DRAIN_MAX_BYTES', 64 * 1024))
+    HTTP_CLIENT_HTTP2 = os.environ.get('HTTP_CLIENT_HTTP2', 'false').lower() == 'true'
+    
+    # Politeness: per-domain request rate (token bucket) and Retry-After handling for all fetches
+    FETCH_DOMAIN_RATE = float(os.environ.get('FETCH_DOMAIN_RATE', 1.0))  # requests per second per domain, 0 = unlimited
+    FETCH_DOMAIN_BURST = int(os.environ.get('FETCH_DOMAIN_BURST', 4))
+    FETCH_DOMAIN_RATES = os.environ.get('FETCH_DOMAIN_RATES', '')  # per-domain overrides, e.g. "nytimes.com=0.5,bbc.co.uk=2"
+    FETCH_MAX_RETRY_AFTER = int(os.environ.get('FETCH_MAX_RETRY_AFTER', 60))
+    FETCH_RETRIES = int(os.environ.get('FETCH_RETRIES', 1))
+    
+    # Failure tracking: skip URLs that failed recently and domains that keep failing (circuit breaker)
+    NEGATIVE_CACHE_ENABLED = os.environ.get('NEGATIVE_CACHE_ENABLED', 'true').lower() == 'true'
+    NEGATIVE_CACHE_DIR = os.environ.get('NEGATIVE_CACHE_DIR', 'cache/failures')
+    NEGATIVE_CACHE_TTL = int(os.environ.get('NEGATIVE_CACHE_TTL', 6 * 3600))
+    NEGATIVE_CACHE_MAX_BYTES = int(os.environ.get('NEGATIVE_CACHE_MAX_BYTES', 20 * 1024 * 1024))
+    CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('CIRCUIT_BREAKER_THRESHOLD', 5))
+    CIRCUIT_BREAKER_COOLDOWN = int(os.environ.get('CIRCUIT_BREAKER_COOLDOWN', 15 * 60))
+    
+    # On-disk cache of fetched article pages, shared by ingestion, dockets and exports
+    HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_DIR = os.environ.get('HTTP_CACHE_DIR', 'cache/http')
+    HTTP_CACHE_TTL = int(os.environ.get('HTTP_CACHE_TTL', 7 * 24 * 3600))
+    HTTP_CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+    
+    # Screenshot browsers: warm Chromium sessions are reused across captures
+    CHROME_BINARY = os.environ.get('CHROME_BIN', '/usr/bin/chromium')
+    CHROMEDRIVER_PATH = os.environ.get('CHROMEDRIVER_PATH', '/usr/bin/chromedriver')
+    BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 1))
+    BROWSER_MAX_PAGES = int(os.environ.get('BROWSER_MAX_PAGES', 50))
+    
+    # Screenshot engine: 'selenium' (pooled browsers) or 'playwright' (async, many pages per browser)
+    SCREENSHOT_BACKEND = os.environ.get('SCREENSHOT_BACKEND', 'selenium')
+    PLAYWRIGHT_MAX_PAGES = int(os.environ.get('PLAYWRIGHT_MAX_PAGES', 4))
+    
+    # Resource blocking while capturing: 'light' skips ads, trackers, widgets, media and fonts
+    SCREENSHOT_PROFILE = os.environ.get('SCREENSHOT_PROFILE', 'light')
+    SCREENSHOT_PROFILE_FILE = os.environ.get('SCREENSHOT_PROFILE_FILE', 'capture_profiles.json')
+    
+    # Screenshot capture size and on-disk screenshot cache
+    SCREENSHOT_WIDTH = int(os.environ.get('SCREENSHOT_WIDTH', 1280))
+    SCREENSHOT_HEIGHT = int(os.environ.get('SCREENSHOT_HEIGHT', 1024))
+    SCREENSHOT_CACHE_ENABLED = os.environ.get('SCREENSHOT_CACHE_ENABLED', 'true').lower() == 'true'
+    SCREENSHOT_CACHE_DIR = os.environ.get('SCREENSHOT_CACHE_DIR', 'cache/screenshots')
+    SCREENSHOT_CACHE_TTL = int(os.environ.get('SCREENSHOT_CACHE_TTL', 24 * 3600))
+    SCREENSHOT_CACHE_MAX_BYTES = int(os.environ.get('SCREENSHOT_CACHE_MAX_BYTES', 1024 * 1024 * 1024))
+    
+    # Screenshot timing: 'ready' waits for the page to settle (DOM ready, network
+    # idle, main content visible) up to a deadline; 'fixed' always sleeps
+    SCREENSHOT_WAIT_MODE = os.environ.get('SCREENSHOT_WAIT_MODE', 'ready')
+    SCREENSHOT_READY_TIMEOUT = float(os.environ.get('SCREENSHOT_READY_TIMEOUT', 8))
+    SCREENSHOT_IDLE_MS = int(os.environ.get('SCREENSHOT_IDLE_MS', 500))
+    SCREENSHOT_FIXED_WAIT = float(os.environ.get('SCREENSHOT_FIXED_WAIT', 2))
+    
+    # Post-processing presets (see image_processing.PRESETS) applied before embedding
+    SCREENSHOT_DOCX_PRESET = os.environ.get('SCREENSHOT_DOCX_PRESET', 'docx')
+    SCREENSHOT_GDOC_PRESET = os.environ.get('SCREENSHOT_GDOC_PRESET', 'gdoc')
+    
+    # Screenshot farm: worker count is derived from free memory (cgroup-aware)
+    SCREENSHOT_MAX_WORKERS = int(os.environ.get('SCREENSHOT_MAX_WORKERS', 4))
+    SCREENSHOT_BROWSER_MEMORY_MB = int(os.environ.get('SCREENSHOT_BROWSER_MEMORY_MB', 300))
+    SCREENSHOT_MEMORY_RESERVE_MB = int(os.environ.get('SCREENSHOT_MEMORY_RESERVE_MB', 150))
+    SCREENSHOT_PER_HOST_LIMIT = int(os.environ.get('SCREENSHOT_PER_HOST_LIMIT', 2))  # pages loading per domain at once
+    
+    # Background jobs: heavy routes enqueue work for worker processes (python worker.py)
+    JOB_ARTIFACT_DIR = os.environ.get('JOB_ARTIFACT_DIR', 'job_artifacts')
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    # Running jobs report a heartbeat; one silent for JOB_STALE_SECONDS is taken as a dead worker's
+    JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+    JOB_STALE_SECONDS = int(os.environ.get('JOB_STALE_SECONDS', 300))
+    # Seconds a finished job's download is kept, and how often workers sweep old ones
+    JOB_ARTIFACT_MAX_AGE = int(os.environ.get('JOB_ARTIFACT_MAX_AGE', 7 * 24 * 3600))
+    JOB_SWEEP_INTERVAL = int(os.environ.get('JOB_SWEEP_INTERVAL', 3600))
+    # Time budgets in seconds for one placement's docket and for a whole job (0 = unbounded)
+    PLACEMENT_DEADLINE = int(os.environ.get('PLACEMENT_DEADLINE', 45))
+    JOB_DEADLINE = int(os.environ.get('JOB_DEADLINE', 1800))
+    # Worker threads started inside the web process by run.py (0 to rely on worker.py only)
+    JOB_INLINE_WORKERS = int(os.environ.get('JOB_INLINE_WORKERS', 1))
+    
     # Logging configuration
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
     
@@ -0,0 +1,248 @@
+"""
+Publication date extraction.
+
+Most pages state their publication date in a meta tag as ISO-8601
+(``2024-05-17T08:30:00.000+02:00``), so that is parsed by hand before any
+other format is tried. The remaining formats are precompiled patterns that
+either match or don't, rather than a list of ``strptime`` calls that each
+raise on a miss. Timezone offsets and fractional seconds are accepted; the
+date is taken as written, i.e. in the publisher's own timezone.
+
+Outlets are consistent, so the meta tag and format that last worked for a
+domain are remembered and tried first on its next page. The learned format
+also settles ambiguous numeric dates such as ``05/06/2024``.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+
+# Meta tags that carry a publication date, as (attribute, lowercased value)
+DATE_META_TAGS = (
+    ('property', 'article:published_time'), ('property', 'og:published_time'),
+    ('property', 'article:published'), ('name', 'article:published_time'),
+    ('itemprop', 'datepublished'), ('name', 'pubdate'), ('name', 'publishdate'),
+    ('name', 'publish-date'), ('name', 'publish_date'), ('name', 'pub_date'),
+    ('name', 'date'), ('name', 'dc.date.issued'), ('name', 'dc.date'), ('name', 'dcterms.created'),
+    ('name', 'parsely-pub-date'), ('name', 'sailthru.date'), ('name', 'article.published'),
+    ('name', 'original-publish-date'), ('name', 'cxenseparse:recs:publishtime')
+)
+_DATE_META_LOOKUP = {}
+for _attr, _value in DATE_META_TAGS:
+    _DATE_META_LOOKUP.setdefault(_attr, set()).add(_value)
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3, 'apr': 4, 'april': 4,
+    'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7, 'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'oct': 10, 'october': 10, 'nov': 11, 'november': 11,
+    'dec': 12, 'december': 12
+}
+
+_YMD = re.compile(r'(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})(?!\d)')
+_NUMERIC = re.compile(r'(?<!\d)(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})(?!\d)')
+_MONTH_FIRST = re.compile(r'\b([A-Za-z]{3,9})\.? (\d{1,2})(?:st|nd|rd|th)?,? (\d{4})\b')
+_DAY_FIRST = re.compile(r'\b(\d{1,2})(?:st|nd|rd|th)? ([A-Za-z]{3,9})\.?,? (\d{4})\b')
+
+# Publication dates in page text: JSON-LD first, then the first date-like string
+_JSON_LD_DATE = re.compile(r'"datePublished"\s*:\s*"([^"]{6,40})"')
+_TEXT_DATE = re.compile(
+    r'(?P<iso>\d{4}-\d{2}-\d{2})'
+    r'|(?P<numeric>\d{2}/\d{2}/\d{4})'
+    r'|(?P<named>[A-Z][a-z]+ \d{1,2}, \d{4})'
+)
+
+# Domains whose last successful meta tag and format are remembered
+MAX_LEARNED_DOMAINS = 10000
+
+_learned = OrderedDict()
+_learned_lock = threading.Lock()
+
+def _make_date(year, month, day):
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+def _parse_iso(value):
+    """``YYYY-MM-DD`` with anything after it (time, fraction, offset), without regex or strptime."""
+    if len(value) < 10 or value[4] != '-' or value[7] != '-':
+        return None
+    if len(value) > 10 and value[10] not in 'Tt ':
+        return None
+    year, month, day = value[0:4], value[5:7], value[8:10]
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    return _make_date(year, month, day)
+
+def _parse_ymd(value):
+    match = _YMD.match(value)
+    return _make_date(*match.groups()) if match else None
+
+def _parse_compact(value):
+    """``YYYYMMDD``."""
+    if len(value) == 8 and value.isdigit():
+        return _make_date(value[0:4], value[4:6], value[6:8])
+    return None
+
+def _parse_epoch(value):
+    """Unix timestamps in seconds or milliseconds."""
+    if value.isdigit() and len(value) in (10, 13):
+        seconds = int(value) / (1000 if len(value) == 13 else 1)
+        return datetime.fromtimestamp(seconds, tz=timezone.utc).date()
+    return None
+
+def _parse_dmy(value):
+    match = _NUMERIC.search(value)
+    return _make_date(match.group(3), match.group(2), match.group(1)) if match else None
+
+def _parse_mdy(value):
+    match = _NUMERIC.search(value)
+    return _make_date(match.group(3), match.group(1), match.group(2)) if match else None
+
+def _parse_month_first(value):
+    """``May 17, 2024``, ``Sept. 5 2024``."""
+    match = _MONTH_FIRST.search(value)
+    if match and match.group(1).lower() in MONTHS:
+        return _make_date(match.group(3), MONTHS[match.group(1).lower()], match.group(2))
+    return None
+
+def _parse_day_first(value):
+    """``17 May 2024``, ``Fri, 17 May 2024 08:30:00 GMT``."""
+    match = _DAY_FIRST.search(value)
+    if match and match.group(2).lower() in MONTHS:
+        return _make_date(match.group(3), MONTHS[match.group(2).lower()], match.group(1))
+    return None
+
+# Tried in this order unless a domain has a learned format; day-first before
+# month-first for ambiguous numeric dates, as strptime's list used to do
+FORMATS = OrderedDict([
+    ('iso', _parse_iso),
+    ('ymd', _parse_ymd),
+    ('compact', _parse_compact),
+    ('epoch', _parse_epoch),
+    ('month_first', _parse_month_first),
+    ('day_first', _parse_day_first),
+    ('dmy', _parse_dmy),
+    ('mdy', _parse_mdy),
+])
+
+def parse_date(value, preferred=None):
+    """
+    Parse a date string, trying ``preferred`` format first.
+
+    Args:
+        value (str): A date as found in a meta tag or page text.
+        preferred (str, optional): Name of a format in ``FORMATS`` to try first.
+
+    Returns:
+        tuple: ``(date, format name)``, or ``(None, None)`` if no format matches.
+    """
+    value = (value or '').strip()
+    if not value:
+        return None, None
+    if preferred in FORMATS:
+        parsed = FORMATS[preferred](value)
+        if parsed:
+            return parsed, preferred
+    for name, parse in FORMATS.items():
+        if name != preferred:
+            parsed = parse(value)
+            if parsed:
+                return parsed, name
+    return None, None
+
+def parse_date_string(date_str):
+    """
+    Try to parse a date string in various formats.
+    Returns a datetime.date object if successful, None otherwise.
+    """
+    return parse_date(date_str)[0]
+
+def learned_format(domain):
+    """The meta tag and format that last gave ``domain`` a date, or None."""
+    with _learned_lock:
+        entry = _learned.get(domain)
+        if entry is not None:
+            _learned.move_to_end(domain)
+        return entry
+
+def remember_format(domain, meta_tag, fmt):
+    """Record the meta tag (``(attribute, value)`` or None for page text) and format that worked."""
+    if not domain:
+        return
+    with _learned_lock:
+        _learned[domain] = {'meta': meta_tag, 'format': fmt}
+        _learned.move_to_end(domain)
+        while len(_learned) > MAX_LEARNED_DOMAINS:
+            _learned.popitem(last=False)
+
+def _is_ambiguous(value, fmt):
+    """Whether a numeric date reads as a valid date both day-first and month-first."""
+    if fmt not in ('dmy', 'mdy'):
+        return False
+    match = _NUMERIC.search(value)
+    return bool(match) and match.group(1) != match.group(2) and max(int(match.group(1)), int(match.group(2))) <= 12
+
+def _learn(domain, meta_tag, value, fmt, preferred):
+    # An ambiguous numeric date says nothing about the outlet's day/month order
+    remember_format(domain, meta_tag, preferred if _is_ambiguous(value, fmt) else fmt)
+
+def _meta_key(meta_tag):
+    """``(attribute, value)`` if the tag is a known publication date tag."""
+    for attr, values in _DATE_META_LOOKUP.items():
+        value = meta_tag.get(attr)
+        if value and value.lower() in values:
+            return attr, value
+    return None
+
+def find_publication_date(soup, text, domain=None):
+    """
+    Find a page's publication date in its meta tags, else in its text.
+
+    Args:
+        soup (BeautifulSoup): Parsed page (or page head).
+        text (str): The page HTML, for JSON-LD and date-like strings.
+        domain (str, optional): Registrable domain of the page, used to try
+            the meta tag and format learned from the outlet's earlier pages first.
+
+    Returns:
+        datetime.date or None: The publication date.
+    """
+    hint = learned_format(domain) if domain else None
+    preferred = hint['format'] if hint else None
+    learned_tag = hint['meta'] if hint else None
+
+    # One pass over the meta tags: the outlet's learned tag wins, else the first usable one
+    others = []
+    for meta_tag in soup.find_all('meta'):
+        key = _meta_key(meta_tag)
+        if key is None or not meta_tag.get('content'):
+            continue
+        if learned_tag is not None and key != learned_tag:
+            others.append((key, meta_tag['content']))
+            continue
+        parsed, fmt = parse_date(meta_tag['content'], preferred)
+        if parsed:
+            _learn(domain, key, meta_tag['content'], fmt, preferred)
+            return parsed
+    for key, content in others:
+        parsed, fmt = parse_date(content, preferred)
+        if parsed:
+            _learn(domain, key, content, fmt, preferred)
+            return parsed
+
+    # No usable meta tag: structured data, then the first date-like string in the page
+    match = _JSON_LD_DATE.search(text)
+    if match:
+        parsed, fmt = parse_date(match.group(1), preferred)
+        if parsed:
+            _learn(domain, None, match.group(1), fmt, preferred)
+            return parsed
+
+    for match in _TEXT_DATE.finditer(text):
+        parsed, fmt = parse_date(match.group(0), preferred if match.lastgroup == 'numeric' else None)
+        if parsed:
+            _learn(domain, None, match.group(0), fmt, preferred)
+            return parsed
+    return None
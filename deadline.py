@@ -0,0 +1,75 @@
+"""
+Time budgets shared by the stages of placement processing.
+
+A ``Deadline`` is created once per job (``JOB_DEADLINE``) or per docket
+(``PLACEMENT_DEADLINE``) and passed down through fetching, screenshots,
+summaries and docket assembly. Each stage asks the deadline for its timeout
+instead of using a fixed one, so it gets its usual timeout or whatever is
+left of the budget, whichever is smaller. Once the budget is spent, stages
+that would go to the network are skipped and dockets are finished with what
+is already available.
+"""
+
+import time
+
+# Below this many seconds a request can't realistically complete
+MIN_TIMEOUT = 0.5
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a stage is started after its time budget ran out."""
+
+class Deadline:
+    """A point in time by which work must finish, optionally capped by a parent deadline."""
+
+    def __init__(self, seconds=None, parent=None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        if parent is not None and parent.expires_at is not None:
+            if self.expires_at is None or parent.expires_at < self.expires_at:
+                self.expires_at = parent.expires_at
+
+    def remaining(self):
+        """Seconds left, or None for an unbounded deadline."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        remaining = self.remaining()
+        return remaining is not None and remaining < MIN_TIMEOUT
+
+    def timeout(self, default):
+        """
+        Timeout for the next step: ``default`` or the time left, whichever is smaller.
+
+        Args:
+            default (float): The step's usual timeout in seconds.
+
+        Returns:
+            float: Seconds the step may take.
+
+        Raises:
+            DeadlineExceeded: If there isn't enough time left to start the step.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining < MIN_TIMEOUT:
+            raise DeadlineExceeded("Time budget exhausted")
+        return min(default, remaining)
+
+    def clamp(self, seconds):
+        """``seconds`` or the time left, whichever is smaller (0 once spent), for waits that can be cut short."""
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    def child(self, seconds):
+        """A shorter budget for one part of the work, never outliving this one."""
+        return Deadline(seconds, parent=self)
+
+    def share(self, fraction):
+        """A child budget with ``fraction`` of the time left, e.g. for one phase of a job."""
+        remaining = self.remaining()
+        if remaining is None:
+            return Deadline(parent=self)
+        return Deadline(max(remaining * fraction, MIN_TIMEOUT), parent=self)
@@ -0,0 +1,151 @@
+"""
+Small file-system cache shared by the page and screenshot caches.
+
+Each entry is a data file plus a JSON metadata file, stored under a directory
+sharded by the first two characters of the hashed key. Writes go through a
+temporary file and ``os.replace`` so concurrent threads and worker processes
+never see half-written entries. Reads touch the data file's mtime, which is
+what the size-based eviction uses as its least-recently-used order.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+class DiskCache:
+    """Byte store with per-entry metadata and total-size LRU eviction."""
+
+    def __init__(self, directory, max_bytes, data_suffix='.bin'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.data_suffix = data_suffix
+        self._lock = threading.Lock()
+        self._size = None  # Approximate total bytes on disk, computed lazily
+
+    def _paths(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        shard = os.path.join(self.directory, digest[:2])
+        return os.path.join(shard, digest + self.data_suffix), os.path.join(shard, digest + '.json')
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def get_meta(self, key):
+        """Return the metadata dict for ``key`` or None if it isn't cached."""
+        _, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key):
+        """Return ``(data, meta)`` for ``key`` or None if it isn't cached."""
+        data_path, _ = self._paths(key)
+        meta = self.get_meta(key)
+        if meta is None:
+            return None
+
+        try:
+            with open(data_path, 'rb') as f:
+                data = f.read()
+            os.utime(data_path, None)  # Mark as recently used
+        except OSError:
+            return None
+
+        return data, meta
+
+    def set(self, key, data, meta):
+        """Store ``data`` with ``meta`` under ``key``, evicting old entries if needed."""
+        data_path, meta_path = self._paths(key)
+        meta = dict(meta, key=key, size=len(data), stored_at=time.time())
+
+        try:
+            old_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            self._write_atomic(data_path, data)
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not write cache entry for {key}: {str(e)}")
+            return
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - old_size
+        self._maybe_evict()
+
+    def update_meta(self, key, **updates):
+        """Merge ``updates`` into the metadata of an existing entry."""
+        meta = self.get_meta(key)
+        if meta is None:
+            return
+        meta.update(updates)
+        _, meta_path = self._paths(key)
+        try:
+            self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f"Could not update cache metadata for {key}: {str(e)}")
+
+    def delete(self, key):
+        """Remove ``key`` from the cache if present."""
+        for path in self._paths(key):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _entries(self):
+        """Yield ``(mtime, size, data_path)`` for every stored entry."""
+        if not os.path.isdir(self.directory):
+            return
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.data_suffix) and not entry.name.startswith('.tmp-'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, entry.path
+
+    def _maybe_evict(self):
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            if self._size <= self.max_bytes:
+                return
+
+            # Rescan (other processes share the directory) and drop the least
+            # recently used entries until we're comfortably under the limit
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, size, data_path in entries:
+                if total <= target:
+                    break
+                meta_path = data_path[:-len(self.data_suffix)] + '.json'
+                for path in (data_path, meta_path):
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                total -= size
+            self._size = total
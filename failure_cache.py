@@ -0,0 +1,130 @@
+"""
+Negative cache and per-domain circuit breaker for failing pages.
+
+Dead links and bot-walled sites otherwise cost a full fetch or page-load
+timeout every time they come up, in ingestion, in every docket and in every
+export. Failures are recorded per stage (``fetch`` for HTTP requests,
+``screenshot`` for browser captures):
+
+- a URL that failed is skipped for ``NEGATIVE_CACHE_TTL`` seconds;
+- a domain with ``CIRCUIT_BREAKER_THRESHOLD`` consecutive failures has its
+  circuit opened: every URL on it is skipped until ``CIRCUIT_BREAKER_COOLDOWN``
+  seconds after the last failure. The next attempt after that either closes
+  the circuit (on success) or opens it again straight away.
+
+State lives in a small on-disk store so the web process, job workers and
+screenshot worker processes all share it.
+"""
+
+import time
+import threading
+import logging
+import requests
+
+from config import Config
+from disk_cache import DiskCache
+from fetch_scheduler import domain_key
+from utils import canonicalize_url
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_store = None
+_store_lock = threading.Lock()
+
+class KnownFailureError(requests.RequestException):
+    """Raised instead of attempting a request that is known to fail."""
+
+def get_failure_store():
+    """Return the process-wide failure store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DiskCache(Config.NEGATIVE_CACHE_DIR, Config.NEGATIVE_CACHE_MAX_BYTES, data_suffix='.fail')
+        return _store
+
+def _url_key(stage, url):
+    # Query parameters kept: article.php?id=1 failing says nothing about ?id=2
+    return f'{stage}|url|{canonicalize_url(url)}'
+
+def _domain_key(stage, url):
+    return f'{stage}|domain|{domain_key(url)}'
+
+def known_failure(stage, url):
+    """
+    Why ``url`` should not be attempted right now, or None if it should be.
+
+    Args:
+        stage (str): ``'fetch'`` or ``'screenshot'``.
+        url (str): The page about to be requested.
+
+    Returns:
+        str or None: Reason for skipping the attempt.
+    """
+    if not Config.NEGATIVE_CACHE_ENABLED:
+        return None
+
+    store = get_failure_store()
+    now = time.time()
+
+    entry = store.get_meta(_url_key(stage, url))
+    if entry and now - entry.get('failed_at', 0) < Config.NEGATIVE_CACHE_TTL:
+        return f"failed recently: {entry.get('reason')}"
+
+    domain = store.get_meta(_domain_key(stage, url))
+    if (domain and domain.get('failures', 0) >= Config.CIRCUIT_BREAKER_THRESHOLD
+            and now - domain.get('failed_at', 0) < Config.CIRCUIT_BREAKER_COOLDOWN):
+        return f"{domain_key(url)} is failing repeatedly: {domain.get('reason')}"
+
+    return None
+
+def check(stage, url):
+    """Raise ``KnownFailureError`` if ``url`` is in the negative cache or its circuit is open."""
+    reason = known_failure(stage, url)
+    if reason:
+        raise KnownFailureError(f"Skipped {url}: {reason}")
+
+def record_failure(stage, url, reason, domain_failure=True):
+    """
+    Remember a failed attempt for the URL.
+
+    With ``domain_failure`` (timeouts, connection errors, bot walls, server
+    errors) it also counts towards opening the domain's circuit; a plain
+    dead link (e.g. a 404) doesn't say anything about the rest of the site.
+    """
+    if not Config.NEGATIVE_CACHE_ENABLED:
+        return
+
+    store = get_failure_store()
+    now = time.time()
+    reason = str(reason)[:200]
+
+    key = _url_key(stage, url)
+    entry = store.get_meta(key) or {}
+    store.set(key, reason.encode('utf-8'), {'reason': reason, 'failed_at': now, 'failures': entry.get('failures', 0) + 1})
+
+    if not domain_failure:
+        return
+
+    key = _domain_key(stage, url)
+    failures = (store.get_meta(key) or {}).get('failures', 0) + 1
+    store.set(key, reason.encode('utf-8'), {'reason': reason, 'failed_at': now, 'failures': failures})
+    if failures == Config.CIRCUIT_BREAKER_THRESHOLD:
+        logger.warning(f"Opening {stage} circuit for {domain_key(url)} after {failures} failures: {reason}")
+
+def record_success(stage, url):
+    """Clear the URL's failure entry and close its domain's circuit."""
+    if not Config.NEGATIVE_CACHE_ENABLED:
+        return
+
+    store = get_failure_store()
+    key = _url_key(stage, url)
+    if store.get_meta(key):
+        store.delete(key)
+
+    key = _domain_key(stage, url)
+    domain = store.get_meta(key)
+    if domain and domain.get('failures'):
+        if domain['failures'] >= Config.CIRCUIT_BREAKER_THRESHOLD:
+            logger.info(f"Closing {stage} circuit for {domain_key(url)}")
+        store.delete(key)
@@ -0,0 +1,283 @@
+"""
+Per-domain politeness for outbound fetches.
+
+Every request to a publication's site (page fetches, head reads and
+screenshot page loads) takes a token from that domain's bucket first, so no
+host sees more than ``FETCH_DOMAIN_RATE`` requests per second (with bursts of
+up to ``FETCH_DOMAIN_BURST``), however many workers are running. A 429 or 503
+with ``Retry-After`` pauses the whole domain for that long.
+
+Batches are dispatched by :meth:`FetchScheduler.map`, which hands the next
+link to a free worker round-robin across domains. It skips domains that are
+at their concurrency limit or backing off, so a batch dominated by a few
+outlets keeps every other domain moving.
+"""
+
+import time
+import queue
+import threading
+import logging
+from collections import defaultdict, deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from config import Config
+from deadline import DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+# Second-level labels under which sites register their names, e.g. bbc.co.uk
+_SECOND_LEVEL = {'co', 'com', 'org', 'net', 'ac', 'gov', 'edu', 'ne', 'or'}
+
+def domain_key(url):
+    """The registrable domain a URL belongs to, e.g. ``edition.cnn.com`` -> ``cnn.com``."""
+    host = (urlparse(url).hostname or '').lower()
+    labels = host.split('.')
+    if host.replace('.', '').isdigit() or ':' in host:
+        # IP addresses are their own domain
+        return host
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+def parse_retry_after(value):
+    """Seconds to wait from a ``Retry-After`` header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, holding at most ``burst``."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now):
+        """Take a token if one is available. Returns 0, or seconds until the next token."""
+        if self.rate <= 0:
+            return 0.0
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class FetchScheduler:
+    """Per-domain token buckets, Retry-After backoff and fair batch dispatch."""
+
+    def __init__(self, rate, burst, domain_rates=None):
+        self.rate = rate
+        self.burst = burst
+        self.domain_rates = domain_rates or {}
+        self._buckets = {}
+        self._blocked_until = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, domain):
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = TokenBucket(self.domain_rates.get(domain, self.rate), self.burst)
+        return bucket
+
+    def _backoff_remaining(self, domain, now):
+        return max(0.0, self._blocked_until.get(domain, 0) - now)
+
+    def acquire(self, url, deadline=None):
+        """
+        Block until a request to ``url``'s domain is allowed, then take a token.
+
+        Raises ``DeadlineExceeded`` instead of waiting past ``deadline``.
+        """
+        domain = domain_key(url)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self._backoff_remaining(domain, now) or self._bucket(domain).try_acquire(now)
+            if not wait:
+                if waited >= 1:
+                    logger.info(f"Waited {waited:.1f}s for a request slot on {domain}")
+                return
+            if deadline is not None and deadline.remaining() is not None and wait >= deadline.remaining():
+                raise DeadlineExceeded(f"No request slot for {domain} within the time budget")
+            time.sleep(wait)
+            waited += wait
+
+    def backoff(self, url, seconds):
+        """Pause all requests to ``url``'s domain for ``seconds`` (e.g. from Retry-After)."""
+        domain = domain_key(url)
+        seconds = min(seconds, Config.FETCH_MAX_RETRY_AFTER)
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._blocked_until.get(domain, 0):
+                self._blocked_until[domain] = until
+        logger.warning(f"Backing off {domain} for {seconds:.0f}s")
+
+    def backoff_from_response(self, url, status_code, headers):
+        """Apply ``Retry-After`` from a 429/503 response. Returns the delay, or None."""
+        if status_code not in (429, 503):
+            return None
+        delay = parse_retry_after(headers.get('Retry-After'))
+        if delay is None:
+            # No hint from the server: back off for a few token intervals
+            delay = 5.0 if status_code == 429 else None
+        if delay is not None:
+            self.backoff(url, delay)
+        return delay
+
+    def map(self, fn, urls, max_workers, per_host_limit=2, progress_callback=None):
+        """
+        Run ``fn(url)`` for every URL on a thread pool, dispatching fairly by domain.
+
+        Yields ``(url, result, error)`` as calls finish, where ``error`` is the
+        exception raised by ``fn`` (``result`` is then None). At most
+        ``per_host_limit`` calls run against one domain at a time, and domains
+        backing off after a Retry-After are skipped until their pause ends.
+        If given, ``progress_callback(done, total)`` is called after each URL.
+
+        ``urls`` may also be an iterator that is still producing URLs, e.g.
+        links being read from a document. It is consumed on its own thread and
+        each URL is dispatched as soon as it arrives (``total`` then counts the
+        URLs seen so far). If the iterator raises, the URLs it produced before
+        the error are still processed and yielded, then the error is re-raised.
+        """
+        events = queue.Queue()
+        pending = defaultdict(deque)
+        rotation = deque()
+        in_flight = defaultdict(int)
+        per_host_limit = max(1, per_host_limit)
+
+        def add(url):
+            domain = domain_key(url)
+            if not pending[domain]:
+                rotation.append(domain)
+            pending[domain].append(url)
+
+        streaming = isinstance(urls, Iterator)
+        total = 0
+        if streaming:
+            def feed():
+                try:
+                    for url in urls:
+                        events.put(('url', url, None))
+                except Exception as e:
+                    events.put(('error', None, e))
+                else:
+                    events.put(('end', None, None))
+
+            threading.Thread(target=feed, name='fetch-feed', daemon=True).start()
+            workers = max(1, max_workers)
+        else:
+            for url in urls:
+                add(url)
+                total += 1
+            if not total:
+                return
+            workers = max(1, min(max_workers, total))
+
+        def next_url():
+            """Next URL round-robin across eligible domains, or (None, seconds to wait)."""
+            shortest_wait = None
+            now = time.monotonic()
+            for _ in range(len(rotation)):
+                domain = rotation[0]
+                rotation.rotate(-1)
+                if in_flight[domain] >= per_host_limit:
+                    continue
+                with self._lock:
+                    wait = self._backoff_remaining(domain, now)
+                if wait:
+                    shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+                    continue
+                url = pending[domain].popleft()
+                if not pending[domain]:
+                    rotation.remove(domain)
+                return url, None
+            return None, shortest_wait
+
+        done = 0
+        running = 0
+        feeding = streaming
+        feed_error = None
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fetch') as executor:
+            while feeding or done < total:
+                wait = None
+                while running < workers and rotation:
+                    url, wait = next_url()
+                    if url is None:
+                        break
+                    in_flight[domain_key(url)] += 1
+                    running += 1
+                    future = executor.submit(fn, url)
+                    future.add_done_callback(lambda f, url=url: events.put(('done', url, f)))
+
+                try:
+                    kind, url, value = events.get(timeout=wait if running < workers else None)
+                except queue.Empty:
+                    # A backed-off domain became eligible again
+                    continue
+
+                if kind == 'url':
+                    add(url)
+                    total += 1
+                    continue
+                if kind in ('end', 'error'):
+                    # URLs received before a failure are still processed
+                    feeding = False
+                    feed_error = value
+                    continue
+
+                in_flight[domain_key(url)] -= 1
+                running -= 1
+                done += 1
+                error = value.exception()
+                yield url, (None if error else value.result()), error
+                if progress_callback:
+                    progress_callback(done, total)
+
+        if feed_error is not None:
+            raise feed_error
+
+def _parse_domain_rates(value):
+    """``"example.com=0.5,other.org=2"`` -> ``{'example.com': 0.5, 'other.org': 2.0}``."""
+    rates = {}
+    for item in (value or '').split(','):
+        domain, _, rate = item.partition('=')
+        if domain.strip() and rate.strip():
+            try:
+                rates[domain.strip().lower()] = float(rate)
+            except ValueError:
+                logger.error(f"Ignoring invalid FETCH_DOMAIN_RATES entry: {item}")
+    return rates
+
+def get_fetch_scheduler():
+    """Return the process-wide fetch scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler(
+                Config.FETCH_DOMAIN_RATE,
+                Config.FETCH_DOMAIN_BURST,
+                _parse_domain_rates(Config.FETCH_DOMAIN_RATES)
+            )
+        return _scheduler
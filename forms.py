@@ -1,4 +1,5 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, SubmitField, TextAreaField, SelectField, RadioField
 from wtforms.validators import DataRequired, Length, URL, Optional, ValidationError
 import re
@@ -9,7 +10,8 @@ class AddPlacementForm(FlaskForm):
         choices=[
             ('direct', 'Direct Text Input'),
             ('gdoc', 'Google Doc'),
-            ('gsheet', 'Google Sheet')
+            ('gsheet', 'Google Sheet'),
+            ('upload', 'File Upload')
         ],
         default='direct'
     )
@@ -17,6 +19,9 @@ class AddPlacementForm(FlaskForm):
     text_input = TextAreaField('Paste URLs or text containing URLs')
     google_doc_id = StringField('Google Doc ID or URL')
     google_sheet_id = StringField('Google Sheet ID or URL')
+    link_file = FileField('CSV, Excel or Word file', validators=[
+        FileAllowed(['csv', 'xlsx', 'docx'], 'Please upload a .csv, .xlsx or .docx file.')
+    ])
     
     submit = SubmitField('Extract & Add Media Placements')
     
@@ -39,6 +44,10 @@ class AddPlacementForm(FlaskForm):
             match = re.search(r'/d/([a-zA-Z0-9-_]+)', field.data)
             if match:
                 field.data = match.group(1)
+    
+    def validate_link_file(self, field):
+        if self.input_type.data == 'upload' and not (field.data and field.data.filename):
+            raise ValidationError('Please choose a file to upload.')
 
 class GoogleCredentialForm(FlaskForm):
     api_key = StringField('Google API Key', validators=[DataRequired()])
@@ -4,21 +4,22 @@ import io
 import base64
 from datetime import datetime, timedelta
 from flask import Blueprint, redirect, url_for, request, flash, session, current_app, render_template
-import requests
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseUpload
 from PIL import Image
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
 import logging
 
-from models import db, GoogleCredential, MediaPlacement
+from models import db, GoogleCredential, MediaPlacement, Job
+from jobs import job_handler, enqueue_job
+from http_client import http_post
+from page_artifacts import get_page_artifact, ensure_page_artifacts, artifact_summary
+from deadline import Deadline
+from utils import take_screenshot
+from screenshot_farm import capture_many
+from image_processing import prepare_screenshot, image_mimetype
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -84,7 +85,7 @@ def refresh_google_token(google_cred):
         'grant_type': 'refresh_token'
     }
     
-    response = requests.post(token_url, data=payload)
+    response = http_post(token_url, data=payload)
     
     if response.status_code == 200:
         token_data = response.json()
@@ -103,19 +104,25 @@ def refresh_google_token(google_cred):
         raise ValueError(f"Failed to refresh Google token: {response.text}")
 
 def get_google_docs_content(doc_id):
-    """Retrieve content from a Google Doc."""
+    """
+    Yield the text of a Google Doc, one text run at a time.
+
+    Only the text runs are requested from the API, and the text is never
+    joined into one string, so callers like ``parsers.iter_links`` can work
+    through very large documents in bounded memory.
+    """
     try:
         docs_service = get_google_service('docs', 'v1')
-        document = docs_service.documents().get(documentId=doc_id).execute()
+        document = docs_service.documents().get(
+            documentId=doc_id,
+            fields='body(content(paragraph(elements(textRun(content)))))'
+        ).execute()
         
-        content = ""
         for element in document.get('body', {}).get('content', []):
             if 'paragraph' in element:
                 for paragraph_element in element['paragraph'].get('elements', []):
                     if 'textRun' in paragraph_element:
-                        content += paragraph_element['textRun'].get('content', '')
-        
-        return content
+                        yield paragraph_element['textRun'].get('content', '')
     except HttpError as error:
         current_app.logger.error(f"Error accessing Google Doc: {error}")
         raise ValueError(f"Error accessing Google Doc: {error.reason}")
@@ -123,23 +130,40 @@ def get_google_docs_content(doc_id):
         current_app.logger.error(f"Unexpected error with Google Docs: {e}")
         raise ValueError(f"Error accessing Google Doc: {str(e)}")
 
+# Rows read per Sheets API call. Links on one page are processed while the next
+# downloads; larger pages use fewer calls of the per-minute read quota
+SHEET_PAGE_ROWS = 5000
+
 def get_google_sheets_content(sheet_id):
-    """Retrieve content from a Google Sheet."""
+    """
+    Yield the text of a Google Sheet cell by cell, with a newline after each row.
+
+    Each tab is read ``SHEET_PAGE_ROWS`` rows at a time as the caller
+    consumes the text, so links near the top can be fetched while the rest of
+    a large sheet is still downloading. Only formatted cell values are
+    requested, and the text is never joined into one string.
+    """
     try:
         sheets_service = get_google_service('sheets', 'v4')
-        sheet = sheets_service.spreadsheets().get(spreadsheetId=sheet_id, includeGridData=True).execute()
-        
-        content = ""
-        for sheet_data in sheet.get('sheets', []):
-            grid_data = sheet_data.get('data', [])
-            for grid in grid_data:
-                for row in grid.get('rowData', []):
-                    for cell in row.get('values', []):
-                        if 'formattedValue' in cell:
-                            content += cell['formattedValue'] + " "
-                    content += "\n"
-        
-        return content
+        spreadsheet = sheets_service.spreadsheets().get(
+            spreadsheetId=sheet_id,
+            fields='sheets(properties(title,gridProperties(rowCount)))'
+        ).execute()
+        
+        for sheet_data in spreadsheet.get('sheets', []):
+            properties = sheet_data.get('properties', {})
+            title = properties.get('title', '').replace("'", "''")
+            row_count = properties.get('gridProperties', {}).get('rowCount', 0)
+            for start in range(1, row_count + 1, SHEET_PAGE_ROWS):
+                end = min(start + SHEET_PAGE_ROWS - 1, row_count)
+                page = sheets_service.spreadsheets().values().get(
+                    spreadsheetId=sheet_id,
+                    range=f"'{title}'!{start}:{end}"
+                ).execute()
+                for row in page.get('values', []):
+                    for value in row:
+                        yield f"{value} "
+                    yield "\n"
     except HttpError as error:
         current_app.logger.error(f"Error accessing Google Sheet: {error}")
         raise ValueError(f"Error accessing Google Sheet: {error.reason}")
@@ -254,70 +278,6 @@ def google_auth_callback():
     # Default: return to settings page with success message
     flash('Successfully authenticated with Google!', 'success')
     return render_template('google_auth_success.html')
-def take_screenshot(url, output_path=None, timeout=15):
-    """
-    Take a screenshot of a webpage using Selenium WebDriver with Chromium (Docker-optimized).
-
-    Args:
-        url (str): The URL of the webpage to screenshot.
-        output_path (str, optional): Path to save the screenshot. If None, returns the image bytes.
-        timeout (int): Maximum seconds to wait for page load.
-
-    Returns:
-        bytes or str: Screenshot bytes if output_path is None, otherwise the output path.
-    """
-    import time
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-
-    # Set up options for Chromium
-    options = Options()
-    options.binary_location = "/usr/bin/chromium"
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--window-size=1280,1024')
-    options.add_argument('--disable-extensions')
-    options.add_argument('--disable-infobars')
-    options.add_argument('--disable-notifications')
-    options.add_argument('--disable-popup-blocking')
-    options.add_argument('--blink-settings=imagesEnabled=true')
-    options.page_load_strategy = 'eager'
-
-    try:
-        # Create the driver using system-installed chromedriver
-        driver = webdriver.Chrome(service=Service("/usr/bin/chromedriver"), options=options)
-        driver.set_page_load_timeout(timeout)
-
-        try:
-            driver.get(url)
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 250)")
-
-            if output_path:
-                driver.save_screenshot(output_path)
-                result = output_path
-            else:
-                result = driver.get_screenshot_as_png()
-
-        except Exception as e:
-            print(f"Timed out or error loading page: {str(e)}")
-            # Attempt screenshot of partial content
-            if output_path:
-                driver.save_screenshot(output_path)
-                result = output_path
-            else:
-                result = driver.get_screenshot_as_png()
-        finally:
-            driver.quit()
-
-        return result
-
-    except Exception as e:
-        print(f"Error setting up WebDriver: {str(e)}")
-        return None
 
 def create_google_doc(title, content, screenshot=None):
     """Create a Google Doc with the given content and screenshot."""
@@ -350,15 +310,19 @@ def create_google_doc(title, content, screenshot=None):
         
         # If there's a screenshot, insert it
         if screenshot:
+            # Downscale and recompress before uploading
+            screenshot = prepare_screenshot(screenshot, current_app.config['SCREENSHOT_GDOC_PRESET'])
+            mimetype = image_mimetype(screenshot)
+            
             # Upload screenshot to drive first
             file_metadata = {
                 'name': f'{title} Screenshot',
-                'mimeType': 'image/png'
+                'mimeType': mimetype
             }
             
             # Convert screenshot to Media object
             screenshot_bytes = io.BytesIO(screenshot)
-            media = MediaIoBaseUpload(screenshot_bytes, mimetype='image/png', resumable=True)
+            media = MediaIoBaseUpload(screenshot_bytes, mimetype=mimetype, resumable=True)
             
             # Upload file
             file = drive_service.files().create(
@@ -494,11 +458,14 @@ def create_docket(placement_id):
         # Get the placement
         placement = MediaPlacement.query.filter_by(id=placement_id).first_or_404()
         
+        # Bound the whole request; the screenshot may use most of the budget
+        deadline = Deadline(current_app.config['PLACEMENT_DEADLINE'])
+        
         # Take a screenshot
-        screenshot = take_screenshot(placement.url)
+        screenshot = take_screenshot(placement.url, deadline=deadline.share(0.75))
         
-        # Extract a summary
-        summary = extract_summary(placement.url)
+        # Summary from the stored page artifact
+        summary = artifact_summary(get_page_artifact(placement, deadline))
         
         # Create the document content
         content = f"""
@@ -557,26 +524,61 @@ def create_all_dockets():
             flash('Please authenticate with Google before creating dockets.', 'warning')
             return redirect(url_for('google.google_auth'))
         
-        # Get all placements that don't have dockets yet
-        placements = MediaPlacement.query.filter(MediaPlacement.docket_url == None).all()
-        
-        if not placements:
+        # Check there are placements that don't have dockets yet
+        if not MediaPlacement.query.filter(MediaPlacement.docket_url == None).count():
             flash('No media placements found that need dockets.', 'info')
             return redirect(url_for('dashboard'))
         
-        docket_data = []
-        success_count = 0
+        # Screenshots and Google uploads for every placement run on a worker
+        job = enqueue_job('create_all_dockets', {
+            'action_title': 'Creating Google Dockets',
+            'description': 'Taking screenshots and creating a Google Doc for each placement...'
+        })
+        return redirect(url_for('jobs.wait_for_job', job_id=job.id))
         
-        for placement in placements:
-            try:
-                # Take a screenshot
-                screenshot = take_screenshot(placement.url)
-                
-                # Extract a summary
-                summary = extract_summary(placement.url)
-                
-                # Create the document content
-                content = f"""
+    except Exception as e:
+        logger.error(f"Error creating dockets: {str(e)}")
+        flash(f'Error creating dockets: {str(e)}', 'danger')
+        return redirect(url_for('dashboard'))
+
+@job_handler('create_all_dockets')
+def run_create_all_dockets_job(job, payload):
+    """Create a Google Doc docket for every placement that lacks one."""
+    # Get all placements that don't have dockets yet
+    placements = MediaPlacement.query.filter(MediaPlacement.docket_url == None).all()
+    
+    if not placements:
+        job.message = 'No media placements found that need dockets.'
+        job.result = {'redirect_endpoint': 'dashboard', 'category': 'info'}
+        return
+    
+    # Fetch pages that have no stored artifact yet, concurrently and only once
+    job.update(progress=0, total=len(placements), message='Fetching page content...')
+    ensure_page_artifacts(placements, deadline=job.deadline.share(0.3))
+    
+    job.update(progress=0, total=len(placements), message=f'Creating dockets for {len(placements)} placements...')
+    
+    docket_data = []
+    success_count = 0
+    
+    placements_by_url = {}
+    for placement in placements:
+        placements_by_url.setdefault(placement.url, []).append(placement)
+    
+    # Screenshots are captured concurrently and each docket is created as
+    # soon as its screenshot is ready
+    finished = ((placement, screenshot)
+                for url, screenshot in capture_many(placements_by_url, max_workers=payload.get('max_workers'),
+                                                    deadline=job.deadline.share(0.8))
+                for placement in placements_by_url[url])
+    
+    for index, (placement, screenshot) in enumerate(finished, start=1):
+        try:
+            # Summary from the stored page artifact
+            summary = artifact_summary(get_page_artifact(placement, job.deadline))
+            
+            # Create the document content
+            content = f"""
 # {placement.title or "Untitled Article"}
 
 URL: {placement.url}
@@ -591,55 +593,66 @@ Created: {placement.created_at.strftime('%Y-%m-%d %H:%M:%S')}
 ## Notes
 {placement.notes or ""}
 """
-                
-                # Create a Google Doc
-                doc_title = f"Media Placement - {placement.title or placement.source or 'Untitled'}"
-                doc_url = create_google_doc(
-                    doc_title,
-                    content,
-                    screenshot
-                )
-                
-                # Update the placement with the doc URL
-                placement.docket_url = doc_url
-                db.session.commit()
-                
-                # Add to spreadsheet data
-                docket_data.append([
-                    placement.title or "Untitled",
-                    placement.url,
-                    placement.source,
-                    str(placement.publication_date) if placement.publication_date else "Unknown",
-                    placement.media_type,
-                    doc_url
-                ])
-                
-                success_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error creating docket for placement {placement.id}: {str(e)}")
-                continue
-        
-        # Create a Google Sheet with all dockets
-        if docket_data:
-            sheet_title = "Media Placements Summary"
-            sheet_url = create_google_sheet(sheet_title, docket_data)
             
-            flash(f'Successfully created {success_count} dockets and a summary spreadsheet!', 'success')
+            # Create a Google Doc
+            doc_title = f"Media Placement - {placement.title or placement.source or 'Untitled'}"
+            doc_url = create_google_doc(
+                doc_title,
+                content,
+                screenshot
+            )
             
-            # Return with sheet URL for download and info about created dockets
-            return render_template('docket_success.html', 
-                                   docket_title="Multiple Media Placement Dockets",
-                                   docket_url=sheet_url,
-                                   item_count=success_count)
-        else:
-            flash('No dockets were created due to errors. Please check the logs.', 'warning')
-            return redirect(url_for('dashboard'))
+            # Update the placement with the doc URL
+            placement.docket_url = doc_url
+            db.session.commit()
+            
+            # Add to spreadsheet data
+            docket_data.append([
+                placement.title or "Untitled",
+                placement.url,
+                placement.source,
+                str(placement.publication_date) if placement.publication_date else "Unknown",
+                placement.media_type,
+                doc_url
+            ])
+            
+            success_count += 1
+            
+        except Exception as e:
+            logger.error(f"Error creating docket for placement {placement.id}: {str(e)}")
+            db.session.rollback()
         
-    except Exception as e:
-        logger.error(f"Error creating dockets: {str(e)}")
-        flash(f'Error creating dockets: {str(e)}', 'danger')
+        job.update(progress=index, message=f'Processed {index} of {len(placements)} placements')
+    
+    # Create a Google Sheet with all dockets
+    if docket_data:
+        sheet_title = "Media Placements Summary"
+        sheet_url = create_google_sheet(sheet_title, docket_data)
+        
+        job.message = f'Successfully created {success_count} dockets and a summary spreadsheet!'
+        job.result = {
+            'redirect_endpoint': 'docket.show_dockets_result',
+            'redirect_args': {'job_id': job.id},
+            'sheet_url': sheet_url,
+            'success_count': success_count
+        }
+    else:
+        job.message = 'No dockets were created due to errors. Please check the logs.'
+        job.result = {'redirect_endpoint': 'dashboard', 'category': 'warning'}
+
+@docket_bp.route('/create_all/result/<int:job_id>')
+def show_dockets_result(job_id):
+    """Show the summary spreadsheet produced by a finished create-all job."""
+    job = Job.query.filter_by(id=job_id, kind='create_all_dockets', status='finished').first_or_404()
+    result = json.loads(job.result) if job.result else {}
+    if not result.get('sheet_url'):
         return redirect(url_for('dashboard'))
+    
+    # Return with sheet URL for download and info about created dockets
+    return render_template('docket_success.html', 
+                           docket_title="Multiple Media Placement Dockets",
+                           docket_url=result['sheet_url'],
+                           item_count=result.get('success_count', 0))
 
 @docket_bp.route('/export_to_sheet')
 def export_to_sheet():
@@ -0,0 +1,166 @@
+"""
+Persistent HTTP response cache for article page fetches.
+
+Pages are downloaded at ingest, again for docket summaries and again for every
+export, so all of those go through :func:`cached_get`. Bodies are stored
+zlib-compressed on disk, keyed by ``utils.canonicalize_url`` (query parameters
+kept, since they often identify the article). Fresh entries (younger than the
+TTL) are served without touching the network; stale entries are
+revalidated with ``If-None-Match``/``If-Modified-Since`` and refreshed on a
+304. If the origin can't be reached, a stale copy is served rather than
+failing.
+"""
+
+import time
+import zlib
+import threading
+import logging
+import requests
+
+from config import Config
+from disk_cache import DiskCache
+from http_client import http_get, release_connection
+from deadline import DeadlineExceeded
+from utils import canonicalize_url
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+class CachedResponse:
+    """The parts of a ``requests.Response`` that page fetchers rely on."""
+
+    def __init__(self, url, status_code, headers, content, encoding, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+def get_http_cache():
+    """Return the process-wide response cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(Config.HTTP_CACHE_DIR, Config.HTTP_CACHE_MAX_BYTES, data_suffix='.body')
+        return _cache
+
+def _from_entry(entry):
+    data, meta = entry
+    return CachedResponse(
+        meta.get('url'),
+        meta.get('status_code', 200),
+        meta.get('headers'),
+        zlib.decompress(data),
+        meta.get('encoding'),
+        from_cache=True
+    )
+
+def cached_get(url, headers=None, timeout=10, ttl=None, deadline=None):
+    """
+    GET ``url`` through the response cache.
+
+    Args:
+        url (str): The page to fetch.
+        headers (dict, optional): Extra request headers.
+        timeout (int): Seconds to wait for the origin when a fetch is needed.
+        ttl (int, optional): Freshness lifetime in seconds; defaults to HTTP_CACHE_TTL.
+        deadline (Deadline, optional): Overall time budget; a stale copy is served once it runs out.
+
+    Returns:
+        CachedResponse: Cached or freshly fetched response.
+    """
+    if not Config.HTTP_CACHE_ENABLED:
+        response = http_get(url, headers=headers, timeout=timeout, deadline=deadline)
+        return CachedResponse(response.url, response.status_code, dict(response.headers),
+                              response.content, response.encoding or response.apparent_encoding)
+
+    cache = get_http_cache()
+    key = canonicalize_url(url)
+    ttl = Config.HTTP_CACHE_TTL if ttl is None else ttl
+    entry = cache.get(key)
+
+    if entry and time.time() - entry[1].get('fetched_at', 0) < ttl:
+        return _from_entry(entry)
+
+    request_headers = dict(headers or {})
+    if entry:
+        validators = entry[1].get('headers', {})
+        if validators.get('ETag'):
+            request_headers['If-None-Match'] = validators['ETag']
+        if validators.get('Last-Modified'):
+            request_headers['If-Modified-Since'] = validators['Last-Modified']
+
+    try:
+        response = http_get(url, headers=request_headers, timeout=timeout, deadline=deadline)
+    except (requests.RequestException, DeadlineExceeded) as e:
+        if entry:
+            logger.warning(f"Serving stale cached copy of {url}: {str(e)}")
+            return _from_entry(entry)
+        raise
+
+    if response.status_code == 304 and entry:
+        cache.update_meta(key, fetched_at=time.time())
+        return _from_entry(entry)
+
+    encoding = response.encoding or response.apparent_encoding
+    if response.status_code == 200:
+        kept_headers = {
+            name: response.headers[name]
+            for name in ('Content-Type', 'ETag', 'Last-Modified')
+            if name in response.headers
+        }
+        cache.set(key, zlib.compress(response.content), {
+            'url': response.url,
+            'status_code': response.status_code,
+            'headers': kept_headers,
+            'encoding': encoding,
+            'fetched_at': time.time()
+        })
+
+    return CachedResponse(response.url, response.status_code, dict(response.headers),
+                          response.content, encoding)
+
+def get_prefix(url, read_prefix, headers=None, timeout=10, deadline=None):
+    """
+    GET only the start of ``url``, closing the connection once enough is read.
+
+    Args:
+        url (str): The page to fetch.
+        read_prefix (callable): Takes an iterable of byte chunks and returns
+            the bytes to keep; the download stops as soon as it returns.
+        headers (dict, optional): Extra request headers.
+        timeout (int): Seconds to wait for the origin.
+        deadline (Deadline, optional): Overall time budget the request must fit in.
+
+    Returns:
+        CachedResponse: Response whose ``content`` holds only the prefix. A
+        fresh full copy in the cache is used instead of the network; partial
+        bodies are never stored.
+    """
+    if Config.HTTP_CACHE_ENABLED:
+        entry = get_http_cache().get(canonicalize_url(url))
+        if entry and time.time() - entry[1].get('fetched_at', 0) < Config.HTTP_CACHE_TTL:
+            response = _from_entry(entry)
+            response.content = read_prefix([response.content])
+            return response
+
+    with http_get(url, headers=headers, timeout=timeout, stream=True, deadline=deadline) as response:
+        content = read_prefix(response.iter_content(16384)) if response.ok else b''
+        release_connection(response)
+        return CachedResponse(response.url, response.status_code, dict(response.headers), content, None)
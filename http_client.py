@@ -0,0 +1,235 @@
+"""
+Shared HTTP client for all outbound page and API fetches.
+
+A single pooled ``requests.Session`` keeps connections alive between
+requests, so ingesting dozens of links from the same outlet reuses one
+TCP+TLS connection per worker instead of handshaking for every link. Each host
+gets at most ``HTTP_MAX_CONNECTIONS_PER_HOST`` connections, and callers that
+exceed it wait for a free connection. All requests carry the same
+User-Agent and default timeouts.
+
+With ``HTTP_CLIENT_HTTP2`` enabled and ``httpx`` (with ``h2``) installed,
+requests go through an HTTP/2 ``httpx.Client`` instead. Many requests to one
+host then share a single multiplexed connection. Responses and errors are
+adapted to the ``requests`` interface, so callers don't change.
+"""
+
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+from fetch_scheduler import get_fetch_scheduler
+import failure_cache
+from deadline import DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+_client = None
+_client_lock = threading.Lock()
+
+def default_timeout(timeout=None):
+    """``(connect, read)`` timeout, using the configured defaults when not given."""
+    if timeout is None:
+        return (Config.HTTP_CONNECT_TIMEOUT, Config.HTTP_READ_TIMEOUT)
+    return timeout
+
+class HttpClient:
+    """Pooled ``requests`` session with keep-alive and per-host connection limits."""
+
+    def __init__(self, pool_hosts, per_host):
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = Config.HTTP_USER_AGENT
+        # pool_block: wait for a free connection instead of opening extra ones
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=per_host, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return self.session.get(url, headers=headers, timeout=default_timeout(timeout), stream=stream)
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return self.session.post(url, data=data, headers=headers, timeout=default_timeout(timeout))
+
+    def close(self):
+        self.session.close()
+
+class Http2Response:
+    """The parts of ``requests.Response`` callers use, backed by an httpx response."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.url = str(response.url)
+        self.headers = requests.structures.CaseInsensitiveDict(response.headers)
+        self.encoding = response.charset_encoding
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        return self._response.read()
+
+    @property
+    def apparent_encoding(self):
+        return self._response.encoding
+
+    @property
+    def text(self):
+        return self._response.text
+
+    def json(self):
+        return self._response.json()
+
+    def iter_content(self, chunk_size=16384):
+        return self._response.iter_bytes(chunk_size)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self):
+        self._response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class Http2Client:
+    """HTTP/2 client on httpx, exposing the same methods as ``HttpClient``."""
+
+    def __init__(self, pool_hosts, per_host):
+        import httpx
+
+        self._httpx = httpx
+        # httpx only limits connections overall; with HTTP/2 one connection per host is typical
+        self.client = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            headers={'User-Agent': Config.HTTP_USER_AGENT},
+            limits=httpx.Limits(max_connections=pool_hosts * per_host, max_keepalive_connections=pool_hosts)
+        )
+
+    def _timeout(self, timeout):
+        timeout = default_timeout(timeout)
+        if isinstance(timeout, tuple):
+            return self._httpx.Timeout(timeout[1], connect=timeout[0])
+        return self._httpx.Timeout(timeout)
+
+    def _send(self, method, url, stream=False, **kwargs):
+        try:
+            request = self.client.build_request(method, url, **kwargs)
+            response = self.client.send(request, stream=stream)
+        except self._httpx.TimeoutException as e:
+            raise requests.Timeout(str(e))
+        except self._httpx.HTTPError as e:
+            raise requests.ConnectionError(str(e))
+        return Http2Response(response)
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        return self._send('GET', url, stream=stream, headers=headers, timeout=self._timeout(timeout))
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return self._send('POST', url, data=data, headers=headers, timeout=self._timeout(timeout))
+
+    def close(self):
+        self.client.close()
+
+def get_http_client():
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            pool_hosts, per_host = Config.HTTP_POOL_HOSTS, Config.HTTP_MAX_CONNECTIONS_PER_HOST
+            if Config.HTTP_CLIENT_HTTP2:
+                try:
+                    _client = Http2Client(pool_hosts, per_host)
+                except ImportError:
+                    logger.warning("HTTP/2 requested but httpx[http2] is not installed; using requests")
+            if _client is None:
+                _client = HttpClient(pool_hosts, per_host)
+        return _client
+
+def _reset_after_fork():
+    # Pooled sockets must not be shared with a forked child
+    global _client, _client_lock
+    _client = None
+    _client_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def release_connection(response):
+    """
+    Let a partially read streaming response hand its connection back to the pool.
+
+    Closing a response with unread body bytes drops its connection. If only a
+    little of the body is left (up to ``HTTP_DRAIN_MAX_BYTES``), read it so the
+    connection can be kept alive and reused. HTTP/2 streams close independently
+    of their connection, so nothing needs to be read for them.
+    """
+    raw = getattr(response, 'raw', None)
+    length = response.headers.get('Content-Length', '')
+    if raw is None or not length.isdigit():
+        return
+    if int(length) - raw.tell() <= Config.HTTP_DRAIN_MAX_BYTES:
+        # Read from the raw stream: iter_content refuses a body it has already finished
+        while raw.read(16384):
+            pass
+
+def http_get(url, headers=None, timeout=None, stream=False, deadline=None):
+    """
+    GET ``url`` on the shared client at its domain's polite request rate.
+
+    ``timeout`` defaults to HTTP_CONNECT/READ_TIMEOUT and is shortened to what
+    is left of ``deadline`` (a ``deadline.Deadline``), if given. A 429 or 503
+    with ``Retry-After`` pauses the domain and is retried up to FETCH_RETRIES
+    times. URLs in the negative cache, or on a domain whose circuit is open,
+    raise ``KnownFailureError`` without any network request.
+    """
+    # Known-dead links and tripped domains fail immediately, without waiting for a slot
+    failure_cache.check('fetch', url)
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f"No time left to fetch {url}")
+
+    scheduler = get_fetch_scheduler()
+    for attempt in range(Config.FETCH_RETRIES + 1):
+        scheduler.acquire(url, deadline)
+
+        request_timeout, limited = timeout, False
+        if deadline is not None:
+            full = default_timeout(timeout)
+            full = full[1] if isinstance(full, tuple) else full
+            request_timeout = deadline.timeout(full)
+            limited = request_timeout < full
+
+        try:
+            response = get_http_client().get(url, headers=headers, timeout=request_timeout, stream=stream)
+        except requests.RequestException as e:
+            # A timeout cut short by the budget says nothing about the page
+            if not (limited and isinstance(e, requests.Timeout)):
+                failure_cache.record_failure('fetch', url, f"{type(e).__name__}: {str(e)}")
+            raise
+        delay = scheduler.backoff_from_response(url, response.status_code, response.headers)
+        if delay is None or attempt == Config.FETCH_RETRIES:
+            break
+        response.close()
+
+    if response.status_code >= 400 and response.status_code != 429:
+        # Missing pages are dead links; blocks and server errors point at the whole site
+        site_failure = response.status_code in (401, 403) or response.status_code >= 500
+        failure_cache.record_failure('fetch', url, f"HTTP {response.status_code}", domain_failure=site_failure)
+    elif response.status_code < 400:
+        failure_cache.record_success('fetch', url)
+    return response
+
+def http_post(url, data=None, headers=None, timeout=None):
+    """POST to ``url`` on the shared client."""
+    return get_http_client().post(url, data=data, headers=headers, timeout=timeout)
@@ -0,0 +1,109 @@
+"""
+Post-processing of raw screenshots before they are embedded.
+
+Raw captures are full-viewport PNGs, several times larger than needed for a
+6-inch wide picture in a Word docket or a Google Doc. Each preset crops
+blank space off the bottom, downscales to the embed width and re-encodes to
+an optimized format. Results are stored in the screenshot cache keyed by a
+hash of the raw image and the preset, so each capture is processed once.
+"""
+
+import io
+import json
+import hashlib
+import logging
+from PIL import Image, ImageChops
+
+from config import Config
+from screenshot_cache import get_screenshot_cache
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+PRESETS = {
+    # Word dockets: pictures are inserted 6 inches wide
+    'docx': {'max_width': 1000, 'max_height': 1000, 'format': 'JPEG', 'quality': 75},
+    # Google Docs: images are inserted at 600pt wide
+    'gdoc': {'max_width': 1000, 'max_height': 1000, 'format': 'JPEG', 'quality': 80},
+    # Smaller previews
+    'thumbnail': {'max_width': 480, 'max_height': 480, 'format': 'JPEG', 'quality': 70},
+    # Leave the capture untouched
+    'original': None
+}
+
+MIMETYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+def image_mimetype(data):
+    """MIME type of encoded image bytes."""
+    try:
+        return MIMETYPES.get(Image.open(io.BytesIO(data)).format, 'image/png')
+    except Exception:
+        return 'image/png'
+
+def _trim_blank_bottom(image):
+    """Crop uniform background (e.g. an unrendered lower half) off the bottom."""
+    background = Image.new(image.mode, image.size, image.getpixel((0, image.height - 1)))
+    bbox = ImageChops.difference(image, background).getbbox()
+    if bbox and bbox[3] < image.height:
+        return image.crop((0, 0, image.width, max(bbox[3], image.height // 4)))
+    return image
+
+def process_screenshot(data, preset):
+    """Crop, downscale and re-encode raw screenshot bytes with a named preset."""
+    settings = PRESETS.get(preset)
+    if not settings:
+        return data
+
+    image = Image.open(io.BytesIO(data))
+    image = image.convert('RGB')
+    image = _trim_blank_bottom(image)
+
+    # Crop overly tall captures to the preset's aspect ratio, then downscale
+    max_height_ratio = settings['max_height'] / settings['max_width']
+    if image.height > image.width * max_height_ratio:
+        image = image.crop((0, 0, image.width, int(image.width * max_height_ratio)))
+    if image.width > settings['max_width']:
+        height = int(image.height * settings['max_width'] / image.width)
+        image = image.resize((settings['max_width'], height), Image.LANCZOS)
+
+    output = io.BytesIO()
+    if settings['format'] == 'JPEG':
+        image.save(output, 'JPEG', quality=settings['quality'], optimize=True, progressive=True)
+    else:
+        image.save(output, settings['format'], quality=settings.get('quality', 80), optimize=True)
+
+    # Flat, text-only captures can compress better as the original PNG
+    processed = output.getvalue()
+    return processed if len(processed) < len(data) else data
+
+def prepare_screenshot(data, preset):
+    """
+    Return the embeddable version of a raw screenshot, processing it at most once.
+
+    Args:
+        data (bytes): Raw screenshot from ``take_screenshot``.
+        preset (str): Name of a preset in ``PRESETS``.
+
+    Returns:
+        bytes: Processed image, or the raw bytes if processing fails.
+    """
+    if not data or not PRESETS.get(preset):
+        return data
+
+    cache = get_screenshot_cache()
+    key = '|'.join(['processed', hashlib.sha256(data).hexdigest(), json.dumps(PRESETS[preset], sort_keys=True)])
+
+    if Config.SCREENSHOT_CACHE_ENABLED:
+        entry = cache.get(key)
+        if entry:
+            return entry[0]
+
+    try:
+        processed = process_screenshot(data, preset)
+    except Exception as e:
+        logger.warning(f"Could not post-process screenshot: {str(e)}")
+        return data
+
+    if Config.SCREENSHOT_CACHE_ENABLED:
+        cache.set(key, processed, {'preset': preset, 'raw_size': len(data)})
+    return processed
@@ -0,0 +1,178 @@
+"""
+Pipelined link ingestion.
+
+Reading the source, fetching metadata and saving placements overlap instead
+of running one after another. Links are checked against the database in
+small batches as they are found in the source text and handed straight to
+the fetch workers, and placements are written in small bulk batches
+(``placement_store.upsert_placements``) as their metadata arrives. The first
+placements show up while a large sheet is still being read, and an import
+that fails part-way keeps everything saved so far.
+"""
+
+import time
+import logging
+import threading
+from flask import current_app
+from sqlalchemy import or_
+
+from config import Config
+from models import db, MediaPlacement
+from placement_store import upsert_placements
+from parsers import iter_links, parse_media_links, parse_page
+from fetch_scheduler import get_fetch_scheduler
+from utils import canonicalize_url
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Links per existence query, keeping the IN lists under database parameter limits
+SAVED_LOOKUP_CHUNK = 5000
+
+def find_saved_placements(canonical_urls, urls=()):
+    """
+    Which of the given canonical URLs and exact URLs are already saved as placements.
+
+    Both lists are checked together in one indexed query per
+    ``SAVED_LOOKUP_CHUNK`` entries.
+
+    Args:
+        canonical_urls (list): Canonical URLs (``utils.canonicalize_url``).
+        urls (list): URLs as pasted, matched against ``MediaPlacement.url``.
+
+    Returns:
+        set: The canonical URLs and URLs that were found.
+    """
+    canonical_urls, urls = list(canonical_urls), list(urls)
+    found = set()
+    for start in range(0, max(len(canonical_urls), len(urls)), SAVED_LOOKUP_CHUNK):
+        rows = db.session.query(MediaPlacement.url, MediaPlacement.canonical_url).filter(or_(
+            MediaPlacement.canonical_url.in_(canonical_urls[start:start + SAVED_LOOKUP_CHUNK]),
+            MediaPlacement.url.in_(urls[start:start + SAVED_LOOKUP_CHUNK])
+        )).all()
+        for url, canonical_url in rows:
+            found.update((url, canonical_url))
+    return found
+
+def _batches(items, size):
+    """Group an iterable into lists of up to ``size`` items, flushing the last one even if it fails."""
+    batch = []
+    try:
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    except Exception:
+        if batch:
+            yield batch
+        raise
+    if batch:
+        yield batch
+
+def ingest_links(chunks, full_pages=False, progress_callback=None, deadline=None, max_workers=None,
+                 per_host_limit=None):
+    """
+    Find the links in a stream of source text and save a placement for each new one.
+
+    Args:
+        chunks (iterable): Source text in pieces, e.g. from ``get_google_sheets_content``.
+        full_pages (bool): Download whole pages and store their artifacts
+            (``METADATA_MODE = 'full'``) instead of reading only page heads.
+        progress_callback (callable, optional): Called as ``(done, total)`` after
+            each link is fetched; ``total`` grows while the source is read.
+        deadline (Deadline, optional): Time budget for the fetches.
+        max_workers (int, optional): Concurrent fetches, default ``INGEST_MAX_WORKERS``.
+        per_host_limit (int, optional): Concurrent fetches per host, default
+            ``INGEST_PER_HOST_LIMIT``.
+
+    Returns:
+        dict: Counts of links ``found`` in the source, placements ``added`` and
+        duplicates ``skipped``.
+
+    Raises:
+        ValueError: If reading the source or saving fails. Placements committed
+        before the failure are kept, and the links already found are still saved.
+    """
+    app = current_app._get_current_object()
+    stats = {'found': 0, 'added': 0, 'skipped': 0}
+    # Counted on the feeder thread only, and merged into stats once it has finished
+    read_stats = {'found': 0, 'skipped': 0}
+    canonical = {}
+    # Set when saving fails, so the feeder stops reading the source
+    stop = threading.Event()
+
+    def new_links():
+        # Runs on the fetch scheduler's feeder thread, so it needs its own app context and session
+        with app.app_context():
+            seen = set()
+            for batch in _batches(iter_links(chunks), Config.INGEST_LOOKUP_BATCH):
+                if stop.is_set():
+                    return
+                keys = {link: canonicalize_url(link)[:512] for link in batch}
+                seen.update(find_saved_placements(keys.values(), batch))
+                # End the read transaction so it doesn't hold up commits (SQLite locks the whole file)
+                db.session.rollback()
+                for link in batch:
+                    if stop.is_set():
+                        return
+                    read_stats['found'] += 1
+                    if link in seen or keys[link] in seen:
+                        read_stats['skipped'] += 1
+                        continue
+                    seen.add(keys[link])
+                    canonical[link] = keys[link]
+                    yield link
+
+    def save(batch):
+        # Placements whose resolved canonical URL is already saved are skipped by the upsert
+        result = upsert_placements(({
+            'url': link,
+            'canonical_url': placement_data.get('canonical_url') or canonical[link],
+            'title': placement_data.get('title', ''),
+            'source': placement_data.get('source', ''),
+            'publication_date': placement_data.get('date'),
+            'media_type': placement_data.get('type', 'article'),
+            # Keep the fetched page so dockets don't download it again
+            'page': placement_data if full_pages else None
+        } for link, placement_data in batch), batch_size=len(batch))
+        stats['added'] += result['inserted']
+        stats['skipped'] += result['skipped']
+
+    parse = parse_page if full_pages else parse_media_links
+    batch = []
+    last_commit = time.monotonic()
+    try:
+        for link, placement_data, error in get_fetch_scheduler().map(
+                lambda url: parse(url, deadline=deadline),
+                new_links(),
+                max_workers or Config.INGEST_MAX_WORKERS,
+                per_host_limit or Config.INGEST_PER_HOST_LIMIT,
+                progress_callback):
+            if error:
+                logger.error(f"Unexpected error parsing media link {link}: {str(error)}")
+            elif placement_data:
+                batch.append((link, placement_data))
+
+            if batch and (len(batch) >= Config.INGEST_COMMIT_BATCH
+                          or time.monotonic() - last_commit >= Config.INGEST_COMMIT_INTERVAL):
+                ready, batch = batch, []
+                save(ready)
+                last_commit = time.monotonic()
+    except Exception as e:
+        stop.set()
+        # Keep what was fetched before the failure
+        if batch:
+            try:
+                save(batch)
+            except ValueError as save_error:
+                logger.error(f"Could not save placements fetched before the failure: {str(save_error)}")
+        if stats['added']:
+            raise ValueError(f"{str(e)} ({stats['added']} placements found before the error were saved)") from e
+        raise
+
+    if batch:
+        save(batch)
+    stats['found'] = read_stats['found']
+    stats['skipped'] += read_stats['skipped']
+    return stats
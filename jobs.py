@@ -0,0 +1,329 @@
+"""
+Background job queue backed by the application database.
+
+Heavy work (link ingestion, docket generation, export packages) is stored as a
+row in the ``jobs`` table and picked up by worker processes started with
+``python worker.py`` (or by the in-process worker threads started from
+``run.py``). No external broker is required: workers claim jobs with an atomic
+``UPDATE ... WHERE status = 'queued'`` so any number of them can share the
+same SQLite or Postgres database.
+
+A running job's worker refreshes its heartbeat; a job whose heartbeat stops
+(the worker died) is put back on the queue, while jobs that are merely long
+keep running where they are. Downloads of finished jobs are deleted once
+they are older than ``JOB_ARTIFACT_MAX_AGE``.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import logging
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, render_template, send_file, url_for, flash, redirect, abort, current_app
+from sqlalchemy import func
+
+from models import db, Job
+from deadline import Deadline
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+# Registered job handlers, keyed by job kind
+_handlers = {}
+
+def job_handler(kind):
+    """Register a function as the handler for jobs of the given kind.
+
+    Handlers are called as ``handler(job, payload)`` inside an application
+    context, where ``job`` is a :class:`JobContext`.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+def get_job_handler(kind):
+    """Return the handler registered for a job kind, e.g. to run it outside the queue."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return _handlers[kind]
+
+def enqueue_job(kind, payload=None, message=None):
+    """Create a queued job and return it."""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = Job(
+        kind=kind,
+        status='queued',
+        payload=json.dumps(payload or {}),
+        message=message or 'Waiting for a worker...'
+    )
+    db.session.add(job)
+    db.session.commit()
+    logger.info(f"Enqueued job {job.id} ({kind})")
+    return job
+
+def job_to_dict(job):
+    """Serialize a job for the status API."""
+    result = json.loads(job.result) if job.result else {}
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': job.progress or 0,
+        'total': job.total or 0,
+        'message': job.message,
+        'error': job.error,
+        'result': result,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'download_url': None,
+        'redirect_url': None
+    }
+
+    if job.status == 'finished':
+        if job.artifact_path:
+            data['download_url'] = url_for('jobs.download_job_artifact', job_id=job.id)
+        if result.get('redirect_url'):
+            data['redirect_url'] = result['redirect_url']
+        elif result.get('redirect_endpoint'):
+            data['redirect_url'] = url_for(result['redirect_endpoint'], **result.get('redirect_args', {}))
+
+    return data
+
+class JobContext:
+    """Handle passed to job handlers for reporting progress and results."""
+
+    def __init__(self, job, artifact_root, deadline=None):
+        self.id = job.id
+        self.kind = job.kind
+        self.artifact_dir = os.path.join(artifact_root, str(job.id))
+        self.result = {}
+        self.artifact = None
+        self.message = None
+        # Overall time budget; handlers pass it (or a share of it) to each stage
+        self.deadline = deadline or Deadline()
+
+    def update(self, progress=None, total=None, message=None):
+        """Record progress and refresh the heartbeat. Written on a separate
+        connection so it never commits work the handler has pending in the session."""
+        values = {'heartbeat_at': datetime.utcnow()}
+        if progress is not None:
+            values['progress'] = progress
+        if total is not None:
+            values['total'] = total
+        if message is not None:
+            values['message'] = message[:256]
+
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(Job.__table__.update().where(Job.__table__.c.id == self.id).values(**values))
+        except Exception as e:
+            logger.warning(f"Could not update progress for job {self.id}: {str(e)}")
+
+    def artifact_file(self, filename):
+        """Return a path inside this job's artifact directory."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        return os.path.join(self.artifact_dir, filename)
+
+    def set_artifact(self, path, download_name, mimetype):
+        """Mark a finished file as this job's downloadable result."""
+        self.artifact = (path, download_name, mimetype)
+
+def claim_next_job():
+    """Atomically claim the oldest queued job. Returns None if there is none."""
+    while True:
+        job_id = db.session.query(Job.id).filter(Job.status == 'queued').order_by(Job.id).limit(1).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+
+        claimed = db.session.query(Job).filter(Job.id == job_id, Job.status == 'queued').update(
+            {'status': 'running', 'started_at': datetime.utcnow(), 'heartbeat_at': datetime.utcnow(),
+             'message': 'Starting...'},
+            synchronize_session=False
+        )
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+        # Another worker got there first; try the next one
+
+def requeue_stale_jobs(max_age_seconds):
+    """Put jobs whose worker died mid-run (no heartbeat for ``max_age_seconds``) back on the queue."""
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    last_seen = func.coalesce(Job.heartbeat_at, Job.started_at)
+    count = db.session.query(Job).filter(Job.status == 'running', last_seen < cutoff).update(
+        {'status': 'queued', 'started_at': None, 'heartbeat_at': None,
+         'message': 'Requeued after worker interruption'},
+        synchronize_session=False
+    )
+    db.session.commit()
+    if count:
+        logger.warning(f"Requeued {count} stale job(s)")
+    return count
+
+def expire_job_artifacts(artifact_root, max_age_seconds):
+    """
+    Delete the artifact directories of jobs that ended more than ``max_age_seconds`` ago.
+
+    Directories of jobs that no longer exist are removed too; those of queued
+    and running jobs are left alone. Returns the number of directories removed.
+    """
+    if not os.path.isdir(artifact_root):
+        return 0
+
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    removed = 0
+    for name in os.listdir(artifact_root):
+        path = os.path.join(artifact_root, name)
+        if not name.isdigit() or not os.path.isdir(path):
+            continue
+        job = db.session.get(Job, int(name))
+        if job is not None and (job.status not in ('finished', 'failed')
+                                or (job.finished_at or job.created_at) >= cutoff):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        if job is not None and job.artifact_path:
+            job.artifact_path = None
+        removed += 1
+    db.session.commit()
+    if removed:
+        logger.info(f"Removed {removed} expired job artifact director{'y' if removed == 1 else 'ies'}")
+    return removed
+
+def _beat(app, ctx, stop_event):
+    """Refresh a running job's heartbeat until ``stop_event`` is set, for handlers that go quiet."""
+    with app.app_context():
+        while not stop_event.wait(app.config['JOB_HEARTBEAT_INTERVAL']):
+            ctx.update()
+
+def run_job(job):
+    """Run a claimed job through its handler and record the outcome."""
+    handler = _handlers.get(job.kind)
+    ctx = JobContext(job, current_app.config['JOB_ARTIFACT_DIR'], Deadline(current_app.config['JOB_DEADLINE']))
+    stop_beating = threading.Event()
+    threading.Thread(target=_beat, args=(current_app._get_current_object(), ctx, stop_beating),
+                     name=f'job-{ctx.id}-heartbeat', daemon=True).start()
+
+    try:
+        if not handler:
+            raise ValueError(f"No handler registered for job kind '{job.kind}'")
+
+        payload = json.loads(job.payload) if job.payload else {}
+        handler(ctx, payload)
+
+        job = db.session.get(Job, ctx.id)
+        job.status = 'finished'
+        job.result = json.dumps(ctx.result)
+        job.message = (ctx.message or 'Done')[:256]
+        if ctx.artifact:
+            job.artifact_path, job.artifact_name, job.artifact_mimetype = ctx.artifact
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        logger.info(f"Job {ctx.id} ({ctx.kind}) finished")
+
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Job {ctx.id} ({ctx.kind}) failed: {str(e)}")
+        job = db.session.get(Job, ctx.id)
+        job.status = 'failed'
+        job.error = str(e)
+        job.message = 'Failed'
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    finally:
+        stop_beating.set()
+        db.session.remove()
+
+def run_worker(app, poll_interval=None, stop_event=None):
+    """Process queued jobs until ``stop_event`` is set (forever by default)."""
+    poll_interval = poll_interval or app.config['JOB_POLL_INTERVAL']
+    stop_event = stop_event or threading.Event()
+    logger.info(f"Job worker started (pid {os.getpid()}, thread {threading.current_thread().name})")
+
+    last_sweep = None
+    while not stop_event.is_set():
+        with app.app_context():
+            if last_sweep is None or time.monotonic() - last_sweep >= app.config['JOB_SWEEP_INTERVAL']:
+                last_sweep = time.monotonic()
+                try:
+                    requeue_stale_jobs(app.config['JOB_STALE_SECONDS'])
+                    expire_job_artifacts(app.config['JOB_ARTIFACT_DIR'], app.config['JOB_ARTIFACT_MAX_AGE'])
+                except Exception as e:
+                    logger.error(f"Error sweeping jobs: {str(e)}")
+                    db.session.rollback()
+
+            try:
+                job = claim_next_job()
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                db.session.rollback()
+                job = None
+
+            if job:
+                run_job(job)
+                continue
+
+        stop_event.wait(poll_interval)
+
+def start_worker_threads(app, count):
+    """Start ``count`` daemon worker threads inside the current process."""
+    threads = []
+    for i in range(count):
+        thread = threading.Thread(target=run_worker, args=(app,), name=f'job-worker-{i + 1}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    return threads
+
+@jobs_bp.route('/<int:job_id>')
+def job_status(job_id):
+    """JSON status and progress for a job."""
+    job = Job.query.filter_by(id=job_id).first_or_404()
+    return jsonify(job_to_dict(job))
+
+@jobs_bp.route('/<int:job_id>/wait')
+def wait_for_job(job_id):
+    """Loading page that polls the job status until it completes."""
+    job = Job.query.filter_by(id=job_id).first_or_404()
+    payload = json.loads(job.payload) if job.payload else {}
+    return render_template(
+        'loading.html',
+        job=job,
+        action_title=payload.get('action_title', 'Working...'),
+        message=payload.get('description', job.message)
+    )
+
+@jobs_bp.route('/<int:job_id>/complete')
+def complete_job(job_id):
+    """Flash a finished job's outcome and continue to its result page."""
+    job = Job.query.filter_by(id=job_id).first_or_404()
+    data = job_to_dict(job)
+
+    if job.status == 'failed':
+        flash(f'Error: {job.error}', 'danger')
+        return redirect(url_for('dashboard'))
+    if job.status != 'finished':
+        return redirect(url_for('jobs.wait_for_job', job_id=job.id))
+
+    flash(job.message, data['result'].get('category', 'success'))
+    return redirect(data['redirect_url'] or url_for('dashboard'))
+
+@jobs_bp.route('/<int:job_id>/download')
+def download_job_artifact(job_id):
+    """Download the file produced by a finished job."""
+    job = Job.query.filter_by(id=job_id).first_or_404()
+    if job.status != 'finished' or not job.artifact_path or not os.path.exists(job.artifact_path):
+        abort(404)
+
+    return send_file(
+        os.path.abspath(job.artifact_path),
+        mimetype=job.artifact_mimetype,
+        as_attachment=True,
+        download_name=job.artifact_name
+    )
@@ -0,0 +1,135 @@
+"""
+Link files uploaded for import: CSV, Excel (.xlsx) and Word (.docx).
+
+Clients send coverage reports as attachments that can run to tens of
+thousands of rows, so an upload is saved to ``UPLOAD_DIR`` as it arrives and
+read back by the worker as a stream of text pieces, like the Google Docs and
+Sheets readers. ``parsers.iter_links`` and the ingestion pipeline start on
+the first rows while the rest of the file is still being read, and the file
+is never turned into one string:
+
+- CSV is read row by row with the ``csv`` module (delimiter sniffed from the
+  first lines);
+- Excel workbooks are opened read-only, so openpyxl streams the sheet XML
+  instead of building every cell;
+- Word documents are walked paragraph by paragraph, tables included, and
+  hyperlink targets are yielded along with the text, since reports often
+  link a headline rather than spelling out its URL.
+"""
+
+import os
+import csv
+import uuid
+import logging
+
+from config import Config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+UPLOAD_EXTENSIONS = ('csv', 'xlsx', 'docx')
+
+# Bytes of a CSV file used to detect its delimiter
+CSV_SNIFF_BYTES = 64 * 1024
+
+def file_extension(filename):
+    """Lowercased extension of ``filename`` without the dot."""
+    return os.path.splitext(filename or '')[1].lower().lstrip('.')
+
+def save_upload(file_storage):
+    """
+    Save an uploaded link file where the job worker can read it.
+
+    Args:
+        file_storage (FileStorage): The uploaded file from the form.
+
+    Returns:
+        str: Path of the saved file, named with a random id and the original extension.
+    """
+    extension = file_extension(file_storage.filename)
+    if extension not in UPLOAD_EXTENSIONS:
+        raise ValueError(f"Unsupported file type: .{extension}")
+    os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(Config.UPLOAD_DIR, f"{uuid.uuid4().hex}.{extension}")
+    file_storage.save(path)
+    return path
+
+def iter_csv_text(path):
+    """Yield a CSV file's text one row at a time, cells separated by spaces."""
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        try:
+            dialect = csv.Sniffer().sniff(f.read(CSV_SNIFF_BYTES), delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        for row in csv.reader(f, dialect):
+            yield ' '.join(row) + '\n'
+
+def iter_xlsx_text(path):
+    """Yield the cell values of every sheet of a workbook one row at a time."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            for row in sheet.iter_rows(values_only=True):
+                yield ' '.join(str(value) for value in row if value is not None) + '\n'
+    finally:
+        workbook.close()
+
+def _paragraph_text(paragraph):
+    text = paragraph.text
+    urls = [hyperlink.url for hyperlink in paragraph.hyperlinks if hyperlink.url]
+    if urls:
+        text = f"{text} {' '.join(urls)}"
+    return text + '\n'
+
+def _iter_blocks(container):
+    """Paragraph text of a document or table cell in reading order, descending into tables."""
+    from docx.table import Table
+
+    for block in container.iter_inner_content():
+        if isinstance(block, Table):
+            for row in block.rows:
+                previous = None
+                for cell in row.cells:
+                    # Merged cells are repeated once per grid column they span
+                    if cell._tc is previous:
+                        continue
+                    previous = cell._tc
+                    yield from _iter_blocks(cell)
+        else:
+            yield _paragraph_text(block)
+
+def iter_docx_text(path):
+    """Yield a Word document's paragraphs (and their hyperlink targets) one at a time."""
+    from docx import Document
+
+    yield from _iter_blocks(Document(path))
+
+READERS = {
+    'csv': iter_csv_text,
+    'xlsx': iter_xlsx_text,
+    'docx': iter_docx_text
+}
+
+def read_link_file(path, filename=None):
+    """
+    Yield the text of an uploaded link file in pieces, for ``ingest.ingest_links``.
+
+    Args:
+        path (str): Path of the saved upload.
+        filename (str, optional): The file's original name, for error messages.
+
+    Raises:
+        ValueError: If the file type is not supported or the file can't be read.
+    """
+    filename = filename or os.path.basename(path)
+    reader = READERS.get(file_extension(path))
+    if reader is None:
+        raise ValueError(f"Unsupported file type: {filename}")
+    try:
+        yield from reader(path)
+    except Exception as e:
+        logger.error(f"Error reading uploaded file {filename}: {str(e)}")
+        raise ValueError(f"Error reading {filename}: {str(e)}")
@@ -0,0 +1,212 @@
+"""
+Media type classification from a rule table.
+
+A placement's media type (video, podcast, social, ...) follows from where it
+is published. Rules map a host, optionally with a path prefix, to a type:
+
+- ``youtube.com`` matches the host and all of its subdomains
+  (``m.youtube.com``), so one entry covers a registrable domain;
+- ``music.example.com`` only matches that host (and its subdomains);
+- ``apple.com/podcast`` also requires the path to start with the whole
+  segment ``/podcast`` (``/podcast/...``, not ``/podcasts``). A leading
+  two-letter country segment is skipped, as storefront URLs put one first:
+  ``itunes.apple.com/podcast`` matches ``itunes.apple.com/us/podcast/...``.
+
+The most specific host wins, and for one host the longest matching path
+prefix wins. Rules are compiled into a dict keyed by host, so a lookup costs
+one dict probe per label of the URL's host however many rules there are.
+Built-in rules can be extended or overridden by a JSON file at
+``MEDIA_TYPE_RULES_FILE``, e.g.::
+
+    {"rules": {"example-radio.com": "podcast", "example.com/video": "video"}}
+
+Run ``python media_types.py`` to reclassify every saved placement with the
+current rules (``--dry-run`` only reports what would change).
+"""
+
+import os
+import re
+import json
+import threading
+import logging
+from collections import Counter
+from urllib.parse import urlparse
+
+from config import Config
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_TYPE = 'article'
+
+RULES = {
+    # Video
+    'youtube.com': 'video', 'youtu.be': 'video', 'youtube-nocookie.com': 'video', 'vimeo.com': 'video',
+    'dailymotion.com': 'video', 'dai.ly': 'video', 'twitch.tv': 'video', 'rumble.com': 'video',
+    # Podcasts and audio
+    'spotify.com': 'podcast', 'podcasts.apple.com': 'podcast', 'itunes.apple.com/podcast': 'podcast',
+    'apple.com/podcast': 'podcast', 'soundcloud.com': 'podcast', 'podcasts.google.com': 'podcast',
+    'overcast.fm': 'podcast', 'pca.st': 'podcast', 'castbox.fm': 'podcast', 'podbean.com': 'podcast',
+    'buzzsprout.com': 'podcast', 'simplecast.com': 'podcast', 'anchor.fm': 'podcast',
+    'iheart.com/podcast': 'podcast', 'stitcher.com': 'podcast', 'audioboom.com': 'podcast',
+    # Social media
+    'twitter.com': 'social', 'x.com': 'social', 'facebook.com': 'social', 'fb.watch': 'social',
+    'instagram.com': 'social', 'linkedin.com': 'social', 'threads.net': 'social', 'tiktok.com': 'social',
+    'reddit.com': 'social', 'bsky.app': 'social', 'pinterest.com': 'social',
+    # Blogging platforms
+    'medium.com': 'blog', 'substack.com': 'blog', 'blogspot.com': 'blog', 'wordpress.com': 'blog',
+    'tumblr.com': 'blog'
+}
+
+# Country segment at the start of a path, e.g. /us/ in itunes.apple.com/us/podcast/...
+_COUNTRY_SEGMENT = re.compile(r'^/[a-z]{2}(?=/)')
+
+_index = None
+_index_lock = threading.Lock()
+
+def _split_url(url):
+    """``(host, path)`` of a URL, lowercased, without port or leading ``www.``."""
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return host, parsed.path.lower() or '/'
+
+def _under(path, prefix):
+    """Whether ``path`` is ``prefix`` or below it, comparing whole segments."""
+    return prefix == '/' or path == prefix or path.startswith(prefix + '/')
+
+class MediaTypeIndex:
+    """Rules compiled into a host -> ``[(path prefix, type), ...]`` lookup table."""
+
+    def __init__(self, rules):
+        index = {}
+        for entry, media_type in rules.items():
+            host, _, path = entry.strip().lower().partition('/')
+            if host.startswith('www.'):
+                host = host[4:]
+            if host:
+                index.setdefault(host, {})['/' + path.strip('/')] = media_type
+        # Longest path prefix first, so the most specific rule for a host wins
+        self.hosts = {
+            host: sorted(paths.items(), key=lambda item: len(item[0]), reverse=True)
+            for host, paths in index.items()
+        }
+
+    def __len__(self):
+        return sum(len(paths) for paths in self.hosts.values())
+
+    def match(self, url):
+        """The type of the most specific rule matching ``url``, or None."""
+        host, path = _split_url(url)
+        local_path = _COUNTRY_SEGMENT.sub('', path)
+        labels = host.split('.')
+        for i in range(len(labels)):
+            paths = self.hosts.get('.'.join(labels[i:]))
+            if paths:
+                for prefix, media_type in paths:
+                    if _under(path, prefix) or _under(local_path, prefix):
+                        return media_type
+        return None
+
+    def classify(self, url, default=DEFAULT_MEDIA_TYPE):
+        """Media type for ``url``: the matching rule's type, else ``default``."""
+        return self.match(url) or default
+
+def load_rules(path=None):
+    """Built-in rules merged with those in the rules file. A missing or invalid file is ignored."""
+    rules = dict(RULES)
+    path = path if path is not None else Config.MEDIA_TYPE_RULES_FILE
+    if path and os.path.exists(path):
+        try:
+            with open(path) as f:
+                rules.update(json.load(f).get('rules', {}))
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Could not load media type rules from {path}: {str(e)}")
+    return rules
+
+def get_media_type_index():
+    """Return the process-wide rule index, compiling it on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = MediaTypeIndex(load_rules())
+        return _index
+
+def classify_media_type(url):
+    """
+    Classify a placement URL by the media type rules.
+
+    Args:
+        url (str): The placement's URL.
+
+    Returns:
+        str: ``'video'``, ``'podcast'``, ``'social'``, ``'blog'``, ... or
+        ``'article'`` when no rule matches.
+    """
+    return get_media_type_index().classify(url)
+
+def reclassify_placements(batch_size=1000, dry_run=False):
+    """
+    Recompute the media type of every saved placement with the current rules.
+
+    The table is read in primary-key order ``batch_size`` rows at a time, and
+    only rows whose type changes are written, with one bulk update per batch.
+    Must run inside an application context.
+
+    Args:
+        batch_size (int): Rows read and updated per round trip.
+        dry_run (bool): Only count the changes, don't write them.
+
+    Returns:
+        dict: ``checked`` and ``changed`` row counts, and ``changes`` as a
+        Counter of ``(old type, new type)`` pairs.
+    """
+    from sqlalchemy import update
+    from models import db, MediaPlacement
+
+    index = get_media_type_index()
+    stats = {'checked': 0, 'changed': 0, 'changes': Counter()}
+    last_id = 0
+    while True:
+        rows = db.session.query(MediaPlacement.id, MediaPlacement.url, MediaPlacement.media_type).filter(
+            MediaPlacement.id > last_id).order_by(MediaPlacement.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stats['checked'] += len(rows)
+
+        updates = []
+        for placement_id, url, media_type in rows:
+            new_type = index.classify(url)
+            if new_type != media_type:
+                updates.append({'id': placement_id, 'media_type': new_type})
+                stats['changes'][(media_type, new_type)] += 1
+        stats['changed'] += len(updates)
+
+        if updates and not dry_run:
+            db.session.execute(update(MediaPlacement), updates)
+            db.session.commit()
+    db.session.rollback()
+    return stats
+
+if __name__ == '__main__':
+    import sys
+    import argparse
+    from app import app
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s',
+                        handlers=[logging.StreamHandler(sys.stdout)])
+    parser = argparse.ArgumentParser(description='Reclassify the media type of all saved placements.')
+    parser.add_argument('--dry-run', action='store_true', help='report the changes without saving them')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        result = reclassify_placements(batch_size=args.batch_size, dry_run=args.dry_run)
+    logger.info(f"Checked {result['checked']} placements using {len(get_media_type_index())} rules; "
+                f"{'would change' if args.dry_run else 'changed'} {result['changed']}")
+    for (old_type, new_type), count in result['changes'].most_common():
+        logger.info(f"  {old_type} -> {new_type}: {count}")
@@ -0,0 +1,225 @@
+"""
+Media Placements Tracker - Command Line
+
+Runs the ingestion, docket and export pipelines directly against the
+database, without the web server or the job queue, so bulk work isn't bound
+by HTTP timeouts and can be scheduled (e.g. a nightly export from cron):
+
+    python -m mediaplacements ingest report.xlsx links.txt --workers 16
+    python -m mediaplacements ingest --gsheet SHEET_ID
+    python -m mediaplacements dockets --output-dir dockets/
+    python -m mediaplacements dockets --google
+    python -m mediaplacements export --output-dir exports/ --workers 8
+
+Every command can be re-run after an interruption: ingestion skips links that
+are already saved, local dockets already in the output directory are kept
+(unless time ran out before their screenshot was taken), Google dockets are
+only created for placements without one, and an export resumes from the
+dockets left in its work directory. The exit status is non-zero if the
+command failed.
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+from app import app, build_dockets, claim_export_work_dir
+from deadline import Deadline
+from ingest import ingest_links
+from jobs import get_job_handler
+from link_files import UPLOAD_EXTENSIONS, file_extension, read_link_file
+from models import MediaPlacement
+from run import initialize_database
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] %(levelname)s: %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger('MediaPlacementsCLI')
+
+# Seconds between progress lines, so thousands of links don't flood the output
+PROGRESS_INTERVAL = 2.0
+
+class ConsoleJob:
+    """Stands in for ``jobs.JobContext`` when a job handler runs from the command line."""
+
+    def __init__(self, kind, artifact_dir, deadline=None):
+        self.id = None
+        self.kind = kind
+        self.artifact_dir = artifact_dir
+        self.result = {}
+        self.artifact = None
+        self.message = None
+        self.deadline = deadline or Deadline()
+        self.progress = self.total = None
+        self._last_report = 0.0
+
+    def update(self, progress=None, total=None, message=None):
+        """Log progress, at most once every ``PROGRESS_INTERVAL`` seconds unless the message changes."""
+        if total is not None:
+            self.total = total
+        if progress is not None:
+            self.progress = progress
+        now = time.monotonic()
+        finished = self.total is not None and self.progress == self.total
+        if message is None and not finished and now - self._last_report < PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        counter = f"[{self.progress}/{self.total}] " if self.total else ''
+        logger.info(f"{counter}{message or ''}".rstrip())
+
+    def artifact_file(self, filename):
+        """Return a path inside the output directory."""
+        os.makedirs(self.artifact_dir, exist_ok=True)
+        return os.path.join(self.artifact_dir, filename)
+
+    def set_artifact(self, path, download_name, mimetype):
+        self.artifact = (path, download_name, mimetype)
+
+def _deadline(args):
+    return Deadline(args.deadline) if args.deadline else Deadline()
+
+def _read_source(path):
+    """Text of a link file in pieces: CSV/XLSX/DOCX through their readers, anything else line by line."""
+    if path == '-':
+        yield from sys.stdin
+    elif file_extension(path) in UPLOAD_EXTENSIONS:
+        yield from read_link_file(path)
+    else:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            yield from f
+
+def ingest_command(args):
+    """Save a placement for every new link in the given files, Google Docs and Sheets."""
+    from google_integration import get_google_docs_content, get_google_sheets_content
+
+    sources = [(path, _read_source(path)) for path in args.files]
+    sources += [(f"Google Doc {doc_id}", get_google_docs_content(doc_id)) for doc_id in args.gdoc]
+    sources += [(f"Google Sheet {sheet_id}", get_google_sheets_content(sheet_id)) for sheet_id in args.gsheet]
+    if not sources:
+        logger.error("Nothing to ingest: give files, '-' for standard input, --gdoc or --gsheet")
+        return 1
+
+    job = ConsoleJob('add_placement', '.', _deadline(args))
+    full_pages = args.full_pages or app.config['METADATA_MODE'] == 'full'
+    failed = False
+    for name, content in sources:
+        logger.info(f"Ingesting links from {name}...")
+        try:
+            stats = ingest_links(
+                content,
+                full_pages=full_pages,
+                progress_callback=lambda done, total: job.update(progress=done, total=total),
+                deadline=job.deadline,
+                max_workers=args.workers,
+                per_host_limit=args.per_host
+            )
+        except ValueError as e:
+            logger.error(f"{name}: {str(e)}")
+            failed = True
+            continue
+        logger.info(f"{name}: {stats['found']} links found, {stats['added']} placements added, "
+                    f"{stats['skipped']} duplicates skipped")
+    return 1 if failed else 0
+
+def dockets_command(args):
+    """Write local Word dockets, or create Google Doc dockets with --google."""
+    if args.google:
+        job = ConsoleJob('create_all_dockets', '.', _deadline(args))
+        get_job_handler('create_all_dockets')(job, {'max_workers': args.workers})
+        logger.info(job.message)
+        if job.result.get('sheet_url'):
+            logger.info(f"Summary spreadsheet: {job.result['sheet_url']}")
+        return 0 if job.result.get('success_count') or job.result.get('category') == 'info' else 1
+
+    query = MediaPlacement.query.order_by(MediaPlacement.id)
+    if args.ids:
+        query = query.filter(MediaPlacement.id.in_(args.ids))
+    placements = query.all()
+    if not placements:
+        logger.info("No media placements found.")
+        return 0
+
+    job = ConsoleJob('dockets', args.output_dir, _deadline(args))
+    job.update(progress=0, total=len(placements), message=f"Creating dockets for {len(placements)} placements...")
+    failed = 0
+    dockets = build_dockets(placements, args.output_dir, deadline=job.deadline, max_workers=args.workers)
+    for done, (placement, filename) in enumerate(dockets, start=1):
+        if filename is None:
+            logger.error(f"Could not create the docket for placement {placement.id}")
+            failed += 1
+        job.update(progress=done)
+    logger.info(f"{len(placements) - failed} dockets are in {args.output_dir}")
+    return 1 if failed else 0
+
+def export_command(args):
+    """Build the complete export package (spreadsheet, dockets and README) as a ZIP file."""
+    work_dir = args.work_dir or os.path.join(args.output_dir, '.export-work')
+    try:
+        claim_export_work_dir(work_dir)
+    except ValueError as e:
+        logger.error(f"{str(e)}; choose another --work-dir")
+        return 1
+    if os.path.isdir(os.path.join(work_dir, 'dockets')):
+        logger.info(f"Resuming export from the dockets in {work_dir}")
+
+    job = ConsoleJob('complete_export', args.output_dir, _deadline(args))
+    try:
+        get_job_handler('complete_export')(job, {'work_dir': work_dir, 'max_workers': args.workers})
+    except ValueError as e:
+        logger.error(f"{str(e)} (run again to resume from {work_dir})")
+        return 1
+    logger.info(job.message)
+    if job.artifact:
+        logger.info(f"Export package: {job.artifact[0]}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m mediaplacements', description=__doc__.split('\n\n')[1].strip())
+    parser.add_argument('--deadline', type=int, default=0,
+                        help='time budget in seconds; once spent, the rest is finished without fetching (default: none)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help='save placements for the links in files, Google Docs or Sheets')
+    ingest.add_argument('files', nargs='*', help=".csv, .xlsx, .docx or text files; '-' reads standard input")
+    ingest.add_argument('--gdoc', action='append', default=[], metavar='ID', help='Google Doc to read (repeatable)')
+    ingest.add_argument('--gsheet', action='append', default=[], metavar='ID', help='Google Sheet to read (repeatable)')
+    ingest.add_argument('--full-pages', action='store_true', help="download and store whole pages (METADATA_MODE='full')")
+    ingest.add_argument('--workers', type=int, help='concurrent page fetches (default: INGEST_MAX_WORKERS)')
+    ingest.add_argument('--per-host', type=int, help='concurrent fetches per host (default: INGEST_PER_HOST_LIMIT)')
+    ingest.set_defaults(func=ingest_command)
+
+    dockets = commands.add_parser('dockets', help='create a docket for each placement')
+    dockets.add_argument('--output-dir', default='dockets', help='where Word dockets are written (default: dockets)')
+    dockets.add_argument('--ids', type=int, nargs='+', help='only these placement ids')
+    dockets.add_argument('--google', action='store_true', help='create Google Doc dockets for placements without one')
+    dockets.add_argument('--workers', type=int, help='concurrent screenshots (default: SCREENSHOT_MAX_WORKERS)')
+    dockets.set_defaults(func=dockets_command)
+
+    export = commands.add_parser('export', help='build the complete ZIP export package')
+    export.add_argument('--output-dir', default='.', help='where the ZIP file is written (default: current directory)')
+    export.add_argument('--work-dir', help='dockets in progress, kept until the package is built (default: OUTPUT_DIR/.export-work)')
+    export.add_argument('--workers', type=int, help='concurrent screenshots (default: SCREENSHOT_MAX_WORKERS)')
+    export.set_defaults(func=export_command)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not initialize_database():
+        logger.error("Failed to initialize database. Exiting.")
+        return 1
+    with app.app_context():
+        try:
+            return args.func(args)
+        except KeyboardInterrupt:
+            logger.info("Interrupted; run the same command again to resume")
+            return 130
+
+if __name__ == '__main__':
+    sys.exit(main())
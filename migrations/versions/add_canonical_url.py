@@ -0,0 +1,67 @@
+"""Add canonical_url to MediaPlacement for duplicate detection
+
+Revision ID: add_canonical_url
+Revises: add_page_artifacts_table
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_canonical_url'
+down_revision = 'add_page_artifacts_table'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of utils.canonicalize_url as of this revision, so later changes
+# to it don't change what this migration does
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_hsenc', '_hsmi', 'cmpid', 'ocid', 'smid', 'ref', 'ref_src', 'sr_share'
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'pk_', 'itm_')
+
+
+def canonicalize_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    canonical = f"{parsed.netloc}{parsed.path}".rstrip('/').lower()
+    if canonical.startswith('www.'):
+        canonical = canonical[4:]
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    if params:
+        canonical += '?' + urlencode(params)
+    return canonical
+
+
+def upgrade():
+    op.add_column('media_placements', sa.Column('canonical_url', sa.String(length=512), nullable=True))
+
+    # Backfill from the stored URLs; existing duplicates keep a NULL canonical URL
+    connection = op.get_bind()
+    placements = sa.table('media_placements', sa.column('id', sa.Integer), sa.column('url', sa.String),
+                          sa.column('canonical_url', sa.String))
+    seen = set()
+    for placement_id, url in connection.execute(sa.select(placements.c.id, placements.c.url).order_by(placements.c.id)):
+        canonical = canonicalize_url(url)[:512]
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        connection.execute(placements.update().where(placements.c.id == placement_id).values(canonical_url=canonical))
+
+    op.create_index('ix_media_placements_canonical_url', 'media_placements', ['canonical_url'], unique=True)
+    op.create_index('ix_media_placements_url', 'media_placements', ['url'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_media_placements_url', table_name='media_placements')
+    op.drop_index('ix_media_placements_canonical_url', table_name='media_placements')
+    op.drop_column('media_placements', 'canonical_url')
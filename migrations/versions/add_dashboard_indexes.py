@@ -0,0 +1,28 @@
+"""Index the MediaPlacement columns the dashboard filters and sorts on
+
+Revision ID: add_dashboard_indexes
+Revises: add_canonical_url
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_dashboard_indexes'
+down_revision = 'add_canonical_url'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('created_at', 'publication_date', 'media_type', 'source', 'title')
+
+
+def upgrade():
+    for column in COLUMNS:
+        op.create_index(f'ix_media_placements_{column}', 'media_placements', [column], unique=False)
+
+
+def downgrade():
+    for column in reversed(COLUMNS):
+        op.drop_index(f'ix_media_placements_{column}', table_name='media_placements')
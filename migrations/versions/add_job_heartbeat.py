@@ -0,0 +1,24 @@
+"""Add a heartbeat to jobs so stale ones are told from long-running ones
+
+Revision ID: add_job_heartbeat
+Revises: recase_canonical_urls
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_job_heartbeat'
+down_revision = 'recase_canonical_urls'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('jobs', 'heartbeat_at')
@@ -0,0 +1,44 @@
+"""Add jobs table for background processing
+
+Revision ID: add_jobs_table
+Revises: add_docket_url
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_jobs_table'
+down_revision = 'add_docket_url'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('message', sa.String(length=256), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('artifact_path', sa.String(length=512), nullable=True),
+        sa.Column('artifact_name', sa.String(length=256), nullable=True),
+        sa.Column('artifact_mimetype', sa.String(length=128), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_jobs_status', 'jobs', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,39 @@
+"""Add page artifacts table for fetched page content
+
+Revision ID: add_page_artifacts_table
+Revises: add_jobs_table
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_page_artifacts_table'
+down_revision = 'add_jobs_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'page_artifacts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('placement_id', sa.Integer(), nullable=False),
+        sa.Column('final_url', sa.String(length=512), nullable=True),
+        sa.Column('title', sa.String(length=256), nullable=True),
+        sa.Column('publication_date', sa.Date(), nullable=True),
+        sa.Column('main_text', sa.Text(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['placement_id'], ['media_placements.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('placement_id')
+    )
+
+
+def downgrade():
+    op.drop_table('page_artifacts')
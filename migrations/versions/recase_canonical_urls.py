@@ -0,0 +1,107 @@
+"""Recompute canonical URLs keeping the case of their paths
+
+Revision ID: recase_canonical_urls
+Revises: add_dashboard_indexes
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from urllib.parse import urlparse, parse_qsl, urlencode
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'recase_canonical_urls'
+down_revision = 'add_dashboard_indexes'
+branch_labels = None
+depends_on = None
+
+# Frozen copies of utils.canonicalize_url before and after this revision, so
+# later changes to it don't change what this migration does
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_hsenc', '_hsmi', 'cmpid', 'ocid', 'smid', 'ref', 'ref_src', 'sr_share'
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'pk_', 'itm_')
+
+
+def _query(parsed):
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return '?' + urlencode(params) if params else ''
+
+
+def lowercased_canonical_url(url):
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    canonical = f"{parsed.netloc}{parsed.path}".rstrip('/').lower()
+    if canonical.startswith('www.'):
+        canonical = canonical[4:]
+    return canonical + _query(parsed)
+
+
+def canonicalize_url(url):
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return f"{host}{parsed.path}".rstrip('/') + _query(parsed)
+
+
+def upgrade():
+    connection = op.get_bind()
+    placements = sa.table('media_placements', sa.column('id', sa.Integer), sa.column('url', sa.String),
+                          sa.column('canonical_url', sa.String))
+    rows = connection.execute(sa.select(placements.c.id, placements.c.url, placements.c.canonical_url)
+                              .order_by(placements.c.id)).all()
+
+    # Canonical URLs derived from the placement's own URL get their path case
+    # back. Those taken from the page's canonical link can't be recovered and
+    # are kept. Only case changes, so no two rows end up with the same value.
+    taken = set()
+    for placement_id, url, canonical in rows:
+        if canonical is None:
+            continue
+        if canonical == lowercased_canonical_url(url)[:512]:
+            canonical = canonicalize_url(url)[:512]
+            connection.execute(placements.update().where(placements.c.id == placement_id)
+                               .values(canonical_url=canonical))
+        taken.add(canonical)
+
+    # Placements left without one as duplicates may be distinct now
+    for placement_id, url, canonical in rows:
+        if canonical is not None:
+            continue
+        canonical = canonicalize_url(url)[:512]
+        if canonical not in taken:
+            taken.add(canonical)
+            connection.execute(placements.update().where(placements.c.id == placement_id)
+                               .values(canonical_url=canonical))
+
+
+def downgrade():
+    connection = op.get_bind()
+    placements = sa.table('media_placements', sa.column('id', sa.Integer), sa.column('url', sa.String),
+                          sa.column('canonical_url', sa.String))
+    rows = connection.execute(sa.select(placements.c.id, placements.c.url, placements.c.canonical_url)
+                              .order_by(placements.c.id)).all()
+
+    # Back to lowercased paths; placements that would collide lose theirs, as in add_canonical_url
+    connection.execute(placements.update().values(canonical_url=None))
+    seen = set()
+    for placement_id, url, canonical in rows:
+        if canonical is None:
+            continue
+        if canonical == canonicalize_url(url)[:512]:
+            canonical = lowercased_canonical_url(url)[:512]
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        connection.execute(placements.update().where(placements.c.id == placement_id)
+                           .values(canonical_url=canonical))
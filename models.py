@@ -7,20 +7,39 @@ class MediaPlacement(db.Model):
     __tablename__ = 'media_placements'
     
     id = db.Column(db.Integer, primary_key=True)
-    url = db.Column(db.String(512), nullable=False)
-    title = db.Column(db.String(256), nullable=True)
-    source = db.Column(db.String(128), nullable=True)
-    publication_date = db.Column(db.Date, nullable=True)
-    media_type = db.Column(db.String(64), default='article')  # article, video, podcast, etc.
+    url = db.Column(db.String(512), nullable=False, index=True)
+    canonical_url = db.Column(db.String(512), nullable=True, unique=True, index=True)  # utils.canonicalize_url of the resolved page
+    title = db.Column(db.String(256), nullable=True, index=True)
+    source = db.Column(db.String(128), nullable=True, index=True)
+    publication_date = db.Column(db.Date, nullable=True, index=True)
+    media_type = db.Column(db.String(64), default='article', index=True)  # article, video, podcast, etc.
     notes = db.Column(db.Text, nullable=True)
     user_id = db.Column(db.Integer, nullable=True)  # Allow NULL for user_id now that we don't use authentication
     docket_url = db.Column(db.String(512), nullable=True)  # URL to the Google Doc docket
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    artifact = db.relationship('PageArtifact', backref='placement', uselist=False, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<MediaPlacement {self.title}>'
 
+class PageArtifact(db.Model):
+    __tablename__ = 'page_artifacts'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    placement_id = db.Column(db.Integer, db.ForeignKey('media_placements.id', ondelete='CASCADE'), nullable=False, unique=True)
+    final_url = db.Column(db.String(512), nullable=True)  # URL after redirects
+    title = db.Column(db.String(256), nullable=True)  # As found on the page
+    publication_date = db.Column(db.Date, nullable=True)
+    main_text = db.Column(db.Text, nullable=True)  # Cleaned article paragraphs
+    summary = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(16), nullable=False, default='ok')  # ok, error
+    error = db.Column(db.Text, nullable=True)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PageArtifact {self.placement_id} {self.status}>'
+
 class GoogleCredential(db.Model):
     __tablename__ = 'google_credentials'
     
@@ -35,3 +54,26 @@ class GoogleCredential(db.Model):
     
     def __repr__(self):
         return f'<GoogleCredential {self.id}>'
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)  # add_placement, docx_docket, complete_export, etc.
+    status = db.Column(db.String(16), nullable=False, default='queued', index=True)  # queued, running, finished, failed
+    payload = db.Column(db.Text, nullable=True)  # JSON-encoded handler arguments
+    result = db.Column(db.Text, nullable=True)  # JSON-encoded handler result
+    progress = db.Column(db.Integer, default=0)
+    total = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(256), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    artifact_path = db.Column(db.String(512), nullable=True)  # Finished file available for download
+    artifact_name = db.Column(db.String(256), nullable=True)
+    artifact_mimetype = db.Column(db.String(128), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)  # Refreshed by the worker while the job runs
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,116 @@
+"""
+Fetch-once page artifacts.
+
+A placement's page is downloaded and parsed a single time, by ``parsers.parse_page``,
+into its metadata, cleaned main text and summary. The result is stored
+as a ``PageArtifact`` row next to the placement so docket builders and
+exports read the summary from the database instead of re-fetching and
+re-parsing the HTML. Failed fetches are stored too and retried the next time
+the artifact is needed.
+"""
+
+import logging
+from datetime import datetime
+
+from config import Config
+from models import db, PageArtifact
+from parsers import parse_page, parse_media_links_batch
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SUMMARY_UNAVAILABLE = "Could not extract summary - please visit the URL directly."
+NO_TEXT = "No text content could be extracted from this page."
+
+def artifact_values(page):
+    """Column values of an artifact row for the output of ``parse_page``."""
+    return {
+        'final_url': (page.get('final_url') or '')[:512] or None,
+        'title': (page.get('title') or '')[:256] or None,
+        'publication_date': page.get('date'),
+        'main_text': page.get('main_text') or None,
+        'summary': page.get('summary') or None,
+        'status': 'error' if page.get('error') else 'ok',
+        'error': page.get('error'),
+        'fetched_at': datetime.utcnow()
+    }
+
+def apply_page(artifact, page):
+    """Copy the output of ``parse_page`` onto an artifact row."""
+    for column, value in artifact_values(page).items():
+        setattr(artifact, column, value)
+    return artifact
+
+def build_page_artifact(page):
+    """Create a new (unsaved) artifact from the output of ``parse_page``."""
+    return apply_page(PageArtifact(), page)
+
+def artifact_summary(artifact):
+    """Summary text to show in a docket for a stored artifact."""
+    if artifact is None or artifact.status != 'ok':
+        return SUMMARY_UNAVAILABLE
+    return artifact.summary or NO_TEXT
+
+def _needs_fetch(placement):
+    return placement.artifact is None or placement.artifact.status != 'ok'
+
+def get_page_artifact(placement, deadline=None):
+    """
+    Return the stored artifact for a placement, fetching the page only if needed.
+
+    Args:
+        placement (MediaPlacement): Placement whose page is needed.
+        deadline (Deadline, optional): Time budget; once spent, no fetch is attempted.
+
+    Returns:
+        PageArtifact: The stored (or newly fetched) artifact, or None if there
+        is none and no time left to fetch it.
+    """
+    if _needs_fetch(placement) and not (deadline is not None and deadline.expired):
+        page = parse_page(placement.url, deadline)
+        if placement.artifact is None:
+            placement.artifact = build_page_artifact(page)
+        else:
+            apply_page(placement.artifact, page)
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not save page artifact for {placement.url}: {str(e)}")
+    return placement.artifact
+
+def ensure_page_artifacts(placements, progress_callback=None, deadline=None):
+    """
+    Make sure every placement has a usable artifact before a batch of dockets.
+
+    Placements without one (e.g. added before artifacts existed, or whose
+    last fetch failed) are fetched concurrently with the ingestion limits,
+    for as long as ``deadline`` allows.
+    """
+    missing = [placement for placement in placements if _needs_fetch(placement)]
+    if not missing or (deadline is not None and deadline.expired):
+        return
+
+    urls = list(dict.fromkeys(placement.url for placement in missing))
+    pages = dict(parse_media_links_batch(
+        urls,
+        max_workers=Config.INGEST_MAX_WORKERS,
+        per_host_limit=Config.INGEST_PER_HOST_LIMIT,
+        progress_callback=progress_callback,
+        parse=parse_page,
+        deadline=deadline
+    ))
+
+    for placement in missing:
+        page = pages.get(placement.url)
+        if page is None:
+            continue
+        if placement.artifact is None:
+            placement.artifact = build_page_artifact(page)
+        else:
+            apply_page(placement.artifact, page)
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Could not save page artifacts: {str(e)}")
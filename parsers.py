@@ -1,156 +1,367 @@
 import re
-from urllib.parse import urlparse
-from datetime import datetime
-import requests
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup, SoupStrainer, FeatureNotFound
 import logging
 
+from config import Config
+from http_cache import cached_get, get_prefix
+from fetch_scheduler import get_fetch_scheduler, domain_key
+from utils import canonicalize_url
+from media_types import classify_media_type
+from date_parsing import find_publication_date
+
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# Characters allowed after the scheme of a URL (RFC 3986 unreserved, reserved and %)
+_URL_CHARS = r"-\w.~%!$&'()*+,;=:@/?#\[\]"
+# One character class and no nested repetition, so matching never backtracks
+_URL_PATTERN = re.compile(rf"https?://[{_URL_CHARS}]+", re.IGNORECASE)
+_URL_CHAR_SET = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_.~%!$&'()*+,;=:@/?#[]"
+)
+# Punctuation that ends a sentence rather than the URL it follows
+_TRAILING_PUNCTUATION = ".,;:!?'*"
+
+# Most text buffered between scans, and the longest run of URL characters held over between steps
+LINK_SCAN_CHUNK = 65536
+MAX_URL_LENGTH = 8192
+
+def _trim_url(url):
+    """Drop trailing punctuation and an unbalanced closing bracket picked up from prose."""
+    while url:
+        if url[-1] in _TRAILING_PUNCTUATION:
+            url = url[:-1]
+        elif url[-1] == ')' and url.count(')') > url.count('('):
+            url = url[:-1]
+        elif url[-1] == ']' and url.count(']') > url.count('['):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+def _url_tail_start(text):
+    """Index where the trailing run of URL characters in ``text`` begins (at most MAX_URL_LENGTH back)."""
+    start = len(text)
+    limit = max(0, len(text) - MAX_URL_LENGTH)
+    while start > limit and text[start - 1] in _URL_CHAR_SET:
+        start -= 1
+    return start
+
+def iter_links(chunks):
+    """
+    Yield the unique URLs in a stream of text, in the order they first appear.
+
+    ``chunks`` is any iterable of strings, e.g. a document's paragraphs or a
+    sheet's cells; a URL split across consecutive chunks is still found.
+    Text is scanned at the end of each line (so links are yielded while a
+    slow source is still being read) or every ``LINK_SCAN_CHUNK`` characters,
+    with a single-pass pattern. Time is linear in the size of the input and
+    memory is bounded by the scan size plus the links found. If reading
+    ``chunks`` fails, the links in the text read so far are still yielded
+    before the error is re-raised.
+
+    Args:
+        chunks (iterable): Pieces of text, in document order.
+
+    Yields:
+        str: Each distinct URL once.
+    """
+    seen = set()
+    pending = []
+    pending_size = 0
+
+    def scan(text):
+        for match in _URL_PATTERN.finditer(text):
+            url = _trim_url(match.group(0))
+            if len(url) > len('https://') and url not in seen:
+                seen.add(url)
+                yield url
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size < LINK_SCAN_CHUNK and not chunk.endswith('\n'):
+                continue
+            text = ''.join(pending)
+            # A URL running to the end of this piece may continue in the next chunk
+            cut = _url_tail_start(text)
+            yield from scan(text[:cut])
+            pending = [text[cut:]]
+            pending_size = len(pending[0])
+    except Exception:
+        yield from scan(''.join(pending))
+        raise
+
+    yield from scan(''.join(pending))
+
 def extract_links(text):
-    """Extract all URLs from text content."""
-    # More comprehensive URL regex pattern that properly handles file extensions like .cms
-    url_pattern = r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+(?:/(?:[-\w%.!$&\'()*+,;=:~]|(?:%[\da-fA-F]{2}))*)*(?:\?(?:[-\w%!$&\'()*+,;=:~]|(?:%[\da-fA-F]{2}))*)?(?:#(?:[-\w%!$&\'()*+,;=:~]|(?:%[\da-fA-F]{2}))*)?'    
-    # Clean and deduplicate links
-    unique_links = set()
-    for match in re.finditer(url_pattern, text):
-        url = match.group(0)
-        unique_links.add(url)
-    
-    return list(unique_links)
+    """Extract all unique URLs from text content, in the order they appear."""
+    return list(iter_links([text]))
+
+# Maximum characters of cleaned page text kept in a page artifact
+MAX_MAIN_TEXT_LENGTH = 100000
 
-def parse_media_links(url):
+def extract_main_text(soup, max_paragraphs=5, max_length=1000):
     """
-    Parse media links to extract metadata like title, source, publication date, etc.
-    Returns a dictionary with the extracted information.
+    Extract the cleaned main text and a short summary from a parsed page.
+
+    Args:
+        soup (BeautifulSoup): Parsed page.
+        max_paragraphs (int): Paragraphs used for the summary.
+        max_length (int): Maximum summary length in characters.
+
+    Returns:
+        tuple: ``(main_text, summary)``, both empty strings if the page has no text.
+    """
+    # Try to get the main article content, falling back to all paragraphs
+    article = soup.find('article') or soup.find(class_=['article', 'post', 'content', 'main-content'])
+    paragraphs = [p.get_text().strip() for p in (article or soup).find_all('p')]
+    paragraphs = [p for p in paragraphs if p]
+
+    main_text = '\n\n'.join(paragraphs)[:MAX_MAIN_TEXT_LENGTH]
+    summary = ' '.join(paragraphs[:max_paragraphs])
+    if len(summary) > max_length:
+        summary = summary[:max_length] + '...'
+    return main_text, summary
+
+# Elements the head-only metadata mode keeps from the page
+METADATA_STRAINER = SoupStrainer(['title', 'meta', 'link', 'h1', 'h2'])
+
+_HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r'charset=["\']?([\w-]+)', re.IGNORECASE)
+
+def read_head(chunks, body_prefix_bytes=16384, max_bytes=262144):
     """
+    Read byte chunks until ``</head>`` plus a bounded prefix of the body is in.
+
+    Args:
+        chunks (iterable): Byte chunks, e.g. ``response.iter_content()``.
+        body_prefix_bytes (int): Bytes kept after ``</head>``, for headings and visible dates.
+        max_bytes (int): Hard cap for pages whose head never ends.
+
+    Returns:
+        bytes: The page prefix. Reading stops as soon as it is complete.
+    """
+    buffer = bytearray()
+    head_end = None
+    for chunk in chunks:
+        # Re-scan a few bytes before the new chunk in case the tag straddles two chunks
+        scan_from = max(0, len(buffer) - 8)
+        buffer.extend(chunk)
+        if head_end is None:
+            match = _HEAD_END.search(buffer, scan_from)
+            if match:
+                head_end = match.end()
+        if head_end is not None and len(buffer) >= head_end + body_prefix_bytes:
+            break
+        if len(buffer) >= max_bytes:
+            break
+
+    limit = max_bytes if head_end is None else min(max_bytes, head_end + body_prefix_bytes)
+    return bytes(buffer[:limit])
+
+def decode_html(data, content_type=None):
+    """Decode page bytes using the declared charset, without content sniffing."""
+    match = _HEADER_CHARSET.search(content_type or '')
+    charset = match.group(1) if match else None
+    if not charset:
+        match = _META_CHARSET.search(data[:4096])
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return data.decode(charset, errors='replace')
+    except LookupError:
+        return data.decode('utf-8', errors='replace')
+
+def make_soup(markup, parse_only=None):
+    """Parse markup with lxml when it is installed, else the stdlib parser."""
+    try:
+        return BeautifulSoup(markup, 'lxml', parse_only=parse_only)
+    except FeatureNotFound:
+        return BeautifulSoup(markup, 'html.parser', parse_only=parse_only)
+
+def _new_result(url):
+    """Result skeleton with the fields that only depend on the URL."""
     result = {
         'title': '',
         'source': '',
         'date': None,
-        'type': 'article'
+        'type': 'article',
+        'final_url': url,
+        'canonical_url': canonicalize_url(url),
+        'main_text': '',
+        'summary': '',
+        'error': None
     }
     
+    # Get domain name for source
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    
+    result['source'] = domain
+    
+    # Identify media type from the host and path rules
+    result['type'] = classify_media_type(url)
+    return result
+
+def extract_metadata(soup, text, result):
+    """Fill ``result`` with the title and publication date found in a parsed page."""
+    # Try to get title from metadata first, then from title tag
+    title = None
+    meta_title = soup.find('meta', property='og:title') or soup.find('meta', attrs={'name': 'title'})
+    if meta_title:
+        title = meta_title.get('content')
+
+    if not title:
+        title_tag = soup.find('title')
+        if title_tag and title_tag.string:
+            title = title_tag.string.strip()
+
+    # Heuristic fallback: use first significant heading
+    if not title:
+        heading = soup.find(['h1', 'h2'])
+        if heading and heading.get_text(strip=True):
+            title = heading.get_text(strip=True)
+
+    if title:
+        result['title'] = title
+
+    # Canonical link, resolved against the final URL once the fetch is done
+    canonical_link = soup.find('link', rel='canonical')
+    if canonical_link and canonical_link.get('href'):
+        result['canonical_link'] = canonical_link['href'].strip()
+
+    # Publication date from meta tags, structured data or the page text
+    result['date'] = find_publication_date(soup, text, domain_key(result['final_url']))
+    return result
+
+def resolve_canonical_url(result):
+    """
+    Set ``result['canonical_url']`` from the page's final URL and ``rel=canonical`` link.
+
+    The canonical link is only trusted when it stays on the same site:
+    syndicated copies often point at the original publisher, which is a
+    different placement.
+    """
+    final_url = result['final_url']
+    canonical = urljoin(final_url, result.pop('canonical_link', None) or '')
+    if not canonical.startswith(('http://', 'https://')) or domain_key(canonical) != domain_key(final_url):
+        canonical = final_url
+    result['canonical_url'] = canonicalize_url(canonical)
+    return result
+
+def metadata_from_html(url, html, head_only=False):
+    """
+    Extract metadata from already downloaded page text.
+
+    With ``head_only`` only title, meta and heading elements are parsed, which
+    is what the streaming metadata mode does with its page prefix.
+    """
+    result = _new_result(url)
+    soup = make_soup(html, parse_only=METADATA_STRAINER) if head_only else BeautifulSoup(html, 'html.parser')
+    return resolve_canonical_url(extract_metadata(soup, html, result))
+
+def parse_media_links(url, deadline=None):
+    """
+    Parse media links to extract metadata like title, source, publication date, etc.
+    Returns a dictionary with the extracted information.
+
+    With ``METADATA_MODE = 'head'`` only the start of the page is downloaded;
+    ``'full'`` downloads and parses the whole page like ``parse_page``.
+    """
+    page = parse_page(url, deadline) if Config.METADATA_MODE == 'full' else parse_page_head(url, deadline)
+    return {key: page[key] for key in ('title', 'source', 'date', 'type', 'canonical_url')}
+
+def parse_page_head(url, deadline=None):
+    """
+    Stream just the head (plus a bounded body prefix) of a page for its metadata.
+
+    Returns the same fields as ``parse_page`` but without ``main_text`` and
+    ``summary``, which need the full body.
+    """
+    result = _new_result(url)
+    
     try:
-        # Get domain name for source
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        result['source'] = domain
+        response = get_prefix(
+            url,
+            lambda chunks: read_head(chunks, Config.METADATA_BODY_PREFIX_BYTES, Config.METADATA_MAX_BYTES),
+            timeout=5,
+            deadline=deadline
+        )
+        response.raise_for_status()
         
-        # Identify media type based on domain
-        if any(x in domain for x in ['youtube', 'vimeo', 'dailymotion']):
-            result['type'] = 'video'
-        elif any(x in domain for x in ['spotify', 'apple.com/podcast', 'soundcloud']):
-            result['type'] = 'podcast'
-        elif any(x in domain for x in ['twitter', 'facebook', 'instagram', 'linkedin']):
-            result['type'] = 'social'
-        
-        # Try to fetch the page and extract metadata
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            print(url,"url")
-            response = requests.get(url, headers=headers, timeout=5)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Try to get title from metadata first, then from title tag
-            title = None
-            meta_title = soup.find('meta', property='og:title') or soup.find('meta', attrs={'name': 'title'})
-            if meta_title:
-                title = meta_title.get('content')
-
-            if not title:
-                title_tag = soup.find('title')
-                if title_tag and title_tag.string:
-                    title = title_tag.string.strip()
-
-            # Heuristic fallback: use first significant heading
-            if not title:
-                heading = soup.find(['h1', 'h2'])
-                if heading and heading.get_text(strip=True):
-                    title = heading.get_text(strip=True)
-
-            if title:
-                result['title'] = title
-
-            print(title,"title",url)
-            # Try to get publication date
-            date = None
-            # Check various metadata tags for publication date
-            for meta_tag in soup.find_all('meta'):
-                if meta_tag.get('property') in ['article:published_time', 'og:published_time'] or \
-                   meta_tag.get('name') in ['pubdate', 'publishdate', 'date', 'DC.date.issued']:
-                    date_str = meta_tag.get('content')
-                    if date_str:
-                        try:
-                            date = parse_date_string(date_str)
-                            if date:
-                                result['date'] = date
-                                break
-                        except:
-                            continue
-            
-            # If no date found in metadata, try to find it in the content
-            if not result['date']:
-                # Look for common date patterns in the text
-                date_patterns = [
-                    r'(\d{4}-\d{2}-\d{2})',  # YYYY-MM-DD
-                    r'(\d{2}/\d{2}/\d{4})',  # MM/DD/YYYY
-                    r'([A-Z][a-z]+ \d{1,2}, \d{4})'  # Month DD, YYYY
-                ]
-                
-                for pattern in date_patterns:
-                    date_match = re.search(pattern, response.text)
-                    if date_match:
-                        try:
-                            date = parse_date_string(date_match.group(0))
-                            if date:
-                                result['date'] = date
-                                break
-                        except:
-                            continue
+        html = decode_html(response.content, response.headers.get('Content-Type'))
+        extract_metadata(make_soup(html, parse_only=METADATA_STRAINER), html, result)
+        result['final_url'] = response.url or url
+        resolve_canonical_url(result)
+    
+    except Exception as e:
+        logger.warning(f"Error fetching or parsing URL {url}: {str(e)}")
+        # If we can't fetch the page, just use what we have
+        result['error'] = str(e)
+    
+    return result
+
+def parse_page(url, deadline=None):
+    """
+    Fetch and parse a page once, producing everything later stages need.
+
+    Returns the metadata from ``parse_media_links`` plus ``final_url``,
+    ``main_text``, ``summary`` and ``error`` (None when the page was fetched
+    and parsed successfully).
+    """
+    result = _new_result(url)
+    
+    try:
+        response = cached_get(url, timeout=5, deadline=deadline)
+        response.raise_for_status()
         
-        except Exception as e:
-            logger.warning(f"Error fetching or parsing URL {url}: {str(e)}")
-            # If we can't fetch the page, just use what we have
-            pass
+        html = response.text
+        soup = BeautifulSoup(html, 'html.parser')
+        extract_metadata(soup, html, result)
         
-        return result
+        # Main text and summary for dockets, from the same parse
+        result['main_text'], result['summary'] = extract_main_text(soup)
+        result['final_url'] = response.url or url
+        resolve_canonical_url(result)
     
     except Exception as e:
-        logger.error(f"Unexpected error parsing media link {url}: {str(e)}")
-        return result
-
-def parse_date_string(date_str):
-    """
-    Try to parse a date string in various formats.
-    Returns a datetime.date object if successful, None otherwise.
-    """
-    formats = [
-        '%Y-%m-%d',
-        '%Y/%m/%d',
-        '%d/%m/%Y',
-        '%m/%d/%Y',
-        '%B %d, %Y',
-        '%b %d, %Y',
-        '%d %B %Y',
-        '%d %b %Y',
-        '%Y-%m-%dT%H:%M:%S',
-        '%Y-%m-%dT%H:%M:%SZ'
-    ]
+        logger.warning(f"Error fetching or parsing URL {url}: {str(e)}")
+        # If we can't fetch the page, just use what we have
+        result['error'] = str(e)
     
-    for fmt in formats:
-        try:
-            dt = datetime.strptime(date_str, fmt)
-            return dt.date()
-        except ValueError:
-            continue
-    
-    return None
+    return result
+
+def parse_media_links_batch(urls, max_workers=8, per_host_limit=2, progress_callback=None, parse=None, deadline=None):
+    """
+    Parse many media links concurrently.
+
+    Links are fetched on a bounded thread pool by the fetch scheduler, with at
+    most ``per_host_limit`` requests in flight against any single domain and
+    work handed out round-robin across domains, so a batch dominated by one
+    outlet doesn't starve the others. Each domain's request rate is limited
+    by the scheduler's token buckets.
+    If given, ``progress_callback(done, total)`` is called as links complete.
+    ``parse`` defaults to ``parse_media_links``; pass ``parse_page`` to get
+    full page artifacts from the same fetch. Once ``deadline`` runs out the
+    remaining links are not fetched and only get the fields derived from
+    their URL.
+    Returns a list of ``(url, metadata)`` tuples in the same order as ``urls``.
+    """
+    urls = list(urls)
+    parse = parse or parse_media_links
+
+    parsed = {}
+    for url, data, error in get_fetch_scheduler().map(
+            lambda url: parse(url, deadline=deadline), dict.fromkeys(urls), max_workers, per_host_limit, progress_callback):
+        if error:
+            logger.error(f"Unexpected error parsing media link {url}: {str(error)}")
+        parsed[url] = data
+
+    return [(url, parsed.get(url)) for url in urls]
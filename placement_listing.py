@@ -0,0 +1,164 @@
+"""
+Dashboard listing: filtering, sorting and keyset pagination in SQL.
+
+The dashboard shows one page of placements at a time. Filters (media type,
+source, when a placement was added, publication date range) and the sort
+order are applied by the database, and pages are fetched with a keyset
+cursor instead of ``OFFSET``: each page carries the sort value and id of its
+last row, and the next page starts right after it. With an index on the
+sort column that costs the same on page 500 as on page 1, and placements
+added or deleted meanwhile don't shift rows between pages.
+
+Cursors are opaque URL-safe strings; a malformed one starts from the first
+page.
+"""
+
+import json
+import base64
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer
+
+from config import Config
+from models import db, MediaPlacement
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Sort options: (column, descending); ties are broken by id in the same direction
+SORTS = {
+    'newest': (MediaPlacement.created_at, True),
+    'oldest': (MediaPlacement.created_at, False),
+    'published': (MediaPlacement.publication_date, True),
+    'title': (MediaPlacement.title, False)
+}
+DEFAULT_SORT = 'newest'
+
+# "Added" filter: how far back from now
+ADDED_RANGES = {
+    'today': None,  # since midnight
+    'week': timedelta(days=7),
+    'month': timedelta(days=30)
+}
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+def parse_filters(args):
+    """
+    Read the dashboard filters from request arguments, dropping empty and invalid ones.
+
+    Args:
+        args (MultiDict): ``request.args`` with any of ``type``, ``source``,
+            ``added`` (today/week/month), ``published_from`` and
+            ``published_to`` (YYYY-MM-DD).
+
+    Returns:
+        dict: The filters that apply.
+    """
+    filters = {}
+    for name in ('type', 'source'):
+        value = (args.get(name) or '').strip()
+        if value and value != 'all':
+            filters[name] = value
+    if args.get('added') in ADDED_RANGES:
+        filters['added'] = args['added']
+    for name in ('published_from', 'published_to'):
+        value = _parse_date(args.get(name))
+        if value:
+            filters[name] = value
+    return filters
+
+def filtered_query(filters):
+    """Placements query with ``filters`` (from ``parse_filters``) applied."""
+    query = MediaPlacement.query
+    if 'type' in filters:
+        query = query.filter(MediaPlacement.media_type == filters['type'])
+    if 'source' in filters:
+        query = query.filter(MediaPlacement.source == filters['source'])
+    if 'added' in filters:
+        now = datetime.utcnow()
+        span = ADDED_RANGES[filters['added']]
+        since = now.replace(hour=0, minute=0, second=0, microsecond=0) if span is None else now - span
+        query = query.filter(MediaPlacement.created_at >= since)
+    if 'published_from' in filters:
+        query = query.filter(MediaPlacement.publication_date >= filters['published_from'])
+    if 'published_to' in filters:
+        query = query.filter(MediaPlacement.publication_date <= filters['published_to'])
+    return query
+
+def _encode_cursor(value, placement_id):
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([value, placement_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _decode_cursor(cursor, column):
+    """``(sort value, id)`` from a cursor, or None if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, placement_id = json.loads(raw)
+        if value is not None:
+            if column is MediaPlacement.created_at:
+                value = datetime.fromisoformat(value)
+            elif column is MediaPlacement.publication_date:
+                value = date.fromisoformat(value)
+            elif not isinstance(value, str):
+                return None
+        return value, int(placement_id)
+    except (ValueError, TypeError):
+        logger.warning(f"Ignoring malformed dashboard cursor: {cursor[:64]}")
+        return None
+
+def _after(column, descending, value, placement_id):
+    """Rows that come after ``(value, placement_id)`` in the sort order, NULL values last."""
+    later_id = MediaPlacement.id < placement_id if descending else MediaPlacement.id > placement_id
+    if value is None:
+        return and_(column.is_(None), later_id)
+    beyond = column < value if descending else column > value
+    return or_(beyond, and_(column == value, later_id), column.is_(None))
+
+def list_placements(filters=None, sort=DEFAULT_SORT, cursor=None, limit=None):
+    """
+    Fetch one page of placements.
+
+    Args:
+        filters (dict, optional): From ``parse_filters``.
+        sort (str): A key of ``SORTS``; unknown values use the default.
+        cursor (str, optional): ``next_cursor`` of the previous page.
+        limit (int, optional): Page size, default ``DASHBOARD_PAGE_SIZE``.
+
+    Returns:
+        tuple: ``(placements, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    column, descending = SORTS.get(sort, SORTS[DEFAULT_SORT])
+    limit = limit or Config.DASHBOARD_PAGE_SIZE
+
+    # Notes can be long and aren't shown on the cards
+    query = filtered_query(filters or {}).options(defer(MediaPlacement.notes))
+    position = _decode_cursor(cursor, column) if cursor else None
+    if position:
+        query = query.filter(_after(column, descending, *position))
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), MediaPlacement.id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_last(), MediaPlacement.id.asc())
+
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(getattr(rows[-1], column.key), rows[-1].id)
+
+def filter_options():
+    """Distinct media types and sources for the filter dropdowns, read from their indexes."""
+    media_types = [value for (value,) in db.session.query(MediaPlacement.media_type).distinct()
+                   .order_by(MediaPlacement.media_type) if value]
+    sources = [value for (value,) in db.session.query(MediaPlacement.source).distinct()
+               .order_by(MediaPlacement.source).limit(Config.DASHBOARD_MAX_SOURCES) if value]
+    return media_types, sources
@@ -0,0 +1,185 @@
+"""
+Bulk persistence for media placements.
+
+Placements are written in fixed-size batches of plain rows instead of one ORM
+object per placement, so importing thousands of links keeps memory flat and
+spends a handful of round trips per batch:
+
+1. one indexed query for which canonical URLs in the batch already exist;
+2. one multi-row ``INSERT ... ON CONFLICT (canonical_url) DO NOTHING`` for
+   the new ones (a plain executemany ``INSERT`` on databases without
+   ``ON CONFLICT``), so a placement saved concurrently by another import is
+   skipped instead of failing the batch;
+3. optionally one executemany ``UPDATE`` refreshing the existing ones;
+4. one executemany insert (or upsert) of their page artifacts.
+
+Each batch is committed on its own, so a failure only loses the batch it
+happened in.
+"""
+
+import logging
+from datetime import datetime
+from sqlalchemy import insert, update
+
+from config import Config
+from models import db, MediaPlacement, PageArtifact
+from page_artifacts import artifact_values
+from utils import canonicalize_url
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Placement fields refreshed on existing rows with on_conflict='update'
+UPDATABLE_FIELDS = ('title', 'source', 'publication_date', 'media_type', 'notes')
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _dialect_insert(table):
+    """An INSERT supporting ON CONFLICT for this database, or None if it has none."""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(table)
+
+def _placement_row(row):
+    """Normalize an input row to ``media_placements`` column values."""
+    url = row['url'][:512]
+    return {
+        'url': url,
+        'canonical_url': (row.get('canonical_url') or canonicalize_url(url))[:512],
+        'title': (row.get('title') or '')[:256],
+        'source': (row.get('source') or '')[:128],
+        'publication_date': row.get('publication_date'),
+        'media_type': row.get('media_type') or 'article',
+        'notes': row.get('notes')
+    }
+
+def _insert_placements(rows):
+    """Insert new placement rows, skipping canonical URLs that appeared meanwhile. Returns {canonical: id}."""
+    table = MediaPlacement.__table__
+    now = datetime.utcnow()
+    for row in rows:
+        row['created_at'] = row['updated_at'] = now
+
+    stmt = _dialect_insert(table)
+    if stmt is not None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=['canonical_url'])
+        if db.engine.dialect.insert_executemany_returning:
+            result = db.session.execute(stmt.returning(table.c.id, table.c.canonical_url), rows)
+            return {canonical: placement_id for placement_id, canonical in result}
+    else:
+        stmt = insert(table)
+    db.session.execute(stmt, rows)
+    return dict(db.session.query(MediaPlacement.canonical_url, MediaPlacement.id).filter(
+        MediaPlacement.canonical_url.in_([row['canonical_url'] for row in rows])).all())
+
+def _update_placements(rows, existing):
+    """Refresh the non-empty fields of existing placements, one executemany per set of fields."""
+    now = datetime.utcnow()
+    groups = {}
+    for row in rows:
+        values = {field: row[field] for field in UPDATABLE_FIELDS if row.get(field) not in (None, '')}
+        values['id'] = existing[row['canonical_url']]
+        values['updated_at'] = now
+        groups.setdefault(tuple(sorted(values)), []).append(values)
+    for mappings in groups.values():
+        db.session.execute(update(MediaPlacement), mappings)
+
+def _save_artifacts(artifacts, replace):
+    """Insert artifact rows; with ``replace``, existing artifacts of those placements are overwritten."""
+    if not artifacts:
+        return
+    table = PageArtifact.__table__
+    if not replace:
+        db.session.execute(insert(table), artifacts)
+        return
+    stmt = _dialect_insert(table)
+    if stmt is not None:
+        columns = [column for column in artifacts[0] if column != 'placement_id']
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['placement_id'],
+            set_={column: stmt.excluded[column] for column in columns}
+        )
+        db.session.execute(stmt, artifacts)
+    else:
+        db.session.execute(table.delete().where(table.c.placement_id.in_([row['placement_id'] for row in artifacts])))
+        db.session.execute(insert(table), artifacts)
+
+def upsert_placements(rows, on_conflict='ignore', batch_size=None):
+    """
+    Save placements in bulk, keyed on their canonical URL.
+
+    Args:
+        rows (iterable): Dicts with ``url`` and optionally ``canonical_url``
+            (computed from ``url`` when missing), ``title``, ``source``,
+            ``publication_date``, ``media_type``, ``notes`` and ``page`` (the
+            output of ``parsers.parse_page``, stored as the page artifact).
+        on_conflict (str): ``'ignore'`` leaves placements that already exist
+            untouched; ``'update'`` refreshes their non-empty fields (and
+            their artifact, if a page is given).
+        batch_size (int, optional): Rows per batch and commit, default
+            ``PLACEMENT_WRITE_BATCH``.
+
+    Returns:
+        dict: Counts of placements ``inserted``, ``updated`` and ``skipped``
+        (duplicates that were left as they were).
+
+    Raises:
+        ValueError: If a batch can't be saved. Earlier batches stay committed.
+    """
+    if on_conflict not in ('ignore', 'update'):
+        raise ValueError(f"Unknown on_conflict mode: {on_conflict}")
+    batch_size = batch_size or Config.PLACEMENT_WRITE_BATCH
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+    for batch in _batches(rows, batch_size):
+        # Later repeats of a canonical URL within the batch are duplicates too
+        placements, pages = {}, {}
+        for row in batch:
+            values = _placement_row(row)
+            if values['canonical_url'] in placements:
+                counts['skipped'] += 1
+                continue
+            placements[values['canonical_url']] = values
+            if row.get('page'):
+                pages[values['canonical_url']] = row['page']
+
+        try:
+            existing = dict(db.session.query(MediaPlacement.canonical_url, MediaPlacement.id).filter(
+                MediaPlacement.canonical_url.in_(list(placements))).all())
+            new_rows = [values for canonical, values in placements.items() if canonical not in existing]
+            inserted = _insert_placements(new_rows) if new_rows else {}
+
+            artifacts = [dict(artifact_values(pages[canonical]), placement_id=placement_id)
+                         for canonical, placement_id in inserted.items() if canonical in pages]
+            _save_artifacts(artifacts, replace=False)
+
+            if on_conflict == 'update' and existing:
+                _update_placements([values for canonical, values in placements.items() if canonical in existing], existing)
+                _save_artifacts([dict(artifact_values(pages[canonical]), placement_id=placement_id)
+                                 for canonical, placement_id in existing.items() if canonical in pages], replace=True)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Database error when saving placements: {str(e)}")
+            raise ValueError(f'Error saving to database: {str(e)}')
+
+        counts['inserted'] += len(inserted)
+        if on_conflict == 'update':
+            counts['updated'] += len(existing)
+            counts['skipped'] += len(new_rows) - len(inserted)
+        else:
+            counts['skipped'] += len(existing) + len(new_rows) - len(inserted)
+    return counts
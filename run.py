@@ -11,6 +11,7 @@ import sys
 import logging
 from app import app, db
 from models import MediaPlacement, GoogleCredential
+from jobs import start_worker_threads
 
 # Configure logging
 logging.basicConfig(
@@ -67,6 +68,12 @@ def run_application():
         # Determine if debug mode should be enabled
         debug = os.environ.get('FLASK_DEBUG', 'true').lower() == 'true'
         
+        # Start in-process job workers (only in the reloader child when debugging)
+        inline_workers = app.config['JOB_INLINE_WORKERS']
+        if inline_workers > 0 and (not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+            start_worker_threads(app, inline_workers)
+            logger.info(f"Started {inline_workers} in-process job worker(s)")
+        
         # Start the Flask app
         logger.info(f"Starting Media Placements Tracker on {host}:{port} (Debug: {debug})")
         app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,256 @@
+"""
+Screenshot engines behind ``utils.take_screenshot``.
+
+``SCREENSHOT_BACKEND`` selects the engine:
+
+- ``selenium``: one warm Chromium per pooled session, one page at a time per
+  browser. Batches scale out through the process-based screenshot farm.
+- ``playwright``: a single Chromium driven from an asyncio event loop, with
+  every capture in its own browser context. Many pages load concurrently in
+  one browser process, which is far cheaper in CPU and memory than a
+  Selenium browser per URL.
+
+Both apply the resource blocking profile from ``capture_profiles`` and wait
+for the domain's request slot from ``fetch_scheduler`` before loading a page.
+Every wait in a capture (request slot, browser session, page load, settling)
+is cut to what is left of the caller's ``Deadline``, and ``DeadlineExceeded``
+is raised if the budget runs out before the page could be loaded.
+Backends return ``(png_bytes, complete)`` where ``complete`` is False when the
+page failed to load and only partial content was captured.
+"""
+
+import os
+import time
+import atexit
+import asyncio
+import concurrent.futures
+import threading
+import logging
+
+from config import Config
+from utils import screenshot_viewport, screenshot_options, wait_for_page_ready
+from capture_profiles import blocked_classes, blocked_url_patterns, should_block
+from fetch_scheduler import get_fetch_scheduler
+from deadline import Deadline, DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Seconds a capture may take beyond its page load and settle waits (browser start, screenshot)
+CAPTURE_OVERHEAD = 15
+
+_backend = None
+_backend_lock = threading.Lock()
+
+class ScreenshotBackend:
+    """Interface for screenshot engines."""
+
+    name = None
+    # Whether capture_many runs pages concurrently within this process
+    concurrent = False
+
+    def capture(self, url, timeout, deadline=None):
+        """
+        Capture ``url``. Returns ``(png_bytes, complete)``; raises if no image could be taken.
+
+        ``timeout`` bounds the page load; ``deadline`` bounds the whole capture,
+        including waits for a request slot and a browser.
+        """
+        raise NotImplementedError
+
+    def capture_many(self, urls, timeout, deadline=None):
+        """Yield ``(url, png_bytes, complete)`` as captures finish.
+
+        Each page load gets at most what is left of ``deadline``; once it is
+        spent the remaining URLs are yielded without being loaded.
+        """
+        for url in urls:
+            try:
+                png, complete = self.capture(url, deadline.timeout(timeout) if deadline else timeout, deadline)
+            except DeadlineExceeded:
+                png, complete = None, False
+            except Exception as e:
+                logger.error(f"Error capturing screenshot of {url}: {str(e)}")
+                png, complete = None, False
+            yield url, png, complete
+
+    def shutdown(self):
+        pass
+
+class SeleniumBackend(ScreenshotBackend):
+    """Synchronous capture on a warm browser borrowed from the browser pool."""
+
+    name = 'selenium'
+
+    def capture(self, url, timeout, deadline=None):
+        from browser_pool import get_browser_pool
+
+        deadline = deadline or Deadline()
+        options = screenshot_options()
+        get_fetch_scheduler().acquire(url, deadline)
+        with get_browser_pool().driver(deadline) as driver:
+            # Whatever the waits for a slot and a browser left of the budget
+            driver.set_page_load_timeout(deadline.timeout(timeout))
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_url_patterns(url, options['profile'])})
+
+            try:
+                driver.get(url)
+                if options['wait'] == 'fixed':
+                    time.sleep(deadline.clamp(Config.SCREENSHOT_FIXED_WAIT))
+                elif not wait_for_page_ready(driver, deadline.clamp(Config.SCREENSHOT_READY_TIMEOUT),
+                                             Config.SCREENSHOT_IDLE_MS):
+                    logger.warning(f"Page did not settle before the deadline: {url}")
+                driver.execute_script(f"window.scrollTo(0, {options['scroll_y']})")
+                complete = True
+            except Exception as e:
+                # Fall through and capture whatever partial content loaded
+                logger.warning(f"Timed out or error loading page {url}: {str(e)}")
+                complete = False
+
+            return driver.get_screenshot_as_png(), complete
+
+class PlaywrightBackend(ScreenshotBackend):
+    """Concurrent capture in one Chromium using asyncio Playwright.
+
+    The event loop runs on a dedicated daemon thread so synchronous callers
+    (request handlers, job workers) can submit captures from any thread.
+    """
+
+    name = 'playwright'
+    concurrent = True
+
+    def __init__(self, max_pages):
+        self.max_pages = max(1, max_pages)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='playwright-loop', daemon=True)
+        self._thread.start()
+        self._playwright = None
+        self._browser = None
+        self._start_lock = None
+        self._pages = None
+
+    async def _ensure_browser(self):
+        from playwright.async_api import async_playwright
+
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+            self._pages = asyncio.Semaphore(self.max_pages)
+
+        async with self._start_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                # Prefer the system Chromium (as installed in the Docker image)
+                executable = Config.CHROME_BINARY if os.path.exists(Config.CHROME_BINARY) else None
+                started = time.monotonic()
+                self._browser = await self._playwright.chromium.launch(
+                    executable_path=executable,
+                    args=['--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu']
+                )
+                logger.info(f"Started Playwright browser in {time.monotonic() - started:.1f}s")
+            return self._browser
+
+    async def _capture(self, url, timeout, deadline):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        browser = await self._ensure_browser()
+        width, height = screenshot_viewport()
+        options = screenshot_options()
+
+        async with self._pages:
+            # Whatever the waits for the browser and a free page left of the budget
+            timeout = deadline.timeout(timeout)
+            # A fresh context per capture: no cookies or storage shared between pages
+            context = await browser.new_context(viewport={'width': width, 'height': height})
+            try:
+                classes = blocked_classes(url, options['profile'])
+                if classes:
+                    async def route_request(route):
+                        request = route.request
+                        if should_block(request.url, request.resource_type, url, classes):
+                            await route.abort()
+                        else:
+                            await route.continue_()
+                    await context.route('**/*', route_request)
+                page = await context.new_page()
+                try:
+                    response = await page.goto(url, wait_until='domcontentloaded', timeout=timeout * 1000)
+                    if response is not None:
+                        # Rate limited: pause further requests to this domain
+                        get_fetch_scheduler().backoff_from_response(url, response.status, response.headers)
+                    if options['wait'] == 'fixed':
+                        await page.wait_for_timeout(deadline.clamp(Config.SCREENSHOT_FIXED_WAIT) * 1000)
+                    else:
+                        # A Playwright timeout of 0 means no limit, so keep at least a millisecond
+                        settle = max(deadline.clamp(Config.SCREENSHOT_READY_TIMEOUT), 0.001)
+                        try:
+                            await page.wait_for_load_state('networkidle', timeout=settle * 1000)
+                        except PlaywrightTimeoutError:
+                            logger.warning(f"Page did not settle before the deadline: {url}")
+                    await page.evaluate(f"window.scrollTo(0, {options['scroll_y']})")
+                    complete = True
+                except Exception as e:
+                    # Fall through and capture whatever partial content loaded
+                    logger.warning(f"Timed out or error loading page {url}: {str(e)}")
+                    complete = False
+
+                return await page.screenshot(), complete
+            finally:
+                await context.close()
+
+    def _submit(self, url, timeout, deadline):
+        return asyncio.run_coroutine_threadsafe(self._capture(url, timeout, deadline), self._loop)
+
+    def capture(self, url, timeout, deadline=None):
+        deadline = deadline or Deadline()
+        get_fetch_scheduler().acquire(url, deadline)
+        settle = Config.SCREENSHOT_FIXED_WAIT if screenshot_options()['wait'] == 'fixed' else Config.SCREENSHOT_READY_TIMEOUT
+        limit = deadline.clamp(timeout + settle + CAPTURE_OVERHEAD)
+        future = self._submit(url, timeout, deadline)
+        try:
+            return future.result(timeout=limit)
+        except concurrent.futures.TimeoutError:
+            # Cancels the capture task; its browser context is closed on the way out
+            future.cancel()
+            if deadline.expired:
+                raise DeadlineExceeded(f"No time left to capture {url}")
+            raise TimeoutError(f"Capture of {url} did not finish within {limit:.0f}s")
+
+    def capture_many(self, urls, timeout, deadline=None):
+        # Pages are dispatched fairly across domains; each waits for its domain's rate limit
+        for url, result, error in get_fetch_scheduler().map(
+                lambda url: self.capture(url, deadline.timeout(timeout) if deadline else timeout, deadline),
+                urls, self.max_pages, Config.SCREENSHOT_PER_HOST_LIMIT):
+            if error:
+                if not isinstance(error, DeadlineExceeded):
+                    logger.error(f"Error capturing screenshot of {url}: {str(error)}")
+                result = (None, False)
+            yield (url,) + tuple(result)
+
+    async def _close(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def shutdown(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Error shutting down Playwright: {str(e)}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+def get_screenshot_backend():
+    """Return the configured process-wide screenshot backend."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if Config.SCREENSHOT_BACKEND == 'playwright':
+                _backend = PlaywrightBackend(Config.PLAYWRIGHT_MAX_PAGES)
+            elif Config.SCREENSHOT_BACKEND == 'selenium':
+                _backend = SeleniumBackend()
+            else:
+                raise ValueError(f"Unknown screenshot backend: {Config.SCREENSHOT_BACKEND}")
+            atexit.register(_backend.shutdown)
+        return _backend
@@ -0,0 +1,64 @@
+"""
+On-disk store of captured screenshots.
+
+Screenshots are keyed by the canonical URL (``utils.canonicalize_url``, which
+keeps query parameters that identify the page, as the HTTP cache does), the
+viewport and the capture options, so a change to how pages are captured never
+serves an image taken differently. Entries stay fresh for
+``SCREENSHOT_CACHE_TTL`` seconds and the store is kept under
+``SCREENSHOT_CACHE_MAX_BYTES`` by evicting the least recently used images.
+"""
+
+import json
+import time
+import threading
+
+from config import Config
+from disk_cache import DiskCache
+from utils import canonicalize_url
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_screenshot_cache():
+    """Return the process-wide screenshot store, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(Config.SCREENSHOT_CACHE_DIR, Config.SCREENSHOT_CACHE_MAX_BYTES, data_suffix='.img')
+        return _cache
+
+def screenshot_key(url, viewport, options=None):
+    """Cache key for a capture of ``url`` at ``viewport`` with ``options``."""
+    return '|'.join([
+        canonicalize_url(url),
+        f'{viewport[0]}x{viewport[1]}',
+        json.dumps(options or {}, sort_keys=True)
+    ])
+
+def get_cached_screenshot(url, viewport, options=None, ttl=None):
+    """Return fresh cached image bytes for the capture, or None."""
+    if not Config.SCREENSHOT_CACHE_ENABLED:
+        return None
+
+    entry = get_screenshot_cache().get(screenshot_key(url, viewport, options))
+    if not entry:
+        return None
+
+    data, meta = entry
+    ttl = Config.SCREENSHOT_CACHE_TTL if ttl is None else ttl
+    if time.time() - meta.get('captured_at', 0) >= ttl:
+        return None
+    return data
+
+def store_screenshot(url, viewport, options, data):
+    """Save captured image bytes for later reuse."""
+    if not Config.SCREENSHOT_CACHE_ENABLED or not data:
+        return
+
+    get_screenshot_cache().set(screenshot_key(url, viewport, options), data, {
+        'url': url,
+        'viewport': list(viewport),
+        'options': options or {},
+        'captured_at': time.time()
+    })
@@ -0,0 +1,155 @@
+"""
+Concurrent screenshot capture across worker processes.
+
+With the Selenium backend each worker process keeps its own warm browser from
+the pool, so the number of workers is bounded by memory rather than CPU: it
+is derived from the headroom left under the container's cgroup limit (or the
+host's available memory) divided by the expected footprint of one Chromium
+instance. On a 512 MB container this comes out at one worker and captures run
+in-process; bigger hosts scale up automatically. Backends that already
+capture concurrently in-process (Playwright) are used directly instead.
+Either way pages are dispatched through the fetch scheduler, so each domain
+stays under its request rate and per-host page limit.
+"""
+
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import Config
+from utils import take_screenshot, screenshot_viewport, screenshot_options
+from screenshot_cache import get_cached_screenshot, store_screenshot
+from screenshot_backends import get_screenshot_backend
+from fetch_scheduler import get_fetch_scheduler
+from failure_cache import known_failure, record_failure, record_success
+from deadline import Deadline, DeadlineExceeded
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+def available_memory_bytes():
+    """Memory this process can still use, honouring cgroup (container) limits."""
+    available = None
+
+    # Host view: MemAvailable from /proc/meminfo
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    available = int(line.split()[1]) * 1024
+                    break
+    except OSError:
+        pass
+
+    # Container view: cgroup v2, then v1. "max" / huge values mean unlimited.
+    for limit_path, usage_path in (
+        ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+        ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes'),
+    ):
+        limit = _read_int(limit_path)
+        if limit is None or limit >= 1 << 60:
+            continue
+        usage = _read_int(usage_path) or 0
+        headroom = max(0, limit - usage)
+        available = headroom if available is None else min(available, headroom)
+        break
+
+    return available
+
+def screenshot_concurrency(max_workers=None):
+    """Number of browsers that fit in the memory currently available, at most ``max_workers``."""
+    max_workers = max(1, max_workers or Config.SCREENSHOT_MAX_WORKERS)
+    available = available_memory_bytes()
+    if available is None:
+        return 1
+
+    per_browser = Config.SCREENSHOT_BROWSER_MEMORY_MB * 1024 * 1024
+    reserve = Config.SCREENSHOT_MEMORY_RESERVE_MB * 1024 * 1024
+    fits = (available - reserve) // per_browser
+    return int(max(1, min(max_workers, fits, os.cpu_count() or 1)))
+
+def _capture(url, timeout, budget=None):
+    """Worker-process entry point. ``budget`` is the seconds left of the caller's deadline."""
+    deadline = Deadline(budget) if budget else None
+    return url, take_screenshot(url, timeout=timeout, use_cache=False, deadline=deadline)
+
+def capture_many(urls, timeout=15, max_workers=None, deadline=None):
+    """
+    Capture screenshots of many URLs concurrently.
+
+    Yields ``(url, png_bytes)`` tuples as captures finish (not in input order),
+    so callers can start building dockets while other pages are still
+    loading. ``png_bytes`` is None when a page could not be captured.
+    Duplicate URLs are captured once, and pages with a fresh entry in the
+    screenshot cache are served from it without starting any browser. Pages
+    that recently failed, or whose domain's circuit is open, yield None
+    straight away, as does every page still waiting once ``deadline`` is spent.
+    ``max_workers`` caps the worker processes instead of
+    ``SCREENSHOT_MAX_WORKERS``; available memory still limits them.
+    """
+    urls = list(dict.fromkeys(urls))
+
+    # Serve fresh cached captures first; only the misses need a browser
+    viewport, options = screenshot_viewport(), screenshot_options()
+    misses = []
+    for url in urls:
+        cached = get_cached_screenshot(url, viewport, options)
+        if cached is not None:
+            yield url, cached
+        elif known_failure('screenshot', url):
+            # Known-bad page or tripped domain: go straight to the fallback
+            yield url, None
+        else:
+            misses.append(url)
+    urls = misses
+    if not urls:
+        return
+
+    backend = get_screenshot_backend()
+    if backend.concurrent:
+        # The backend loads many pages at once inside a single browser
+        for url, png, complete in backend.capture_many(urls, timeout, deadline):
+            if complete:
+                store_screenshot(url, viewport, options, png)
+                record_success('screenshot', url)
+            elif deadline is None or deadline.remaining() is None or deadline.remaining() >= timeout:
+                # Only blame the page if it had its full timeout
+                record_failure('screenshot', url, 'Page did not finish loading' if png else 'Capture failed')
+            yield url, png
+        return
+
+    scheduler = get_fetch_scheduler()
+    workers = min(screenshot_concurrency(max_workers), len(urls))
+    if workers <= 1:
+        # Not worth a process pool; reuse this process's warm browser
+        for url, png, error in scheduler.map(
+                lambda url: take_screenshot(url, timeout=timeout, use_cache=False, deadline=deadline),
+                urls, 1, Config.SCREENSHOT_PER_HOST_LIMIT):
+            yield url, png
+        return
+
+    logger.info(f"Capturing {len(urls)} screenshots with {workers} worker processes")
+    # Spawned (not forked) workers: the parent may hold DB connections and threads
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        def capture(url):
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded(f"No time left to capture {url}")
+            # Rate limits are enforced here, in the parent, across all worker processes
+            scheduler.acquire(url, deadline)
+            budget = deadline.remaining() if deadline is not None else None
+            return executor.submit(_capture, url, timeout, budget).result()[1]
+
+        for url, png, error in scheduler.map(capture, urls, workers, Config.SCREENSHOT_PER_HOST_LIMIT):
+            if error and not isinstance(error, DeadlineExceeded):
+                logger.error(f"Screenshot worker failed for {url}: {str(error)}")
+            yield url, png
@@ -16,180 +16,121 @@ document.addEventListener('DOMContentLoaded', function() {
 });
 
 /**
- * Initialize filtering functionality for placements
+ * Initialize the filter form. Filtering, sorting and paging happen on the
+ * server, so any change reloads the dashboard with the new query.
  */
 function initializeFilters() {
     const filterForm = document.getElementById('filter-form');
     if (!filterForm) return;
     
-    // Handle filter form submission
-    filterForm.addEventListener('submit', function(e) {
-        e.preventDefault();
-        
-        const filterType = document.getElementById('filter-type').value;
-        const filterSource = document.getElementById('filter-source').value;
-        const filterDate = document.getElementById('filter-date').value;
-        
-        // Apply filters to the placement cards
-        const placementCards = document.querySelectorAll('.placement-card');
-        placementCards.forEach(function(card) {
-            let showCard = true;
-            
-            // Filter by media type
-            if (filterType && filterType !== 'all') {
-                const cardType = card.getAttribute('data-type');
-                if (cardType !== filterType) {
-                    showCard = false;
-                }
-            }
-            
-            // Filter by source
-            if (filterSource && filterSource !== 'all') {
-                const cardSource = card.getAttribute('data-source');
-                if (cardSource !== filterSource) {
-                    showCard = false;
-                }
-            }
-            
-            // Filter by date range
-            if (filterDate && filterDate !== 'all') {
-                const cardDate = new Date(card.getAttribute('data-date'));
-                const now = new Date();
-                
-                if (filterDate === 'today') {
-                    const today = new Date();
-                    today.setHours(0, 0, 0, 0);
-                    if (cardDate < today) {
-                        showCard = false;
-                    }
-                } else if (filterDate === 'week') {
-                    const weekAgo = new Date();
-                    weekAgo.setDate(weekAgo.getDate() - 7);
-                    if (cardDate < weekAgo) {
-                        showCard = false;
-                    }
-                } else if (filterDate === 'month') {
-                    const monthAgo = new Date();
-                    monthAgo.setMonth(monthAgo.getMonth() - 1);
-                    if (cardDate < monthAgo) {
-                        showCard = false;
-                    }
-                }
-            }
-            
-            // Show or hide card based on filter results
-            card.style.display = showCard ? 'block' : 'none';
+    // Apply filters as soon as they change
+    filterForm.querySelectorAll('select, input').forEach(function(field) {
+        field.addEventListener('change', function() {
+            filterForm.requestSubmit();
         });
-        
-        // Update filtered count
-        updateFilteredCount();
     });
     
-    // Handle filter reset
-    const resetFilterBtn = document.getElementById('reset-filter');
-    if (resetFilterBtn) {
-        resetFilterBtn.addEventListener('click', function() {
-            filterForm.reset();
-            
-            // Show all placement cards
-            const placementCards = document.querySelectorAll('.placement-card');
-            placementCards.forEach(function(card) {
-                card.style.display = 'block';
-            });
-            
-            // Update filtered count
-            updateFilteredCount();
+    // Leave unset filters out of the URL
+    filterForm.addEventListener('submit', function() {
+        filterForm.querySelectorAll('select, input').forEach(function(field) {
+            if (!field.value || field.value === 'all') {
+                field.disabled = true;
+            }
         });
-    }
-    
-    // Populate unique sources for filter dropdown
-    populateSourcesDropdown();
-}
-
-/**
- * Populate the sources dropdown with unique values from the placement cards
- */
-function populateSourcesDropdown() {
-    const sourceSelect = document.getElementById('filter-source');
-    if (!sourceSelect) return;
-    
-    const sources = new Set();
-    
-    // Collect all unique sources from placement cards
-    document.querySelectorAll('.placement-card').forEach(function(card) {
-        const source = card.getAttribute('data-source');
-        if (source) {
-            sources.add(source);
-        }
     });
     
-    // Add options to the dropdown
-    sources.forEach(function(source) {
-        const option = document.createElement('option');
-        option.value = source;
-        option.textContent = source;
-        sourceSelect.appendChild(option);
-    });
+    initializeLoadMore();
 }
 
 /**
- * Update the filtered count display
+ * "Load more" fetches the next page of cards from the server and appends
+ * it, following the keyset cursor returned with each page.
  */
-function updateFilteredCount() {
-    const countElement = document.getElementById('filtered-count');
-    if (!countElement) return;
-    
-    const visibleCards = document.querySelectorAll('.placement-card[style="display: block;"], .placement-card:not([style*="display"])').length;
-    const totalCards = document.querySelectorAll('.placement-card').length;
+function initializeLoadMore() {
+    const loadMore = document.getElementById('load-more');
+    const list = document.getElementById('placement-list');
+    if (!loadMore || !list) return;
     
-    countElement.textContent = `Showing ${visibleCards} of ${totalCards} placements`;
+    loadMore.addEventListener('click', function(e) {
+        e.preventDefault();
+        if (loadMore.classList.contains('disabled')) return;
+        loadMore.classList.add('disabled');
+        
+        const url = new URL(loadMore.href, window.location.href);
+        url.searchParams.set('partial', '1');
+        
+        fetch(url)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                const nextCursor = response.headers.get('X-Next-Cursor');
+                return response.text().then(html => ({ html, nextCursor }));
+            })
+            .then(({ html, nextCursor }) => {
+                list.insertAdjacentHTML('beforeend', html);
+                feather.replace();
+                updateTimestamps();
+                
+                if (nextCursor) {
+                    url.searchParams.delete('partial');
+                    url.searchParams.set('cursor', nextCursor);
+                    loadMore.href = url.toString();
+                    loadMore.classList.remove('disabled');
+                } else {
+                    loadMore.remove();
+                }
+            })
+            .catch(err => {
+                console.error('Failed to load more placements: ', err);
+                // Fall back to opening the next page
+                window.location.href = loadMore.href;
+            });
+    });
 }
 
 /**
  * Initialize card interactions (hover effects, click actions)
  */
 function initializeCardInteractions() {
-    const placementCards = document.querySelectorAll('.card-hover');
-    
-    placementCards.forEach(function(card) {
+    // Delegated, so cards added by "Load more" behave the same
+    document.addEventListener('click', function(e) {
         // Add click event for the whole card to navigate to detail view
         // but not if clicking on buttons or links within the card
-        card.addEventListener('click', function(e) {
-            if (!e.target.closest('a, button, .dropdown-menu')) {
-                const detailUrl = this.getAttribute('data-detail-url');
-                if (detailUrl) {
-                    window.location.href = detailUrl;
-                }
+        const card = e.target.closest('.card-hover');
+        if (card && !e.target.closest('a, button, .dropdown-menu')) {
+            const detailUrl = card.getAttribute('data-detail-url');
+            if (detailUrl) {
+                window.location.href = detailUrl;
             }
-        });
+        }
     });
     
-    // Initialize any dropdowns or interactive elements within cards
-    const copyLinkBtns = document.querySelectorAll('.copy-link-btn');
-    copyLinkBtns.forEach(function(btn) {
-        btn.addEventListener('click', function(e) {
-            e.preventDefault();
-            e.stopPropagation();
-            
-            const url = this.getAttribute('data-url');
-            copyToClipboard(url)
-                .then(() => {
-                    // Show success feedback
-                    const originalText = this.innerHTML;
-                    this.innerHTML = '<i data-feather="check"></i> Copied!';
+    // Copy buttons within cards
+    document.addEventListener('click', function(e) {
+        const btn = e.target.closest('.copy-link-btn');
+        if (!btn) return;
+        e.preventDefault();
+        e.stopPropagation();
+        
+        const url = btn.getAttribute('data-url');
+        copyToClipboard(url)
+            .then(() => {
+                // Show success feedback
+                const originalText = btn.innerHTML;
+                btn.innerHTML = '<i data-feather="check"></i> Copied!';
+                feather.replace();
+                
+                // Reset button text after 2 seconds
+                setTimeout(() => {
+                    btn.innerHTML = originalText;
                     feather.replace();
-                    
-                    // Reset button text after 2 seconds
-                    setTimeout(() => {
-                        this.innerHTML = originalText;
-                        feather.replace();
-                    }, 2000);
-                })
-                .catch(err => {
-                    console.error('Failed to copy: ', err);
-                    alert('Failed to copy link to clipboard');
-                });
-        });
+                }, 2000);
+            })
+            .catch(err => {
+                console.error('Failed to copy: ', err);
+                alert('Failed to copy link to clipboard');
+            });
     });
 }
 
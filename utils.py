@@ -3,9 +3,12 @@ import logging
 from logging.handlers import RotatingFileHandler
 import re
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qsl, urlencode
 import tempfile
 
+# Set up logging
+logger = logging.getLogger(__name__)
+
 def setup_logging(app):
     """Configure logging for the application."""
     if not os.path.exists('logs'):
@@ -33,6 +36,46 @@ def clean_url(url):
     
     return cleaned_url
 
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_hsenc', '_hsmi', 'cmpid', 'ocid', 'smid', 'ref', 'ref_src', 'sr_share'
+}
+TRACKING_PARAM_PREFIXES = ('utm_', 'pk_', 'itm_')
+
+def canonicalize_url(url):
+    """
+    Canonical form of a URL, used to recognize the same article pasted twice.
+
+    Drops the scheme, fragment, trailing slash, a leading ``www.`` and
+    tracking parameters, and lowercases the host. The path keeps its case,
+    since article IDs and short links are often case-sensitive
+    (``youtu.be/AbC`` is not ``youtu.be/aBc``). Other query parameters are
+    kept, sorted, since some sites identify articles by them.
+
+    Args:
+        url (str): URL as pasted or as resolved from the page.
+
+    Returns:
+        str: Canonical URL, e.g. ``example.com/news/story?id=7``.
+    """
+    if not url.lower().startswith(('http://', 'https://')):
+        url = 'https://' + url
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    canonical = f"{host}{parsed.path}".rstrip('/')
+
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    if params:
+        canonical += '?' + urlencode(params)
+    return canonical
+
 def get_domain_from_url(url):
     """Extract domain from URL."""
     if not url.startswith(('http://', 'https://')):
@@ -71,67 +114,132 @@ def truncate_text(text, max_length=100):
     
     return text[:max_length].rsplit(' ', 1)[0] + '...'
 
-def take_screenshot(url, output_path=None, timeout=15):
+# Page state polled while waiting for a capture to settle: load state, number
+# of finished network requests and whether the main content is on screen
+PAGE_READINESS_JS = """
+const main = document.querySelector('article, main, [role="main"], h1');
+let visible = false;
+if (main) {
+    const rect = main.getBoundingClientRect();
+    visible = rect.width > 0 && rect.height > 0 && rect.top < window.innerHeight;
+}
+return [document.readyState, performance.getEntriesByType('resource').length, visible];
+"""
+
+def wait_for_page_ready(driver, timeout=8, idle_ms=500, poll_interval=0.1):
     """
-    Take a screenshot of a webpage using Selenium WebDriver with Chromium (Docker-optimized).
+    Wait until a loaded page has settled, or until ``timeout`` seconds pass.
+
+    A page counts as settled once the DOM is ready, no network request has
+    completed for ``idle_ms`` milliseconds, and either the main content
+    element is visible or the load event has fired.
+
+    Returns:
+        bool: True if the page settled, False if the deadline was hit.
+    """
+    import time
+
+    deadline = time.monotonic() + timeout
+    idle_seconds = idle_ms / 1000.0
+    last_count = -1
+    last_change = time.monotonic()
+
+    while True:
+        now = time.monotonic()
+        try:
+            ready_state, resource_count, main_visible = driver.execute_script(PAGE_READINESS_JS)
+        except Exception:
+            ready_state, resource_count, main_visible = 'loading', last_count, False
+
+        if resource_count != last_count:
+            last_count = resource_count
+            last_change = now
+
+        if (ready_state in ('interactive', 'complete')
+                and now - last_change >= idle_seconds
+                and (main_visible or ready_state == 'complete')):
+            return True
+
+        if now >= deadline:
+            return False
+        time.sleep(min(poll_interval, max(0, deadline - now)))
+
+def screenshot_viewport():
+    """Browser window size used for captures, as (width, height)."""
+    from config import Config
+    return (Config.SCREENSHOT_WIDTH, Config.SCREENSHOT_HEIGHT)
+
+def screenshot_options():
+    """Capture settings that affect the resulting image (part of the cache key)."""
+    from config import Config
+    return {
+        'scroll_y': 250,
+        'wait': Config.SCREENSHOT_WAIT_MODE,
+        'backend': Config.SCREENSHOT_BACKEND,
+        'profile': Config.SCREENSHOT_PROFILE
+    }
+
+def take_screenshot(url, output_path=None, timeout=15, use_cache=True, deadline=None):
+    """
+    Take a screenshot of a webpage with the configured screenshot backend.
 
     Args:
         url (str): The URL of the webpage to screenshot.
         output_path (str, optional): Path to save the screenshot. If None, returns the image bytes.
         timeout (int): Maximum seconds to wait for page load.
+        use_cache (bool): Reuse a recent capture of the same page from the screenshot cache.
+        deadline (Deadline, optional): Overall time budget; the page load gets at
+            most what is left of it, and nothing is captured once it is spent.
 
     Returns:
         bytes or str: Screenshot bytes if output_path is None, otherwise the output path.
     """
-    import time
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-
-    # Set up options for Chromium
-    options = Options()
-    options.binary_location = "/usr/bin/chromium"
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--window-size=1280,1024')
-    options.add_argument('--disable-extensions')
-    options.add_argument('--disable-infobars')
-    options.add_argument('--disable-notifications')
-    options.add_argument('--disable-popup-blocking')
-    options.add_argument('--blink-settings=imagesEnabled=true')
-    options.page_load_strategy = 'eager'
-
-    try:
-        # Create the driver using system-installed chromedriver
-        driver = webdriver.Chrome(service=Service("/usr/bin/chromedriver"), options=options)
-        driver.set_page_load_timeout(timeout)
+    from screenshot_backends import get_screenshot_backend
+    from screenshot_cache import get_cached_screenshot, store_screenshot
+    from failure_cache import known_failure, record_failure, record_success
+    from deadline import DeadlineExceeded
+
+    viewport = screenshot_viewport()
+    options = screenshot_options()
+
+    screenshot = get_cached_screenshot(url, viewport, options) if use_cache else None
+
+    if screenshot is None:
+        # Don't spend another page-load timeout on a page or site that keeps failing
+        reason = known_failure('screenshot', url)
+        if reason:
+            logger.info(f"Skipping screenshot of {url}: {reason}")
+            return None
+
+        requested = timeout
+        if deadline is not None:
+            try:
+                timeout = deadline.timeout(timeout)
+            except DeadlineExceeded:
+                logger.warning(f"No time left to capture {url}")
+                return None
 
         try:
-            driver.get(url)
-            time.sleep(2)
-            driver.execute_script("window.scrollTo(0, 250)")
-
-            if output_path:
-                driver.save_screenshot(output_path)
-                result = output_path
-            else:
-                result = driver.get_screenshot_as_png()
-
+            screenshot, complete = get_screenshot_backend().capture(url, timeout, deadline)
+        except DeadlineExceeded:
+            # Out of time before the page could load; that says nothing about the page
+            logger.warning(f"No time left to capture {url}")
+            return None
         except Exception as e:
-            print(f"Timed out or error loading page: {str(e)}")
-            # Attempt screenshot of partial content
-            if output_path:
-                driver.save_screenshot(output_path)
-                result = output_path
-            else:
-                result = driver.get_screenshot_as_png()
-        finally:
-            driver.quit()
-
-        return result
-
-    except Exception as e:
-        print(f"Error setting up WebDriver: {str(e)}")
-        return None
+            logger.error(f"Error capturing screenshot of {url}: {str(e)}")
+            record_failure('screenshot', url, f"{type(e).__name__}: {str(e)}")
+            return None
+
+        # Partial captures are still returned, but not kept for reuse
+        if complete:
+            store_screenshot(url, viewport, options, screenshot)
+            record_success('screenshot', url)
+        elif timeout >= requested and not (deadline and deadline.expired):
+            # A load cut short by the time budget says nothing about the page
+            record_failure('screenshot', url, 'Page did not finish loading')
+
+    if output_path:
+        with open(output_path, 'wb') as f:
+            f.write(screenshot)
+        return output_path
+    return screenshot
@@ -0,0 +1,33 @@
+"""
+Media Placements Tracker - Background Job Worker
+
+This script runs a worker process that picks up queued jobs (link ingestion,
+docket generation and export packages) from the database and processes them
+outside the web server. Start as many as the host can handle.
+"""
+
+import sys
+import logging
+from app import app
+from jobs import run_worker
+from run import initialize_database
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='[%(asctime)s] %(levelname)s: %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger('MediaPlacementsWorker')
+
+if __name__ == '__main__':
+    if not initialize_database():
+        logger.error("Failed to initialize database. Exiting.")
+        sys.exit(1)
+    
+    try:
+        run_worker(app)
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")